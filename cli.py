@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Verificador de Conectividad - CLI para verificaciones masivas sin Streamlit
+
+Lee targets de un fichero o de stdin, los verifica en paralelo con
+URLManager/IPManager y emite cada resultado en JSONL o CSV en cuanto
+termina. El código de salida es 1 si se superan los umbrales configurados.
+
+Uso:
+    python cli.py urls targets.txt --concurrency 50 --probe-mode stream
+    python cli.py urls targets.txt --processes 8 --concurrency 20
+    cat ips.txt | python cli.py ips --timeout 1 --max-error-rate 5
+"""
+import argparse
+import csv
+import json
+import sys
+import threading
+from managers.check_result import format_timestamp
+from managers.quantile_sketch import DDSketch
+from managers.udp_probe import UDP_PAYLOADS
+from managers.probes import probe_names
+
+CSV_FIELDS = ["timestamp", "type", "target", "status", "error_type", "response_time", "status_code", "socket_code", "attempt_count"]
+
+class ResultSink:
+    """
+    Callback de analytics que escribe cada resultado y acumula el resumen
+
+    Sustituye a AnalyticsManager en la CLI para no importar pandas. El
+    timestamp se escribe en hora local como "YYYY-mm-dd HH:MM:SS" (los
+    registros lo llevan en segundos epoch).
+    """
+    def __init__(self, output, output_format, result_store=None):
+        self.output = output
+        self.output_format = output_format
+        self.result_store = result_store
+        self.total = 0
+        self.errors = 0
+        self.latency = DDSketch()
+        self._lock = threading.Lock()
+        if output_format == "csv":
+            self._writer = csv.DictWriter(output, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            self._writer.writeheader()
+
+    def add_data(self, data):
+        """Escribir un resultado (misma interfaz que AnalyticsManager.add_data)"""
+        record = {key: value for key, value in data.items() if key != "headers"}
+        record["timestamp"] = format_timestamp(record.get("timestamp"))
+        with self._lock:
+            self.total += 1
+            if record.get("status") == "Error":
+                self.errors += 1
+            response_time = record.get("response_time")
+            if isinstance(response_time, (int, float)):
+                self.latency.add(response_time)
+            if self.output_format == "csv":
+                self._writer.writerow(record)
+            else:
+                self.output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self.output.flush()
+        if self.result_store is not None:
+            self.result_store.enqueue(data)
+
+    def summary(self):
+        """Obtener el resumen de la ejecución"""
+        return {
+            "total": self.total,
+            "errors": self.errors,
+            "error_rate": (self.errors / self.total) * 100 if self.total else 0.0,
+            "p50": self.latency.quantile(0.50),
+            "p95": self.latency.quantile(0.95),
+            "p99": self.latency.quantile(0.99)
+        }
+
+def read_targets(source):
+    """Leer targets de forma perezosa (una línea por target, # para comentarios)"""
+    for line in source:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Verificación masiva de URLs e IPs sin interfaz web")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("targets", nargs="?", default="-", help="Fichero de targets (uno por línea). Por defecto stdin")
+    common.add_argument("--concurrency", type=int, default=None, help="Verificaciones simultáneas (por proceso con --processes)")
+    common.add_argument("--processes", type=int, default=None, help="Repartir el barrido entre N procesos worker (URLs y sondas de protocolo)")
+    common.add_argument("--timeout", type=float, default=3, help="Timeout por intento en segundos")
+    common.add_argument("--retries", type=int, default=1, help="Reintentos por target tras el primer intento")
+    common.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="Formato de salida")
+    common.add_argument("--output", default="-", help="Fichero de salida. Por defecto stdout")
+    common.add_argument("--db", default=None, help="Guardar también los resultados en esta base SQLite")
+    common.add_argument("--max-error-rate", type=float, default=None, help="Salir con 1 si el %% de errores lo supera")
+    common.add_argument("--max-p95", type=float, default=None, help="Salir con 1 si la latencia p95 (segundos) lo supera")
+
+    urls = subparsers.add_parser("urls", parents=[common], help="Verificar URLs completas (https://...)")
+    urls.add_argument("--probe-mode", choices=["get", "head", "stream", "capped"], default="stream", help="Modo de sonda HTTP")
+    urls.add_argument("--no-redirects", action="store_true", help="No seguir redirecciones")
+    urls.add_argument("--insecure", action="store_true", help="No verificar certificados SSL")
+
+    ips = subparsers.add_parser("ips", parents=[common], help="Verificar targets IP:PUERTO por TCP o UDP")
+    ips.add_argument("--protocol", choices=["tcp", "udp", *probe_names()], default="tcp", help="Protocolo de la sonda")
+    ips.add_argument("--udp-payload", choices=list(UDP_PAYLOADS), default=None, help="Payload UDP (por defecto según el puerto)")
+    ips.add_argument("--deadline", type=float, default=None, help="Límite global del barrido en segundos")
+    return parser
+
+def check_many(manager, targets, args):
+    """Verificar los targets en hilos o, con --processes, repartidos entre procesos"""
+    if args.processes and args.processes > 1:
+        from managers.sharded_runner import ShardedRunner
+        return ShardedRunner(manager, args.processes, args.concurrency or 20).run(targets)
+    return manager.check_many(targets, args.concurrency or 20)
+
+def run(args, source, output):
+    """
+    Ejecutar las verificaciones y devolver el código de salida
+
+    Returns:
+        int: 0 si se cumplen los umbrales, 1 si no
+    """
+    result_store = None
+    if args.db:
+        from managers.result_store import SQLiteResultStore
+        result_store = SQLiteResultStore(args.db)
+
+    sink = ResultSink(output, args.format, result_store)
+    targets = read_targets(source)
+
+    if args.mode == "urls":
+        from managers.url_manager import URLManager
+        manager = URLManager()
+        manager.set_target_params(None, None, None, None, None, args.timeout, args.retries, not args.no_redirects, not args.insecure, args.probe_mode)
+        manager.set_analytics_callback(sink)
+        for _ in check_many(manager, targets, args):
+            pass
+    else:
+        from managers.ip_manager import IPManager
+        manager = IPManager()
+        manager.set_target_params(None, None, args.protocol, args.timeout, args.retries, udp_payload=args.udp_payload)
+        manager.set_analytics_callback(sink)
+        if args.protocol in ("tcp", "udp"):
+            probe = manager.probe_udp if args.protocol == "udp" else manager.probe_tcp
+            probe(targets, args.concurrency or 500, args.timeout, args.deadline)
+        else:
+            for _ in check_many(manager, targets, args):
+                pass
+
+    if result_store is not None:
+        result_store.close()
+
+    summary = sink.summary()
+    print(
+        f"Verificaciones: {summary['total']} | Errores: {summary['errors']} ({summary['error_rate']:.1f}%) | "
+        f"p50: {summary['p50'] or 0:.3f}s p95: {summary['p95'] or 0:.3f}s p99: {summary['p99'] or 0:.3f}s",
+        file=sys.stderr
+    )
+
+    if args.max_error_rate is not None and summary["error_rate"] > args.max_error_rate:
+        return 1
+    if args.max_p95 is not None and (summary["p95"] or 0) > args.max_p95:
+        return 1
+    return 0
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    source = sys.stdin if args.targets == "-" else open(args.targets, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        return run(args, source, output)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
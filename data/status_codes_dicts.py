@@ -26,4 +26,14 @@ SOCKET_STATUS_DICT = {
     10060: ("Error", "❌ Timeout conectando a {ip}:{port}"),       # Windows WSAETIMEDOUT
     113: ("Error", "❌ No route to host: {ip}"),                   # Linux NOHOST
     10065: ("Error", "❌ No route to host: {ip}"),                 # Windows WSAEHOSTUNREACH
-}
\ No newline at end of file
+}
+
+UDP_STATUS_DICT = {
+    0: ("Éxito", "✅ Puerto UDP {port} responde en {ip}"),
+    111: ("Error", "❌ Puerto UDP {port} cerrado en {ip} (ICMP port unreachable)"),     # Linux ECONNREFUSED
+    10054: ("Error", "❌ Puerto UDP {port} cerrado en {ip} (ICMP port unreachable)"),   # Windows WSAECONNRESET
+    110: ("Advertencia", "⚠️ Sin respuesta UDP de {ip}:{port} (abierto o filtrado)"),  # Linux ETIMEDOUT
+    10060: ("Advertencia", "⚠️ Sin respuesta UDP de {ip}:{port} (abierto o filtrado)"),# Windows WSAETIMEDOUT
+    113: ("Error", "❌ No route to host: {ip}"),                                         # Linux NOHOST
+    10065: ("Error", "❌ No route to host: {ip}"),                                       # Windows WSAEHOSTUNREACH
+}
@@ -17,7 +17,8 @@ st.set_page_config(
 pg = st.navigation({
     "Herramientas": [
         st.Page(urls.urls_page, title="🌐 Verificar URL"),
-        st.Page(ips.ips_page, title="🌍 Verificar IP")
+        st.Page(ips.ips_page, title="🌍 Verificar IP"),
+        st.Page("pages/monitor.py", title="🛰️ Monitorización")
     ],
     "Análisis": [
         st.Page("pages/analytics.py", title="📊 Análisis")
@@ -1,67 +1,429 @@
 #!/usr/bin/env python3
-import pandas as pd
+import threading
+import time
 from collections import defaultdict
+from managers.check_result import PHASE_FIELDS, to_epoch
+from managers.columnar_store import ColumnarStore
+from managers.quantile_sketch import DDSketch
+from managers.result_store import get_shared_store
+from managers.rollups import RESOLUTIONS, RETENTION, RollupBucket, TimeRollups
+
+# Histórico reciente que el manager compartido del proceso carga en memoria y registros
+# máximos que conserva; las ventanas más largas salen de los rollups y del almacén persistente
+SHARED_WINDOW = 86400
+SHARED_MAX_ROWS = 200000
+
+# Sketch que acumula las latencias de los targets que superan max_targets
+OTHER_TARGETS = "__other__"
 
 class AnalyticsManager:
     """
     Clase para manejar los datos de análisis
+
+    Los registros se guardan en un ColumnarStore (un buffer tipado por
+    campo) en lugar de una lista de diccionarios. Los contadores, sumas e
+    histogramas de las métricas se actualizan al insertar, así que las
+    métricas de resumen no recorren el histórico. Las latencias se resumen
+    en sketches de cuantiles (global, por tipo y por target) combinables
+    entre sesiones y workers, y los tiempos por fase en sumas por tipo y
+    target. La línea de tiempo sale de rollups por
+    minuto, hora y día (por estado, tipo y target), no del histórico. Con
+    un result_store, cada registro se persiste además en segundo plano y
+    las consultas que empiezan antes de lo que hay en memoria (ver
+    memory_start) se sirven desde el almacén.
     """
-    def __init__(self):
-        self.data = []
-    
+    COUNTED_FIELDS = ('type', 'status', 'error_type')
+
+    def __init__(self, keep_headers=False, result_store=None, max_targets=10000, max_rows=None):
+        """
+        Args:
+            keep_headers (bool, optional): Guardar las cabeceras HTTP de cada verificación. Defaults to False
+            result_store (SQLiteResultStore, optional): Almacén persistente. Defaults to None
+            max_targets (int, optional): Targets distintos con sketch y rollup propios; los siguientes
+                se suman en OTHER_TARGETS. Defaults to 10000
+            max_rows (int, optional): Registros máximos en memoria (los más antiguos se descartan).
+                Defaults to None (sin límite)
+        """
+        self.store = ColumnarStore(keep_headers=keep_headers, max_rows=max_rows)
+        self.result_store = result_store
+        # Inicio de lo cargado desde result_store (lo anterior solo está en los rollups)
+        self._loaded_from = None
+        self.version = 0
+        # Reentrante: get_snapshot llama a los getters con el lock ya tomado
+        self._lock = threading.RLock()
+        self._total = 0
+        self._counts = {field: defaultdict(int) for field in self.COUNTED_FIELDS}
+        self._response_time_sum = 0.0
+        self._response_time_count = 0
+        self.max_targets = max_targets
+        self._sketches = {"all": DDSketch(), "type": {}, "target": {}}
+        # (tipo, target) -> [verificaciones, suma de cada campo de PHASE_FIELDS]
+        self._phases = {}
+        self.rollups = TimeRollups(max_targets=max_targets)
+
+    @classmethod
+    def from_store(cls, result_store, window=86400, keep_headers=False, max_rows=None, max_targets=10000):
+        """
+        Crear un manager con la ventana reciente de un almacén persistente
+
+        Solo los registros de la ventana (como mucho max_rows, los más
+        recientes) se cargan en memoria y en los contadores y sketches. Los
+        rollups del resto de la retención los agrega SQLite por intervalo,
+        sin leer los registros uno a uno.
+
+        Args:
+            result_store (SQLiteResultStore): Almacén persistente
+            window (float, optional): Segundos de histórico a cargar en memoria. Defaults to 86400
+            keep_headers (bool, optional): Guardar las cabeceras HTTP. Defaults to False
+            max_rows (int, optional): Registros máximos en memoria. Defaults to None (sin límite)
+            max_targets (int, optional): Targets distintos con sketch y rollup propios. Defaults to 10000
+
+        Returns:
+            AnalyticsManager: Manager con los registros de la ventana y conectado al almacén
+        """
+        manager = cls(keep_headers=keep_headers, result_store=result_store, max_targets=max_targets, max_rows=max_rows)
+        now = time.time()
+        records = result_store.query(start=now - window, limit=max_rows)
+        cutoff = now - window
+        if max_rows is not None and records and len(records) >= max_rows:
+            cutoff = to_epoch(records[0]["timestamp"])
+
+        for resolution, width in RESOLUTIONS.items():
+            rows = result_store.aggregate(width, start=now - RETENTION[resolution] * width, end=cutoff)
+            for bucket_start, status, check_type, target, error_type, count, errors, total, timed, slowest in rows:
+                manager.rollups.add_bucket(
+                    resolution, bucket_start, status, check_type, target, error_type,
+                    RollupBucket(count, errors, total, timed, slowest or 0.0)
+                )
+        for record in records:
+            manager._ingest(record)
+        manager._loaded_from = cutoff
+        return manager
+
+    def memory_start(self):
+        """
+        Obtener desde cuándo están en memoria todos los registros
+
+        Returns:
+            float: Segundos epoch (lo anterior solo está en result_store), o None si están todos
+        """
+        starts = [start for start in (self._loaded_from, self.store.evicted_until) if start is not None]
+        return max(starts) if starts else None
+
     def add_data(self, data):
         """Agregar datos"""
-        self.data.append(data)
-    
+        self._ingest(data)
+        if self.result_store is not None:
+            self.result_store.enqueue(data)
+
+    def _ingest(self, data):
+        """Añadir un registro a memoria y actualizar los agregados"""
+        # El almacén tiene su propio lock: la escritura de columnas no bloquea a los lectores de agregados.
+        # Los totales salen de los contadores, así que un registro ya en el almacén no se cuenta hasta aquí
+        self.store.append(data)
+        with self._lock:
+            self._total += 1
+            for field in self.COUNTED_FIELDS:
+                value = data.get(field)
+                if value is not None:
+                    self._counts[field][value] += 1
+            response_time = data.get('response_time')
+            if isinstance(response_time, (int, float)):
+                self._response_time_sum += response_time
+                self._response_time_count += 1
+                self._sketches["all"].add(response_time)
+                for group in ("type", "target"):
+                    key = data.get(group)
+                    if key is not None:
+                        self._group_sketch(group, key).add(response_time)
+            else:
+                response_time = None
+            phases = self._phase_totals(data.get('type'), data.get('target'))
+            phases[0] += 1
+            for index, field in enumerate(PHASE_FIELDS, 1):
+                value = data.get(field)
+                if isinstance(value, (int, float)):
+                    phases[index] += value
+            timestamp = to_epoch(data.get('timestamp'))
+            self.rollups.add(
+                time.time() if timestamp is None else timestamp,
+                data.get('status'), data.get('type'), data.get('target'), response_time, data.get('error_type')
+            )
+            self.version += 1
+
     def get_data(self):
-        """Obtener datos"""
-        return self.data
-    
+        """Obtener datos (reconstruidos como lista de diccionarios)"""
+        return self.store.to_records()
+
+    def query(self, check_type=None, status=None, error_type=None, target=None, start=None, end=None,
+              sort="timestamp", descending=True, offset=0, limit=50, fields=None):
+        """
+        Consultar una página de registros filtrada y ordenada (sin reconstruir el resto)
+
+        Si la consulta empieza antes de memory_start y hay result_store, la
+        página sale del almacén persistente (sus últimos registros pueden
+        tardar hasta su flush_interval en aparecer).
+
+        Args:
+            check_type (str | list, optional): Tipo o tipos (url/ip). Defaults to None
+            status (str | list, optional): Estado o estados. Defaults to None
+            error_type (str | list, optional): Código o códigos de error. Defaults to None
+            target (str | list, optional): Target o targets. Defaults to None
+            start (float, optional): Inicio del rango (epoch, incluido). Defaults to None
+            end (float, optional): Fin del rango (epoch, excluido). Defaults to None
+            sort (str, optional): Campo de ordenación. Defaults to "timestamp"
+            descending (bool, optional): Orden descendente. Defaults to True
+            offset (int, optional): Registros a saltar. Defaults to 0
+            limit (int, optional): Tamaño de la página. Defaults to 50
+            fields (list, optional): Campos de cada registro. Defaults to None (todos)
+
+        Returns:
+            dict: total (registros que cumplen los filtros), offset, limit y records (la página)
+
+        Raises:
+            ValueError: Si no se puede ordenar por el campo
+        """
+        filters = {"type": check_type, "status": status, "error_type": error_type, "target": target}
+        memory_start = self.memory_start()
+        if self.result_store is not None and memory_start is not None and (start is None or start < memory_start):
+            total, records = self.result_store.page(start, end, filters, sort, descending, offset, limit)
+            if fields is not None:
+                records = [{name: record.get(name) for name in fields} for record in records]
+        else:
+            total, records = self.store.query(filters, start, end, sort, descending, offset, limit, fields)
+        return {"total": total, "offset": offset, "limit": limit, "records": records}
+
     def get_total_checks(self):
         """Obtener total de verificaciones"""
-        return len(self.data)
-    
+        with self._lock:
+            return self._total
+
     def get_success_rate(self):
         """Obtener tasa de éxito"""
-        if not self.data:
-            return 0.0
-        successful = sum(1 for item in self.data if item['status'] == 'Éxito')
-        return (successful / len(self.data)) * 100
-    
+        with self._lock:
+            if not self._total:
+                return 0.0
+            return (self._counts['status'].get('Éxito', 0) / self._total) * 100
+
     def get_checks_by_type(self):
         """Obtener verificaciones por tipo (url/ip)"""
-        type_counts = defaultdict(int)
-        for item in self.data:
-            type_counts[item['type']] += 1
-        return dict(type_counts)
-    
+        with self._lock:
+            return dict(self._counts['type'])
+
     def get_checks_by_status(self):
         """Obtener verificaciones por estado"""
-        status_counts = defaultdict(int)
-        for item in self.data:
-            status_counts[item['status']] += 1
-        return dict(status_counts)
-    
+        with self._lock:
+            return dict(self._counts['status'])
+
     def get_error_types(self):
         """Obtener tipos de error"""
-        error_counts = defaultdict(int)
-        for item in self.data:
-            if item['error_type']:
-                error_counts[item['error_type']] += 1
-        return dict(error_counts)
-    
+        with self._lock:
+            return dict(self._counts['error_type'])
+
     def get_average_response_time(self):
         """Obtener tiempo de respuesta promedio"""
-        if not self.data:
-            return 0.0
-        response_times = [item['response_time'] for item in self.data]
-        return sum(response_times) / len(response_times)
-    
+        with self._lock:
+            if not self._response_time_count:
+                return 0.0
+            return self._response_time_sum / self._response_time_count
+
+    def get_latency_percentiles(self, target=None, check_type=None):
+        """
+        Obtener percentiles de latencia sin guardar las muestras
+
+        Args:
+            target (str, optional): Limitar a un target (u OTHER_TARGETS). Defaults to None
+            check_type (str, optional): Limitar a un tipo (url/ip). Defaults to None
+
+        Returns:
+            dict: p50, p95, p99, max, mean y count (0.0 si no hay datos)
+        """
+        with self._lock:
+            if target is not None:
+                sketch = self._sketches["target"].get(target)
+            elif check_type is not None:
+                sketch = self._sketches["type"].get(check_type)
+            else:
+                sketch = self._sketches["all"]
+            if sketch is None or not sketch.count:
+                return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0, "count": 0}
+            return {
+                "p50": sketch.quantile(0.50),
+                "p95": sketch.quantile(0.95),
+                "p99": sketch.quantile(0.99),
+                "max": sketch.max,
+                "mean": sketch.sum / sketch.count,
+                "count": sketch.count
+            }
+
+    def export_latency_sketches(self):
+        """
+        Exportar los sketches de latencia para combinarlos en otra sesión o worker
+
+        Returns:
+            dict: Sketches serializables (JSON) global, por tipo y por target
+        """
+        with self._lock:
+            return {
+                "all": self._sketches["all"].to_dict(),
+                "type": {key: sketch.to_dict() for key, sketch in self._sketches["type"].items()},
+                "target": {key: sketch.to_dict() for key, sketch in self._sketches["target"].items()}
+            }
+
+    def merge_latency_sketches(self, exported):
+        """
+        Combinar sketches exportados con export_latency_sketches
+
+        Args:
+            exported (dict): Sketches exportados por otro AnalyticsManager
+        """
+        with self._lock:
+            self._sketches["all"].merge(DDSketch.from_dict(exported["all"]))
+            for group in ("type", "target"):
+                for key, data in exported[group].items():
+                    self._group_sketch(group, key).merge(DDSketch.from_dict(data))
+
+    def _group_sketch(self, group, key):
+        """Sketch de un tipo o target (los targets por encima de max_targets comparten OTHER_TARGETS)"""
+        sketches = self._sketches[group]
+        if key not in sketches and group == "target" and len(sketches) >= self.max_targets:
+            key = OTHER_TARGETS
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = DDSketch()
+        return sketch
+
+    def _phase_totals(self, check_type, target):
+        """Sumas por fase de un target (los targets por encima de max_targets comparten OTHER_TARGETS)"""
+        key = (check_type, target)
+        if key not in self._phases and len(self._phases) >= self.max_targets:
+            key = (check_type, OTHER_TARGETS)
+        totals = self._phases.get(key)
+        if totals is None:
+            totals = self._phases[key] = [0] + [0.0] * len(PHASE_FIELDS)
+        return totals
+
+    def get_phase_breakdown(self, check_type="url", limit=20):
+        """
+        Obtener el tiempo medio por fase de los targets más lentos
+
+        Sale de las sumas que se actualizan al insertar, no del histórico
+        (una fase que no ocurrió cuenta como 0).
+
+        Args:
+            check_type (str, optional): Tipo de verificación (url/ip). Defaults to "url"
+            limit (int, optional): Targets a devolver, los de mayor tiempo total. Defaults to 20
+
+        Returns:
+            dict: {target: {campo de PHASE_FIELDS: segundos medios}} del más lento al más rápido
+        """
+        with self._lock:
+            means = {
+                target: [total / totals[0] for total in totals[1:]]
+                for (key, target), totals in self._phases.items()
+                if key == check_type and target is not None and totals[0]
+            }
+        slowest = sorted(means, key=lambda target: sum(means[target]), reverse=True)[:limit]
+        return {target: dict(zip(PHASE_FIELDS, means[target])) for target in slowest}
+
+    def get_window_metrics(self, start, end=None):
+        """
+        Obtener las métricas de una ventana de tiempo desde los rollups
+
+        Usa la resolución más fina que conserva la ventana completa, así que
+        el coste no depende de cuántas verificaciones haya en ella.
+
+        Args:
+            start (float): Inicio de la ventana en segundos epoch
+            end (float, optional): Fin de la ventana en segundos epoch. Defaults to None (ahora)
+
+        Returns:
+            dict: total_checks, success_rate, average_response_time, max_response_time,
+                checks_by_status, checks_by_type y error_types
+        """
+        span = (end or time.time()) - start
+        resolution = "1min" if span <= 86400 else "1h" if span <= 30 * 86400 else "1d"
+        with self._lock:
+            by_status = self.rollups.totals(resolution, "status", start, end)
+            by_type = self.rollups.totals(resolution, "type", start, end)
+            by_error = self.rollups.totals(resolution, "error_type", start, end)
+        total = sum(bucket.count for bucket in by_status.values())
+        response_time_sum = sum(bucket.response_time_sum for bucket in by_status.values())
+        response_time_count = sum(bucket.response_time_count for bucket in by_status.values())
+        success = by_status.get("Éxito")
+        return {
+            "total_checks": total,
+            "success_rate": (success.count / total) * 100 if success and total else 0.0,
+            "average_response_time": response_time_sum / response_time_count if response_time_count else 0.0,
+            "max_response_time": max((bucket.response_time_max for bucket in by_status.values()), default=0.0),
+            "checks_by_status": {key: bucket.count for key, bucket in by_status.items()},
+            "checks_by_type": {key: bucket.count for key, bucket in by_type.items()},
+            "error_types": {key: bucket.count for key, bucket in by_error.items()}
+        }
+
+    def get_snapshot(self):
+        """
+        Obtener todas las métricas de resumen de forma consistente
+
+        Returns:
+            dict: Métricas y `version`, que cambia cada vez que se añaden datos
+        """
+        with self._lock:
+            return {
+                "version": self.version,
+                "latency": self.get_latency_percentiles(),
+                "total_checks": self.get_total_checks(),
+                "success_rate": self.get_success_rate(),
+                "average_response_time": self.get_average_response_time(),
+                "checks_by_type": self.get_checks_by_type(),
+                "checks_by_status": self.get_checks_by_status(),
+                "error_types": self.get_error_types()
+            }
+
+    def get_timeline(self, resolution="1h", dimension="status", metric="count", start=None, end=None, keys=None):
+        """
+        Obtener la línea de tiempo desde los rollups (sin recorrer el histórico)
+
+        Args:
+            resolution (str, optional): "1min", "1h" o "1d". Defaults to "1h"
+            dimension (str, optional): "status", "type", "target" o "error_type". Defaults to "status"
+            metric (str, optional): count, errors, error_rate, avg_response_time o max_response_time. Defaults to "count"
+            start (float, optional): Inicio del rango en segundos epoch. Defaults to None
+            end (float, optional): Fin del rango en segundos epoch. Defaults to None
+            keys (iterable, optional): Valores de la dimensión a incluir. Defaults to None (todos)
+
+        Returns:
+            pandas.DataFrame: Una fila por bucket (índice datetime UTC) y una columna por valor
+        """
+        import pandas as pd
+        with self._lock:
+            bucket_starts, series = self.rollups.timeline(resolution, dimension, metric, start, end, keys)
+        return pd.DataFrame(series, index=pd.to_datetime(bucket_starts, unit="s", utc=True))
+
     def get_data_for_chart(self):
         """Obtener datos formateados para gráficos"""
-        if not self.data:
-            return pd.DataFrame()
-        
-        df = pd.DataFrame(self.data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
\ No newline at end of file
+        return self.store.to_dataframe()
+
+_shared_manager = None
+_shared_manager_lock = threading.Lock()
+
+def get_shared_analytics(window=SHARED_WINDOW):
+    """
+    Obtener el AnalyticsManager compartido por todas las sesiones del proceso
+
+    Se carga una vez con la ventana reciente del almacén persistente y
+    todas las páginas (y el planificador) escriben y leen en él. Conserva
+    como mucho SHARED_MAX_ROWS registros, así que la memoria no crece con
+    las verificaciones ni con las pestañas abiertas.
+
+    Args:
+        window (float, optional): Segundos de histórico a cargar la primera vez. Defaults to SHARED_WINDOW
+
+    Returns:
+        AnalyticsManager: Manager compartido conectado al almacén compartido
+    """
+    global _shared_manager
+    with _shared_manager_lock:
+        if _shared_manager is None:
+            _shared_manager = AnalyticsManager.from_store(get_shared_store(), window, max_rows=SHARED_MAX_ROWS)
+        return _shared_manager
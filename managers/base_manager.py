@@ -1,9 +1,31 @@
 #!/usr/bin/env python3
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from managers.retry_policy import RetryPolicy
+from managers.check_result import CheckResult, REQUEST_FIELDS, RESPONSE_FIELDS, METADATA_FIELDS
+from managers.error_codes import (
+    CONNECTION_REFUSED, DNS_ERROR, INVALID_FORMAT, PROTOCOL_ERROR, SSL_ERROR, TIMEOUT, UNKNOWN, classify_exception
+)
+from managers.probes import get_probe
+
+# Mensaje de una sonda fallida según su código de error (el resto son errores de socket)
+PROBE_ERROR_MESSAGES = {
+    INVALID_FORMAT: "❌ Formato inválido: {error}",
+    DNS_ERROR: "❌ Error de DNS: Dominio no encontrado",
+    TIMEOUT: "❌ Timeout en la sonda {probe} a {host}:{port}",
+    CONNECTION_REFUSED: "❌ Conexión rechazada: {host}:{port}",
+    SSL_ERROR: "❌ Error SSL: {error}",
+    PROTOCOL_ERROR: "❌ Respuesta inesperada de {probe}: {error}",
+    UNKNOWN: "❌ Respuesta inesperada de {probe}: {error}"
+}
 
 class BaseManager:
     """
     Clase base para manejar la URL/dirección
     """
+    # Valor de "type" en los registros de analytics
+    check_type = None
+
     def __init__(self):
         self.target = None
         self.final_target = None
@@ -11,24 +33,305 @@ class BaseManager:
         self.retries = 1
         self.allow_redirects = True
         self.verify_ssl = True
+        self.retry_policy = RetryPolicy()
         self.result = None
+        self.record = None
+
+    # Vistas de compatibilidad: el resultado vive en self.record (CheckResult)
+    @property
+    def request_data(self):
+        """Campos de la petición del último resultado"""
+        return self._record_view(REQUEST_FIELDS, "request_data")
+
+    @property
+    def response_data(self):
+        """Campos de la respuesta del último resultado"""
+        return self._record_view(RESPONSE_FIELDS, "response_data")
+
+    @property
+    def request_metadata(self):
+        """Metadatos del último resultado"""
+        return self._record_view(METADATA_FIELDS, "request_metadata")
+
+    def _record_view(self, names, attribute):
+        if self.record is None:
+            raise AttributeError(attribute)
+        return self.record.subset(names)
 
     def set_settings(self, target, timeout=None, retries=None, allow_redirects=None, verify_ssl=None):
         """Configurar parámetros generales"""
         raise NotImplementedError("Subclass must implement set_settings")
-    
+
     def build_target(self):
         """Construir el objetivo final (URL o IP con puerto)"""
         raise NotImplementedError("Subclass must implement build_target")
-    
+
+    def build_spec(self):
+        """
+        Construir el spec de la verificación con los atributos del manager
+
+        Returns:
+            CheckSpec: Parámetros inmutables de la verificación
+        """
+        raise NotImplementedError("Subclass must implement build_spec")
+
+    def spec_for_target(self, target):
+        """
+        Construir el spec de otro target con los parámetros de conectividad del manager
+
+        Args:
+            target (str): Target final ya construido (URL o IP:PUERTO)
+
+        Returns:
+            CheckSpec: Parámetros inmutables de la verificación
+        """
+        return self.build_spec().with_target(target)
+
+    def check(self, spec):
+        """
+        Verificar un spec sin modificar el manager
+
+        Todo el estado de la verificación vive en el spec y en variables
+        locales, así que una misma instancia puede atender verificaciones
+        concurrentes desde varios hilos. El resultado se envía a analytics.
+
+        Args:
+            spec (CheckSpec): Parámetros de la verificación
+
+        Returns:
+            tuple: ((estado, mensaje), CheckResult)
+        """
+        raise NotImplementedError("Subclass must implement check")
+
     def check_connectivity(self):
-        """Verificar conectividad"""
-        raise NotImplementedError("Subclass must implement check_connectivity")
-    
-    def _send_to_analytics(self, response_time):
-        """Enviar datos a analytics si hay callback configurado"""
-        raise NotImplementedError("Subclass must implement _send_to_analytics")
-
-    def _create_exception_data(self, start_time, error_result):
+        """
+        Verificar conectividad con los atributos del manager
+
+        Envoltorio de check: guarda el resultado en self.result y
+        self.record para las vistas request_data, response_data y
+        request_metadata.
+
+        Returns:
+            tuple: (estado, mensaje)
+        """
+        return self._keep(self.check(self.build_spec()))
+
+    def _keep(self, outcome):
+        """Guardar el resultado de check en el manager (API por atributos)"""
+        self.result, self.record = outcome
+        return self.result
+
+    def set_retry_policy(self, policy):
+        """Configurar la política de reintentos"""
+        self.retry_policy = policy
+
+    def _run_with_retries(self, spec, attempt):
+        """
+        Ejecutar un intento de verificación aplicando la política de reintentos
+
+        Steps:
+            1. Ejecutar el intento
+            2. Registrar la latencia y el resultado del intento
+            3. Si la política lo permite, esperar el backoff y repetir
+            4. Guardar los intentos en el registro
+
+        Args:
+            spec (CheckSpec): Parámetros de la verificación
+            attempt (callable): Recibe el spec y hace un único intento sin enviar a analytics
+
+        Returns:
+            tuple: ((estado, mensaje), CheckResult) del último intento
+        """
+        max_attempts = self.retry_policy.max_attempts(spec.retries)
+        attempts = []
+        start_time = time.monotonic()
+
+        for attempt_number in range(1, max_attempts + 1):
+            attempt_start = time.monotonic()
+            result, record = attempt(spec)
+            attempts.append({
+                "attempt": attempt_number,
+                "status": result[0],
+                "error_type": record.error_type,
+                "latency": time.monotonic() - attempt_start
+            })
+            if result[0] != "Error":
+                break
+            delay = self.retry_policy.backoff(attempt_number)
+            if not self.retry_policy.should_retry(attempt_number, max_attempts, record.error_type, time.monotonic() - start_time, delay):
+                break
+            time.sleep(delay)
+
+        record.attempts = attempts
+        record.attempt_count = len(attempts)
+        return result, record
+
+    def check_probe(self, name):
+        """
+        Verificar el target con una sonda de protocolo registrada (ver managers.probes)
+
+        Args:
+            name (str): Protocolo de la sonda (tls, ws, wss, ftp, smtp, redis, postgres...)
+
+        Returns:
+            tuple: (estado, mensaje)
+        """
+        return self._keep(self._check_probe(self.build_spec(), name))
+
+    def _check_probe(self, spec, name):
+        """
+        Verificar un spec con una sonda de protocolo
+
+        Steps:
+            1. Cargar la sonda (se importa la primera vez que se usa); un
+               protocolo sin sonda registrada es un error de formato
+            2. Ejecutarla, reintentando según la política de reintentos
+            3. Enviar el resultado final (con los intentos) a analytics
+
+        Args:
+            spec (CheckSpec): Parámetros de la verificación
+            name (str): Protocolo de la sonda
+
+        Returns:
+            tuple: ((estado, mensaje), CheckResult)
+        """
+        try:
+            probe = get_probe(name)
+        except ValueError as e:
+            result = ("Error", PROBE_ERROR_MESSAGES[INVALID_FORMAT].format(error=e))
+            record = CheckResult(
+                target=spec.target,
+                protocol=name,
+                port=spec.port,
+                timeout=spec.timeout,
+                retries=spec.retries,
+                verify_ssl=spec.verify_ssl,
+                response_time=0.0,
+                attempt_count=0,
+                timestamp=time.time(),
+                type=self.check_type,
+                status=result[0],
+                error_type=INVALID_FORMAT
+            )
+        else:
+            result, record = self._run_with_retries(spec, lambda spec: self._probe_attempt(spec, probe))
+
+        # Enviar a analytics
+        self._send_to_analytics(record)
+
+        return result, record
+
+    def _probe_attempt(self, spec, probe):
+        """
+        Un único intento de sonda de protocolo (sin enviar a analytics)
+
+        Steps:
+            1. Obtener host, puerto y ruta del target
+            2. Ejecutar la sonda midiendo cada fase
+            3. Traducir el fallo de la sonda a un resultado de error
+            4. Construir el resultado con el detalle de la sonda y el tiempo de cada fase
+
+        Args:
+            spec (CheckSpec): Parámetros de la verificación
+            probe (Probe): Sonda cargada con get_probe
+
+        Returns:
+            tuple: ((estado, mensaje), CheckResult)
+        """
+        from managers.session_pool import PhaseTimer
+        start_time = time.perf_counter()
+        phase_timer = PhaseTimer()
+        host, port, detail, error_type = None, None, None, None
+
+        try:
+            host, port, path = self._probe_endpoint(spec.target)
+            port = port or probe.default_port
+            status_type, message, detail = probe.check(
+                host, port, path, spec.timeout or 3, self.dns_cache, spec.verify_ssl, phase_timer,
+                getattr(self, "session_pool", None)
+            )
+            result = (status_type, message)
+            if status_type == "Error":
+                error_type = PROTOCOL_ERROR
+        except Exception as e:
+            error_type = classify_exception(e)
+            template = PROBE_ERROR_MESSAGES.get(error_type, "❌ Error de socket: {error}")
+            result = ("Error", template.format(error=e, probe=probe.name, host=host, port=port))
+
+        record = CheckResult(
+            target=spec.target,
+            protocol=probe.name,
+            port=port,
+            timeout=spec.timeout,
+            retries=spec.retries,
+            verify_ssl=spec.verify_ssl,
+            response_time=time.perf_counter() - start_time,
+            host_info=host,
+            probe_detail=detail,
+            **phase_timer.as_fields(),
+            timestamp=time.time(),
+            type=self.check_type,
+            status=result[0],
+            error_type=error_type
+        )
+        return result, record
+
+    def _probe_endpoint(self, target):
+        """
+        Obtener (host, puerto, ruta) del target para las sondas de protocolo
+
+        Raises:
+            ValueError: Si el target no tiene un formato válido
+        """
+        raise NotImplementedError("Subclass must implement _probe_endpoint")
+
+    def check_many(self, targets, concurrency=10):
+        """
+        Verificar varios targets en paralelo con un pool de hilos acotado
+
+        Todas las verificaciones comparten este manager: cada target lleva
+        su propio spec (spec_for_target) con los parámetros de conectividad
+        actuales, y cada resultado llega a AnalyticsManager igual que en
+        check_connectivity.
+
+        Steps:
+            1. Lanzar como máximo `concurrency` verificaciones a la vez
+            2. Devolver cada resultado en cuanto termina
+            3. Rellenar el hueco con el siguiente target pendiente
+
+        Args:
+            targets (iterable): Targets finales ya construidos (URL o IP:PUERTO)
+            concurrency (int, optional): Verificaciones simultáneas. Defaults to 10
+
+        Yields:
+            tuple: (target, (estado, mensaje)) en orden de finalización
+        """
+        concurrency = max(1, int(concurrency or 1))
+        targets = iter(targets)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = {}
+            # Llenar el pool sin consumir todo el iterable de targets
+            for target in targets:
+                pending[executor.submit(self.check, self.spec_for_target(target))] = target
+                if len(pending) >= concurrency:
+                    break
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    target = pending.pop(future)
+                    yield target, future.result()[0]
+                    next_target = next(targets, None)
+                    if next_target is not None:
+                        pending[executor.submit(self.check, self.spec_for_target(next_target))] = next_target
+
+    def _send_to_analytics(self, record):
+        """Enviar el resultado a analytics si hay callback configurado"""
+        analytics_callback = getattr(self, 'analytics_callback', None)
+        if analytics_callback:
+            analytics_callback.add_data(record)
+
+    def _create_exception_data(self, spec, start_time, error_result, error_type):
         """Crear datos de excepción para analytics"""
-        raise NotImplementedError("Subclass must implement _create_exception_data")
\ No newline at end of file
+        raise NotImplementedError("Subclass must implement _create_exception_data")
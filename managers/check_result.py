@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+import time
+from dataclasses import dataclass, fields
+
+# Formato de los timestamps en texto (registros antiguos y entrada manual), en hora local
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Campos de cada grupo (las vistas request_data, response_data y request_metadata de los managers)
+REQUEST_FIELDS = ("target", "protocol", "port", "timeout", "retries", "allow_redirects", "verify_ssl", "probe_mode")
+METADATA_FIELDS = ("timestamp", "type", "status", "error_type")
+
+# Campos que siempre aparecen en el registro, aunque sean None
+CORE_FIELDS = ("target", "response_time") + METADATA_FIELDS
+
+# Fases de una petición HTTP y el campo de analytics de cada una
+PHASES = ("dns", "connect", "tls", "ttfb", "body")
+PHASE_FIELDS = tuple(f"{phase}_time" for phase in PHASES)
+
+@dataclass(slots=True)
+class CheckResult:
+    """
+    Resultado de una verificación (URL, IP o sonda de protocolo)
+
+    Es la única representación que emiten los managers y que reciben
+    AnalyticsManager, el almacén persistente y la CLI. Con __slots__ ocupa
+    un puntero por campo en lugar de tres diccionarios más su mezcla, y se
+    lee como un diccionario de solo lectura (get, items, keys, [] y **) sin
+    los campos que no aplican a la verificación (None), salvo CORE_FIELDS.
+
+    Methods:
+        get: Valor de un campo (o el valor por defecto si es None)
+        items: Pares (campo, valor) presentes en el registro
+        keys: Campos presentes en el registro
+        to_dict: Registro como diccionario
+        subset: Diccionario con unos campos concretos (incluidos los None)
+    """
+    # Petición
+    target: str | None = None
+    protocol: str | None = None
+    port: int | None = None
+    timeout: float | None = None
+    retries: int | None = None
+    allow_redirects: bool | None = None
+    verify_ssl: bool | None = None
+    probe_mode: str | None = None
+
+    # Respuesta HTTP
+    status_code: int | None = None
+    content_length: int | None = None
+    body_bytes_read: int | None = None
+    redirect_count: int | None = None
+    headers: dict | None = None
+
+    # Respuesta de socket (TCP, UDP y sondas de protocolo)
+    socket_code: int | None = None
+    host_info: str | None = None
+    connection_type: str | None = None
+    addresses_tried: int | None = None
+    probe_payload: str | None = None
+    response_bytes: int | None = None
+    probe_detail: str | None = None
+
+    # Tiempos por fase y datos TLS
+    response_time: float | None = None
+    dns_time: float | None = None
+    connect_time: float | None = None
+    tls_time: float | None = None
+    ttfb_time: float | None = None
+    body_time: float | None = None
+    tls_resumed: bool | None = None
+    tls_version: str | None = None
+    cert_issuer: str | None = None
+    cert_days_left: float | None = None
+    cert_valid: bool | None = None
+
+    # Reintentos
+    attempts: list | None = None
+    attempt_count: int | None = None
+
+    # Metadatos (timestamp en segundos epoch)
+    timestamp: float | None = None
+    type: str | None = None
+    status: str | None = None
+    error_type: str | None = None
+
+    def get(self, field, default=None):
+        """Obtener un campo (default si no existe o es None)"""
+        value = getattr(self, field) if field in _FIELD_SET else None
+        return default if value is None else value
+
+    def items(self):
+        """Pares (campo, valor) del registro sin los campos que no aplican"""
+        return [
+            (field, value) for field in FIELD_NAMES
+            if (value := getattr(self, field)) is not None or field in _CORE_SET
+        ]
+
+    def keys(self):
+        """Campos presentes en el registro"""
+        return [field for field, _ in self.items()]
+
+    def __getitem__(self, field):
+        if field not in _FIELD_SET:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __contains__(self, field):
+        return field in _FIELD_SET and (field in _CORE_SET or getattr(self, field) is not None)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def to_dict(self):
+        """Registro como diccionario (sin los campos que no aplican)"""
+        return dict(self.items())
+
+    def subset(self, names):
+        """Diccionario con los campos pedidos, incluidos los que son None"""
+        return {field: getattr(self, field) for field in names}
+
+FIELD_NAMES = tuple(field.name for field in fields(CheckResult))
+RESPONSE_FIELDS = tuple(field for field in FIELD_NAMES if field not in REQUEST_FIELDS and field not in METADATA_FIELDS)
+_FIELD_SET = frozenset(FIELD_NAMES)
+_CORE_SET = frozenset(CORE_FIELDS)
+
+def to_epoch(timestamp):
+    """
+    Convertir un timestamp a segundos epoch
+
+    Args:
+        timestamp (float | str | None): Epoch, texto en TIMESTAMP_FORMAT (hora local) o None
+
+    Returns:
+        float: Segundos epoch (None si timestamp es None)
+    """
+    if timestamp is None or isinstance(timestamp, (int, float)):
+        return timestamp
+    return time.mktime(time.strptime(timestamp, TIMESTAMP_FORMAT))
+
+def format_timestamp(timestamp):
+    """Timestamp epoch como texto en hora local ("N/A" si no hay)"""
+    timestamp = to_epoch(timestamp)
+    return time.strftime(TIMESTAMP_FORMAT, time.localtime(timestamp)) if timestamp is not None else "N/A"
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+from dataclasses import dataclass, replace
+
+@dataclass(frozen=True, slots=True)
+class CheckSpec:
+    """
+    Parámetros de una verificación (inmutables)
+
+    Es la entrada de BaseManager.check: todo lo que cambia de una
+    verificación a otra viaja en el spec y no en el manager, así que una
+    misma instancia (con su pool de conexiones, su caché DNS y su callback
+    de analytics) atiende verificaciones concurrentes desde varios hilos.
+    Los managers construyen el spec de sus atributos con build_spec.
+
+    Methods:
+        with_target: Copia del spec apuntando a otro target
+    """
+    target: str | None = None
+    protocol: str | None = None
+    port: int | None = None
+    timeout: float | None = None
+    retries: int | None = None
+    allow_redirects: bool | None = None
+    verify_ssl: bool | None = None
+    probe_mode: str | None = None
+    max_body_bytes: int | None = None
+    udp_payload: str | None = None
+
+    def with_target(self, target, **changes):
+        """Copia del spec con otro target (y los campos indicados)"""
+        return replace(self, target=target, **changes)
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+import threading
+import numpy as np
+from managers.check_result import to_epoch
+
+# Tipo de columna para cada campo conocido de los registros de analytics.
+# Los campos desconocidos se guardan como columnas de objetos Python.
+FIELD_TYPES = {
+    "timestamp": "datetime",
+    "response_time": "float",
+    "dns_time": "float",
+    "connect_time": "float",
+    "tls_time": "float",
+    "ttfb_time": "float",
+    "body_time": "float",
+    "timeout": "float",
+    "status_code": "int",
+    "content_length": "int",
+    "body_bytes_read": "int",
+    "redirect_count": "int",
+    "socket_code": "int",
+    "port": "int",
+    "retries": "int",
+    "attempt_count": "int",
+    "addresses_tried": "int",
+    "cert_days_left": "float",
+    "response_bytes": "int",
+    "allow_redirects": "bool",
+    "verify_ssl": "bool",
+    "tls_resumed": "bool",
+    "cert_valid": "bool",
+    "status": "category",
+    "type": "category",
+    "error_type": "category",
+    "target": "category",
+    "protocol": "category",
+    "probe_mode": "category",
+    "host_info": "category",
+    "connection_type": "category",
+    "probe_payload": "category",
+    "probe_detail": "category",
+    "tls_version": "category",
+    "cert_issuer": "category"
+}
+
+_NAT = np.iinfo(np.int64).min
+
+class _MaskedColumn:
+    """Columna numérica con buffer NumPy y máscara de nulos"""
+    dtypes = {"float": np.float64, "int": np.int64, "bool": np.bool_}
+
+    def __init__(self, kind, capacity):
+        self.kind = kind
+        self.values = np.zeros(capacity, dtype=self.dtypes[kind])
+        self.mask = np.ones(capacity, dtype=np.bool_)
+
+    def grow(self, capacity):
+        values = np.zeros(capacity, dtype=self.values.dtype)
+        mask = np.ones(capacity, dtype=np.bool_)
+        values[:len(self.values)] = self.values
+        mask[:len(self.mask)] = self.mask
+        self.values, self.mask = values, mask
+
+    def set(self, index, value):
+        if value is not None:
+            self.values[index] = value
+            self.mask[index] = False
+
+    def get(self, index):
+        return None if self.mask[index] else self.values[index].item()
+
+    def drop(self, count, size):
+        values = np.zeros(len(self.values), dtype=self.values.dtype)
+        mask = np.ones(len(self.mask), dtype=np.bool_)
+        values[:size - count] = self.values[count:size]
+        mask[:size - count] = self.mask[count:size]
+        self.values, self.mask = values, mask
+
+    def matches(self, size, values):
+        return np.isin(self.values[:size], list(values)) & ~self.mask[:size]
+
+    def sort_key(self, size):
+        key = self.values[:size].astype(np.float64)
+        key[self.mask[:size]] = np.nan
+        return key
+
+    def to_pandas(self, size):
+        import pandas as pd
+        arrays = {"float": pd.arrays.FloatingArray, "int": pd.arrays.IntegerArray, "bool": pd.arrays.BooleanArray}
+        return arrays[self.kind](self.values[:size], self.mask[:size])
+
+class _DatetimeColumn:
+    """Columna de timestamps epoch en milisegundos (int64) con NaT para nulos"""
+    kind = "datetime"
+
+    def __init__(self, capacity):
+        self.values = np.full(capacity, _NAT, dtype=np.int64)
+
+    def grow(self, capacity):
+        values = np.full(capacity, _NAT, dtype=np.int64)
+        values[:len(self.values)] = self.values
+        self.values = values
+
+    def set(self, index, value):
+        if value is None:
+            return
+        self.values[index] = round(to_epoch(value) * 1000)
+
+    def get(self, index):
+        value = self.values[index]
+        if value == _NAT:
+            return None
+        return int(value) / 1000
+
+    def drop(self, count, size):
+        values = np.full(len(self.values), _NAT, dtype=np.int64)
+        values[:size - count] = self.values[count:size]
+        self.values = values
+
+    def matches(self, size, values):
+        return np.isin(self.values[:size], [round(to_epoch(value) * 1000) for value in values])
+
+    def between(self, size, start, end):
+        """Registros con timestamp en [start, end) (segundos epoch; None = sin límite)"""
+        values = self.values[:size]
+        selected = values != _NAT
+        if start is not None:
+            selected &= values >= round(start * 1000)
+        if end is not None:
+            selected &= values < round(end * 1000)
+        return selected
+
+    def sort_key(self, size):
+        values = self.values[:size]
+        key = values.astype(np.float64)
+        key[values == _NAT] = np.nan
+        return key
+
+    def to_pandas(self, size):
+        # Vista sin copia: datetime64 en UTC
+        return self.values[:size].view("datetime64[ms]")
+
+class _CategoryColumn:
+    """Columna categórica: valores internados y códigos int32 (-1 = nulo)"""
+    kind = "category"
+
+    def __init__(self, capacity):
+        self.codes = np.full(capacity, -1, dtype=np.int32)
+        self.categories = []
+        self.lookup = {}
+
+    def grow(self, capacity):
+        codes = np.full(capacity, -1, dtype=np.int32)
+        codes[:len(self.codes)] = self.codes
+        self.codes = codes
+
+    def set(self, index, value):
+        if value is None:
+            return
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes[index] = code
+
+    def get(self, index):
+        code = self.codes[index]
+        return None if code < 0 else self.categories[code]
+
+    def drop(self, count, size):
+        codes = self.codes[count:size]
+        # Quitar también las categorías que ya no usa ningún registro
+        used = np.unique(codes[codes >= 0])
+        remap = np.full(len(self.categories) + 1, -1, dtype=np.int32)
+        remap[used] = np.arange(len(used), dtype=np.int32)
+        self.codes = np.full(len(self.codes), -1, dtype=np.int32)
+        self.codes[:size - count] = remap[codes]
+        self.categories = [self.categories[code] for code in used]
+        self.lookup = {category: code for code, category in enumerate(self.categories)}
+
+    def matches(self, size, values):
+        codes = [self.lookup[value] for value in values if value in self.lookup]
+        return np.isin(self.codes[:size], codes)
+
+    def sort_key(self, size):
+        # Rango de cada categoría en orden alfabético, sin ordenar los registros por texto
+        ranks = np.empty(len(self.categories) + 1, dtype=np.float64)
+        ranks[np.argsort(np.array([str(category) for category in self.categories], dtype=object), kind="stable")] = np.arange(len(self.categories))
+        ranks[-1] = np.nan
+        return ranks[self.codes[:size]]
+
+    def counts(self, size):
+        """Contar registros por categoría (sin nulos)"""
+        codes = self.codes[:size]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.categories))
+        return {category: int(count) for category, count in zip(self.categories, counts) if count}
+
+    def to_pandas(self, size):
+        import pandas as pd
+        return pd.Categorical.from_codes(self.codes[:size], categories=list(self.categories))
+
+class _ObjectColumn:
+    """Columna de objetos Python para campos sin tipo conocido"""
+    kind = "object"
+
+    def __init__(self, capacity):
+        self.values = [None] * capacity
+
+    def grow(self, capacity):
+        self.values.extend([None] * (capacity - len(self.values)))
+
+    def set(self, index, value):
+        self.values[index] = value
+
+    def get(self, index):
+        return self.values[index]
+
+    def drop(self, count, size):
+        self.values = self.values[count:size] + [None] * (len(self.values) - size + count)
+
+    def matches(self, size, values):
+        values = list(values)
+        return np.fromiter((value in values for value in self.values[:size]), dtype=np.bool_, count=size)
+
+    def sort_key(self, size):
+        raise ValueError("Cannot sort by a column of untyped values")
+
+    def to_pandas(self, size):
+        import pandas as pd
+        return pd.array(self.values[:size], dtype=object)
+
+class ColumnarStore:
+    """
+    Almacén columnar de solo-añadir para los registros de analytics
+
+    Cada campo se guarda en un buffer tipado (NumPy) que crece por
+    duplicación: los numéricos con máscara de nulos, los timestamps como
+    milisegundos epoch y los campos repetitivos (status, type, error_type, target...)
+    como códigos sobre valores internados. Un valor que no encaja en el
+    tipo del campo se guarda como nulo. Las cabeceras HTTP solo se
+    guardan si se pide explícitamente. Con max_rows, al llenarse se
+    descarta la cuarta parte más antigua de los registros.
+
+    Methods:
+        append: Añade un registro
+        column: Obtiene la columna de un campo
+        get_record: Reconstruye un registro como diccionario
+        to_records: Reconstruye todos los registros
+        select: Filtra, ordena y pagina sin reconstruir los registros
+        query: Filtra, ordena y reconstruye solo los registros de la página
+        to_dataframe: DataFrame sin copia sobre los buffers
+    """
+    def __init__(self, keep_headers=False, initial_capacity=1024, max_rows=None):
+        """
+        Args:
+            keep_headers (bool, optional): Guardar las cabeceras HTTP de cada registro. Defaults to False
+            initial_capacity (int, optional): Registros reservados inicialmente. Defaults to 1024
+            max_rows (int, optional): Registros máximos en memoria. Defaults to None (sin límite)
+        """
+        self.keep_headers = keep_headers
+        self.max_rows = max_rows
+        self.capacity = initial_capacity if max_rows is None else min(initial_capacity, max_rows)
+        self.size = 0
+        self.columns = {}
+        # Registros descartados por max_rows y timestamp más reciente entre ellos (epoch)
+        self.evicted = 0
+        self.evicted_until = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def append(self, record):
+        """
+        Añadir un registro
+
+        Args:
+            record (CheckResult | dict): Registro completo de una verificación
+        """
+        with self._lock:
+            self._append(record)
+
+    def _append(self, record):
+        if self.max_rows is not None and self.size >= self.max_rows:
+            self._drop_oldest(max(1, self.max_rows // 4))
+        if self.size == self.capacity:
+            self.capacity *= 2
+            if self.max_rows is not None:
+                self.capacity = min(self.capacity, self.max_rows)
+            for column in self.columns.values():
+                column.grow(self.capacity)
+
+        index = self.size
+        for name, value in record.items():
+            if name == "headers" and not self.keep_headers:
+                continue
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = self._new_column(FIELD_TYPES.get(name, "object"))
+            try:
+                column.set(index, value)
+            except (TypeError, ValueError, OverflowError):
+                # Valor incompatible con el tipo: queda como nulo y la columna conserva su tipo
+                pass
+        self.size += 1
+
+    def column(self, name):
+        """Obtener la columna de un campo (None si nunca se ha visto)"""
+        return self.columns.get(name)
+
+    def get_record(self, index, fields=None):
+        """Reconstruir el registro `index` como diccionario (solo `fields` si se indican)"""
+        if fields is None:
+            return {name: column.get(index) for name, column in self.columns.items()}
+        return {name: self.columns[name].get(index) if name in self.columns else None for name in fields}
+
+    def select(self, filters=None, start=None, end=None, sort=None, descending=False, offset=0, limit=None):
+        """
+        Filtrar, ordenar y paginar sobre los buffers de las columnas
+
+        Los filtros y la ordenación son operaciones vectorizadas sobre los
+        códigos y valores de cada columna; solo se reconstruyen después los
+        registros de la página.
+
+        Args:
+            filters (dict, optional): Campo -> valor o lista de valores aceptados. Defaults to None
+            start (float, optional): Inicio del rango de timestamp (epoch, incluido). Defaults to None
+            end (float, optional): Fin del rango de timestamp (epoch, excluido). Defaults to None
+            sort (str, optional): Campo por el que ordenar (nulos al final). Defaults to None (orden de inserción)
+            descending (bool, optional): Orden descendente. Defaults to False
+            offset (int, optional): Registros a saltar. Defaults to 0
+            limit (int, optional): Registros de la página. Defaults to None (todos)
+
+        Returns:
+            tuple: (total de registros que cumplen los filtros, índices de la página)
+
+        Raises:
+            ValueError: Si el campo de ordenación no tiene tipo (columna de objetos)
+        """
+        with self._lock:
+            return self._select(filters, start, end, sort, descending, offset, limit)
+
+    def query(self, filters=None, start=None, end=None, sort=None, descending=False, offset=0, limit=None, fields=None):
+        """
+        Filtrar, ordenar y reconstruir los registros de una página
+
+        Como select, pero reconstruye la página sin soltar el lock, así que
+        los índices no cambian aunque otro hilo descarte registros antiguos.
+
+        Args:
+            filters, start, end, sort, descending, offset, limit: Como en select
+            fields (list, optional): Campos de cada registro. Defaults to None (todos)
+
+        Returns:
+            tuple: (total de registros que cumplen los filtros, registros de la página)
+        """
+        with self._lock:
+            total, indices = self._select(filters, start, end, sort, descending, offset, limit)
+            return total, [self.get_record(index, fields) for index in indices]
+
+    def _select(self, filters, start, end, sort, descending, offset, limit):
+        size = self.size
+        selected = np.ones(size, dtype=np.bool_)
+        for name, values in (filters or {}).items():
+            if values is None:
+                continue
+            if isinstance(values, (str, int, float, bool)):
+                values = (values,)
+            column = self.columns.get(name)
+            if column is None:
+                selected[:] = False
+                break
+            selected &= column.matches(size, values)
+        if start is not None or end is not None:
+            column = self.columns.get("timestamp")
+            if column is None:
+                selected[:] = False
+            else:
+                selected &= column.between(size, start, end)
+
+        indices = np.flatnonzero(selected)
+        column = self.columns.get(sort) if sort is not None else None
+        if column is not None:
+            key = column.sort_key(size)[indices]
+            order = -indices if descending else indices
+            if descending:
+                key = -key
+            # Desempate por orden de inserción para que las páginas sean estables; nulos al final
+            indices = indices[np.lexsort((order, key, np.isnan(key)))]
+        elif descending:
+            indices = indices[::-1]
+
+        stop = None if limit is None else offset + limit
+        return len(indices), indices[offset:stop].tolist()
+
+    def get_records(self, indices, fields=None):
+        """Reconstruir varios registros como diccionarios (solo `fields` si se indican)"""
+        with self._lock:
+            return [self.get_record(index, fields) for index in indices]
+
+    def to_records(self):
+        """Reconstruir todos los registros como diccionarios"""
+        with self._lock:
+            return [self.get_record(index) for index in range(self.size)]
+
+    def to_dataframe(self):
+        """
+        Construir un DataFrame sobre los buffers sin copiarlos
+
+        Las columnas son vistas de solo lectura hasta `size`; los registros
+        añadidos después escriben fuera de la vista o en un buffer nuevo, y
+        descartar los antiguos (max_rows) copia lo que queda a buffers
+        nuevos, así que el DataFrame sigue siendo una instantánea válida.
+        """
+        import pandas as pd
+        with self._lock:
+            if not self.size:
+                return pd.DataFrame()
+            return pd.DataFrame(
+                {name: column.to_pandas(self.size) for name, column in self.columns.items()},
+                copy=False
+            )
+
+    def _new_column(self, kind):
+        if kind == "datetime":
+            return _DatetimeColumn(self.capacity)
+        if kind == "category":
+            return _CategoryColumn(self.capacity)
+        if kind == "object":
+            return _ObjectColumn(self.capacity)
+        return _MaskedColumn(kind, self.capacity)
+
+    def _drop_oldest(self, count):
+        """
+        Descartar los `count` registros más antiguos (por orden de inserción)
+
+        Cada columna pasa a buffers nuevos en lugar de mover los datos sobre
+        los actuales, que pueden estar compartidos con DataFrames ya entregados.
+        """
+        timestamps = self.columns.get("timestamp")
+        if timestamps is not None:
+            dropped = timestamps.values[:count]
+            dropped = dropped[dropped != _NAT]
+            if len(dropped):
+                latest = int(dropped.max()) / 1000
+                self.evicted_until = latest if self.evicted_until is None else max(self.evicted_until, latest)
+        for column in self.columns.values():
+            column.drop(count, self.size)
+        self.size -= count
+        self.evicted += count
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+
+# Errores de getaddrinfo que significan "el nombre no existe" (NXDOMAIN) y se
+# pueden cachear; los transitorios (EAI_AGAIN...) se reintentan siempre
+NEGATIVE_ERRORS = {socket.EAI_NONAME}
+if hasattr(socket, "EAI_NODATA"):
+    NEGATIVE_ERRORS.add(socket.EAI_NODATA)
+
+class DNSCache:
+    """
+    Caché de resolución DNS compartida con TTL y caché negativa
+
+    Guarda las direcciones resueltas por (host, familia) durante `ttl`
+    segundos y los NXDOMAIN durante `negative_ttl`, así que un barrido de
+    muchos puertos de un host o de muchas rutas de un dominio resuelve el
+    nombre una sola vez. Las IPs literales no pasan por el resolver.
+
+    Methods:
+        resolve: Resuelve un host a una lista de (familia, dirección)
+        resolve_async: Igual que resolve sin bloquear el event loop
+        gethostbyname: Resuelve un host a su primera dirección IPv4
+        as_dict: Obtiene los contadores de aciertos y fallos
+        clear: Vacía la caché
+    """
+    def __init__(self, ttl=300, negative_ttl=30, max_entries=4096):
+        """
+        Args:
+            ttl (float, optional): Segundos que se guarda una resolución correcta. Defaults to 300
+            negative_ttl (float, optional): Segundos que se guarda un NXDOMAIN. Defaults to 30
+            max_entries (int, optional): Hosts máximos en caché. Defaults to 4096
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host, family=socket.AF_UNSPEC):
+        """
+        Resolver un host usando la caché
+
+        Args:
+            host (str): Nombre o IP
+            family (int, optional): Familia de direcciones (AF_INET, AF_INET6). Defaults to AF_UNSPEC
+
+        Returns:
+            list: Tuplas (familia, dirección) en el orden del resolver
+
+        Raises:
+            socket.gaierror: Si el nombre no existe (también desde la caché negativa)
+        """
+        literal = self._literal(host, family)
+        if literal is not None:
+            return literal
+        cached = self._lookup(host, family)
+        if cached is not None:
+            return cached
+        try:
+            infos = socket.getaddrinfo(host, None, family, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            self._store_error(host, family, e)
+            raise
+        return self._store(host, family, infos)
+
+    async def resolve_async(self, host, family=socket.AF_UNSPEC):
+        """Resolver un host usando la caché sin bloquear el event loop (ver resolve)"""
+        literal = self._literal(host, family)
+        if literal is not None:
+            return literal
+        cached = self._lookup(host, family)
+        if cached is not None:
+            return cached
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, family=family, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            self._store_error(host, family, e)
+            raise
+        return self._store(host, family, infos)
+
+    def gethostbyname(self, host):
+        """Resolver un host a su primera dirección IPv4 (como socket.gethostbyname)"""
+        return self.resolve(host, socket.AF_INET)[0][1]
+
+    def as_dict(self):
+        """Obtener estadísticas de la caché"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "negative_hits": self.negative_hits,
+                "entries": len(self._entries)
+            }
+
+    def clear(self):
+        """Vaciar la caché (los contadores se conservan)"""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _literal(host, family):
+        """Devolver la propia IP si el host ya es una dirección literal"""
+        try:
+            address = ipaddress.ip_address(host.strip("[]"))
+        except ValueError:
+            return None
+        address_family = socket.AF_INET6 if address.version == 6 else socket.AF_INET
+        if family not in (socket.AF_UNSPEC, address_family):
+            raise socket.gaierror(socket.EAI_FAMILY, "Address family for hostname not supported")
+        return [(address_family, str(address))]
+
+    def _lookup(self, host, family):
+        """Buscar un host vigente en caché (None si hay que resolverlo)"""
+        key = (host.lower(), family)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            if isinstance(entry[1], socket.gaierror):
+                self.negative_hits += 1
+                error = entry[1]
+            else:
+                self.hits += 1
+                return entry[1]
+        raise socket.gaierror(error.errno, error.strerror)
+
+    def _store(self, host, family, infos):
+        addresses = []
+        for address_family, _, _, _, sockaddr in infos:
+            if (address_family, sockaddr[0]) not in addresses:
+                addresses.append((address_family, sockaddr[0]))
+        self._put((host.lower(), family), time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    def _store_error(self, host, family, error):
+        if error.errno in NEGATIVE_ERRORS:
+            self._put((host.lower(), family), time.monotonic() + self.negative_ttl, error)
+
+    def _put(self, key, expires, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                # Descartar la entrada más antigua (los dicts conservan el orden de inserción)
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (expires, value)
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_dns_cache():
+    """Obtener la caché DNS compartida por URLManager e IPManager"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = DNSCache()
+        return _shared_cache
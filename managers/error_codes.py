@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Clasificación de errores en códigos estables (el error_type de cada resultado)
+
+La categoría sale del tipo de la excepción, de su errno o de la causa que
+envuelve (requests -> urllib3 -> socket), nunca del mensaje mostrado al
+usuario. Una excepción propia puede declarar su código con el atributo
+de clase `error_type` (como ProbeError). Cada tipo de excepción se
+resuelve una sola vez y se guarda en caché, así que clasificar cuesta
+unas pocas búsquedas en diccionarios aun con miles de fallos seguidos en
+un barrido.
+"""
+import errno
+import socket
+import ssl
+import requests
+import urllib3.exceptions
+
+# Códigos de error estables
+TIMEOUT = "timeout"
+DNS_ERROR = "dns_error"
+CONNECTION_REFUSED = "connection_refused"
+CONNECTION_RESET = "connection_reset"
+CONNECTION_ERROR = "connection_error"
+HOST_UNREACHABLE = "host_unreachable"
+NETWORK_UNREACHABLE = "network_unreachable"
+SSL_ERROR = "ssl_error"
+URL_ERROR = "url_error"
+INVALID_FORMAT = "invalid_format"
+HTTP_ERROR = "http_error"
+PROTOCOL_ERROR = "protocol_error"
+SOCKET_ERROR = "socket_error"
+UNKNOWN = "unknown"
+
+# errno (Linux/macOS y Windows) -> código
+ERRNO_CODES = {
+    errno.ETIMEDOUT: TIMEOUT, 10060: TIMEOUT,
+    errno.ECONNREFUSED: CONNECTION_REFUSED, 10061: CONNECTION_REFUSED,
+    errno.ECONNRESET: CONNECTION_RESET, 10054: CONNECTION_RESET,
+    errno.ECONNABORTED: CONNECTION_RESET, 10053: CONNECTION_RESET,
+    errno.EPIPE: CONNECTION_RESET,
+    errno.EHOSTUNREACH: HOST_UNREACHABLE, 10065: HOST_UNREACHABLE,
+    errno.EHOSTDOWN: HOST_UNREACHABLE, 10064: HOST_UNREACHABLE,
+    errno.ENETUNREACH: NETWORK_UNREACHABLE, 10051: NETWORK_UNREACHABLE,
+    errno.ENETDOWN: NETWORK_UNREACHABLE, 10050: NETWORK_UNREACHABLE,
+    # Errores de getaddrinfo (negativos en Linux) y de resolución en Windows
+    **{getattr(socket, name): DNS_ERROR for name in ("EAI_NONAME", "EAI_AGAIN", "EAI_FAIL", "EAI_NODATA", "EAI_ADDRFAMILY") if hasattr(socket, name)},
+    11001: DNS_ERROR, 11002: DNS_ERROR, 11003: DNS_ERROR, 11004: DNS_ERROR
+}
+
+# En UDP, ECONNRESET de Windows es el ICMP port unreachable (puerto cerrado)
+UDP_ERRNO_CODES = {**ERRNO_CODES, 10054: CONNECTION_REFUSED}
+
+# Excepción -> código. Las más específicas primero: se usa la primera clase del MRO que aparezca
+EXCEPTION_CODES = {
+    requests.exceptions.MissingSchema: URL_ERROR,
+    requests.exceptions.InvalidSchema: URL_ERROR,
+    requests.exceptions.InvalidURL: URL_ERROR,
+    requests.exceptions.URLRequired: URL_ERROR,
+    requests.exceptions.ConnectTimeout: TIMEOUT,
+    requests.exceptions.Timeout: TIMEOUT,
+    requests.exceptions.SSLError: SSL_ERROR,
+    requests.exceptions.TooManyRedirects: HTTP_ERROR,
+    requests.exceptions.ChunkedEncodingError: PROTOCOL_ERROR,
+    requests.exceptions.ContentDecodingError: PROTOCOL_ERROR,
+    urllib3.exceptions.NameResolutionError: DNS_ERROR,
+    urllib3.exceptions.ConnectTimeoutError: TIMEOUT,
+    urllib3.exceptions.ReadTimeoutError: TIMEOUT,
+    urllib3.exceptions.SSLError: SSL_ERROR,
+    ssl.SSLError: SSL_ERROR,
+    socket.gaierror: DNS_ERROR,
+    TimeoutError: TIMEOUT,
+    ConnectionRefusedError: CONNECTION_REFUSED,
+    ConnectionResetError: CONNECTION_RESET,
+    ConnectionAbortedError: CONNECTION_RESET,
+    BrokenPipeError: CONNECTION_RESET,
+    ValueError: INVALID_FORMAT,
+    OSError: SOCKET_ERROR
+}
+
+# Excepciones que envuelven la causa real: se clasifica la causa y, si no
+# se reconoce, se usa el código indicado
+WRAPPER_CODES = {
+    requests.exceptions.ConnectionError: CONNECTION_ERROR,
+    requests.exceptions.RequestException: CONNECTION_ERROR,
+    urllib3.exceptions.NewConnectionError: CONNECTION_ERROR,
+    urllib3.exceptions.MaxRetryError: CONNECTION_ERROR,
+    urllib3.exceptions.ProtocolError: PROTOCOL_ERROR
+}
+
+_type_cache = {}
+
+def _resolve_type(exception_type):
+    """(código, envuelve_causa) de un tipo de excepción, según su MRO"""
+    resolved = _type_cache.get(exception_type)
+    if resolved is None:
+        resolved = (UNKNOWN, False)
+        for cls in exception_type.__mro__:
+            if isinstance(cls.__dict__.get("error_type"), str):
+                resolved = (cls.error_type, False)
+                break
+            if cls in WRAPPER_CODES:
+                resolved = (WRAPPER_CODES[cls], True)
+                break
+            if cls in EXCEPTION_CODES:
+                resolved = (EXCEPTION_CODES[cls], False)
+                break
+        _type_cache[exception_type] = resolved
+    return resolved
+
+def _cause(error):
+    """Excepción envuelta: reason de urllib3, causa explícita, primer argumento o contexto"""
+    for inner in (getattr(error, "reason", None), error.__cause__, error.args[0] if error.args else None, error.__context__):
+        if isinstance(inner, BaseException):
+            return inner
+    return None
+
+def classify_errno(code, protocol=None):
+    """
+    Clasificar un código de socket (errno o error de getaddrinfo)
+
+    Args:
+        code (int): Código devuelto por connect_ex, la sonda UDP o la resolución
+        protocol (str, optional): "udp" para tratar ECONNRESET de Windows como puerto cerrado. Defaults to None
+
+    Returns:
+        str: Código de error (None si code es 0)
+    """
+    if not code:
+        return None
+    codes = UDP_ERRNO_CODES if protocol == "udp" else ERRNO_CODES
+    return codes.get(code, SOCKET_ERROR)
+
+def classify_exception(error):
+    """
+    Clasificar una excepción por su tipo, su errno o la causa que envuelve
+
+    Args:
+        error (BaseException): Excepción capturada
+
+    Returns:
+        str: Código de error
+    """
+    fallback = None
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        code, wraps = _resolve_type(type(error))
+        if not wraps:
+            if code == SOCKET_ERROR:
+                # OSError genérico: el errno es más preciso que la clase
+                code = ERRNO_CODES.get(error.errno, SOCKET_ERROR)
+            return code
+        fallback = fallback or code
+        error = _cause(error)
+    return fallback or UNKNOWN
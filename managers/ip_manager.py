@@ -1,7 +1,75 @@
 #! /usr/bin/env python3
 from managers.base_manager import BaseManager
-from data.status_codes_dicts import SOCKET_STATUS_DICT
+from managers.check_result import CheckResult
+from managers.check_spec import CheckSpec
+from managers.error_codes import INVALID_FORMAT, TIMEOUT, classify_errno, classify_exception
+from managers.dns_cache import get_shared_dns_cache
+from managers.range_scanner import ScanMatrix, expand_targets, format_target, parse_ports
+from managers.udp_probe import UDP_RETRANSMITS, payload_for
+from data.status_codes_dicts import SOCKET_STATUS_DICT, UDP_STATUS_DICT
+import asyncio
+import errno
+import ipaddress
+import selectors
 import socket
+import time
+from collections import deque
+
+# Espera antes de lanzar la conexión a la siguiente dirección (Happy Eyeballs, RFC 8305)
+CONNECTION_ATTEMPT_DELAY = 0.25
+
+# Códigos de connect_ex que indican una conexión no bloqueante en curso
+_IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, 10035}
+
+def split_target(target):
+    """
+    Separar un target IP:PUERTO en host y puerto
+
+    Acepta IPv4, nombres e IPv6 entre corchetes ("[2001:db8::1]:443"). Una
+    IPv6 sin corchetes no se acepta: "2001:db8::1:443" es a la vez una
+    dirección completa y una dirección con puerto.
+
+    Returns:
+        tuple: (host, puerto)
+
+    Raises:
+        ValueError: Si el target no tiene el formato <IP>:<PUERTO> o [<IPv6>]:<PUERTO>
+    """
+    host, separator, port = target.strip().rpartition(":")
+    if not separator or not host or not port.isdigit():
+        raise ValueError(f"Invalid target: {target!r}")
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+        ipaddress.IPv6Address(host)
+    elif ":" in host:
+        raise ValueError(f"IPv6 targets must use brackets ([<IPv6>]:<PUERTO>): {target!r}")
+    return host, int(port)
+
+def interleave_families(addresses):
+    """Alternar familias de direcciones empezando por la preferida por el resolver (RFC 8305)"""
+    if not addresses:
+        return []
+    first_family = addresses[0][0]
+    preferred = deque(address for address in addresses if address[0] == first_family)
+    others = deque(address for address in addresses if address[0] != first_family)
+    ordered = []
+    while preferred or others:
+        if preferred:
+            ordered.append(preferred.popleft())
+        if others:
+            ordered.append(others.popleft())
+    return ordered
+
+def _family_name(family):
+    return "IPv6" if family == socket.AF_INET6 else "IPv4"
+
+def _udp_connection(payload):
+    """Resultado inicial de una sonda UDP (sin respuesta hasta que llegue una)"""
+    return {
+        "socket_code": errno.ETIMEDOUT, "connection_type": None, "host_info": None, "connect_time": None,
+        "addresses_tried": 0, "protocol": "udp", "probe_payload": payload.name, "response_bytes": None
+    }
+
 class IPManager(BaseManager):
     """
     Clase para construir IPs y verificar conectividad
@@ -9,17 +77,35 @@ class IPManager(BaseManager):
     Methods:
         set_settings: Configura la IP y los parámetros de conectividad
         build_target: Construye la IP final
+        build_spec: Construye el spec inmutable de la verificación
+        check: Verifica un spec sin modificar el manager (seguro entre hilos)
         check_connectivity: Verifica la conectividad de una IP
         check_tcp_socket: Verifica puerto TCP con socket
+        check_udp_socket: Verifica puerto UDP con una petición del protocolo
+        check_many: Verifica varios IP:PUERTO en paralelo
+        probe_tcp: Verifica muchos puertos TCP con asyncio (envoltorio síncrono)
+        probe_tcp_async: Corrutina para verificar muchos puertos TCP
+        probe_udp: Verifica muchos puertos UDP con asyncio (envoltorio síncrono)
+        probe_udp_async: Corrutina para verificar muchos puertos UDP
+        check_probe: Verifica el target con una sonda de protocolo (tls, ftp, smtp, redis, postgres...)
+        scan_range: Escanea rangos de hosts (CIDR) × puertos en una matriz
 
     """
-    def __init__(self):
+    check_type = "ip"
+
+    def __init__(self, dns_cache=None):
+        """
+        Args:
+            dns_cache (DNSCache, optional): Caché de resolución DNS. Defaults to la caché compartida
+        """
         super().__init__()
+        self.dns_cache = dns_cache or get_shared_dns_cache()
         self.protocol = None
         self.ip_address = None
         self.port = None
+        self.udp_payload = None
 
-    def set_target_params(self, ip_address, port=None, protocol="tcp", timeout=None, retries=None, allow_redirects=None, verify_ssl=None):
+    def set_target_params(self, ip_address, port=None, protocol="tcp", timeout=None, retries=None, allow_redirects=None, verify_ssl=None, udp_payload=None):
         """
         Configurar los componentes de la IP y los parámetros de conectividad
         
@@ -31,6 +117,7 @@ class IPManager(BaseManager):
             retries (int, optional): Número de reintentos. Defaults to None
             allow_redirects (bool, optional): Permitir redirecciones. Defaults to None
             verify_ssl (bool, optional): Verificar certificados SSL. Defaults to None
+            udp_payload (str, optional): Payload UDP (dns, ntp, echo). Defaults to el del puerto
         """
         # Asignar componentes (dejar None si es Manual)
         self.ip_address = ip_address
@@ -42,6 +129,9 @@ class IPManager(BaseManager):
         self.retries = retries
         self.allow_redirects = allow_redirects
         self.verify_ssl = verify_ssl
+        if udp_payload is not None:
+            payload_for(None, udp_payload)
+        self.udp_payload = udp_payload
 
         # Clase base
         self.target = ip_address
@@ -66,172 +156,672 @@ class IPManager(BaseManager):
             f":{self.port}" if self.port else ""
         ]
         
-        # Unir todos los componentes
-        self.target = "".join(components)
+        # Unir todos los componentes (las IPv6 con puerto van entre corchetes)
+        if self.port and ":" in self.ip_address:
+            self.target = format_target(self.ip_address, self.port)
+        else:
+            self.target = "".join(components)
         return self.target
 
-    def check_connectivity(self):
+    def build_spec(self):
+        """
+        Construir el spec de la verificación con los atributos del manager
+
+        Returns:
+            CheckSpec: Parámetros inmutables de la verificación
+        """
+        return CheckSpec(
+            target=self.target,
+            protocol=self.protocol,
+            port=self.port,
+            timeout=self.timeout,
+            retries=self.retries,
+            allow_redirects=self.allow_redirects,
+            verify_ssl=self.verify_ssl,
+            udp_payload=self.udp_payload
+        )
+
+    def spec_for_target(self, target):
+        """Spec de un target IP:PUERTO con los parámetros de conectividad del manager"""
+        return self.build_spec().with_target(target, protocol=self.protocol or "tcp", port=None)
+
+    def check(self, spec):
         """
-        Verificar conectividad IP usando el protocolo especificado
+        Verificar conectividad IP con el protocolo del spec sin modificar el manager
 
         Steps:
             1. Validar que la dirección final exista
-            2. Llamar al método del protocolo especificado
+            2. Verificar con el método del protocolo especificado
+
+        Args:
+            spec (CheckSpec): Parámetros de la verificación
 
         Returns:
-            function: Método del protocolo especificado
+            tuple: ((estado, mensaje), CheckResult)
         """
-        # Si no se ha construido la dirección final, construirla
-        if not self.target:
+        # Si no se ha construido la dirección final, no hay nada que verificar
+        if not spec.target:
             raise ValueError("Target not built")
 
-        if self.protocol == "tcp":
-            return self.check_tcp_socket()
+        if spec.protocol == "tcp":
+            return self._check_socket(spec, self._tcp_connect)
+        if spec.protocol == "udp":
+            return self._check_socket(spec, self._udp_exchange)
+        return self._check_probe(spec, spec.protocol)
 
     def check_tcp_socket(self):
         """
         Verificar puerto TCP con socket
 
+        Returns:
+            tuple: (estado, mensaje)
+        """
+        return self._keep(self._check_socket(self.build_spec(), self._tcp_connect))
+
+    def check_udp_socket(self):
+        """
+        Verificar puerto UDP enviando una petición del protocolo (DNS, NTP o eco)
+
+        Returns:
+            tuple: (estado, mensaje)
+        """
+        return self._keep(self._check_socket(self.build_spec(), self._udp_exchange))
+
+    def _check_socket(self, spec, exchange):
+        """
+        Verificar un spec con socket
+
+        Steps:
+            1. Sondear (TCP: conectar, UDP: petición y respuesta que corresponda),
+               reintentando según la política de reintentos
+            2. Enviar el resultado final (con los intentos) a analytics
+
+        Args:
+            spec (CheckSpec): Parámetros de la verificación
+            exchange (callable): _tcp_connect o _udp_exchange
+
+        Returns:
+            tuple: ((estado, mensaje), CheckResult)
+        """
+        result, record = self._run_with_retries(spec, lambda spec: self._socket_attempt(spec, exchange))
+
+        # Enviar a analytics
+        self._send_to_analytics(record)
+
+        return result, record
+
+    def _socket_attempt(self, spec, exchange):
+        """
+        Un único intento de sonda con socket (sin enviar a analytics)
+
         Steps:
             1. Parsear IP y puerto
-            2. Crear socket
-            3. Configurar timeout
-            4. Conectar
-            5. Cerrar socket
-            6. Analizar el status code
-            7. Guardar el resultado
-        """
-        import time
-        start_time = time.time()
-        
+            2. Resolver todas las direcciones del host con la caché DNS
+            3. Sondear las direcciones (TCP: carrera Happy Eyeballs, UDP: petición y respuesta)
+            4. Analizar el status code
+            5. Construir el resultado con la dirección ganadora
+
+        Args:
+            spec (CheckSpec): Parámetros de la verificación
+            exchange (callable): _tcp_connect o _udp_exchange
+
+        Returns:
+            tuple: ((estado, mensaje), CheckResult)
+        """
+        start_time = time.perf_counter()
+        port, dns_time = spec.port, None
+
         try:
-            ip, port = self.target.split(":")
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout or 3)
-            # Actualizar self.port con el puerto real del target
-            self.port = int(port)
-            socket_result = sock.connect_ex((ip, int(port)))
-            sock.close()
+            ip, port = split_target(spec.target)
+            dns_start = time.perf_counter()
+            addresses = self.dns_cache.resolve(ip)
+            dns_time = time.perf_counter() - dns_start
+            connection = exchange(addresses, port, spec.timeout or 3, spec.udp_payload)
         except ValueError:
-            self.result = ("Error", "❌ Formato inválido: Debe ser <IP> : <PUERTO>")
-            self._handle_exception(start_time)
-            return self.result
+            result = ("Error", "❌ Formato inválido: Debe ser <IP> : <PUERTO>")
+            error_type = INVALID_FORMAT
         except socket.timeout:
-            self.result = ("Error", f"❌ Timeout conectando a {self.target}")
-            self._handle_exception(start_time)
-            return self.result
+            result = ("Error", f"❌ Timeout conectando a {spec.target}")
+            error_type = TIMEOUT
         except socket.error as e:
-            self.result = ("Error", f"❌ Error de socket: {str(e)}")
-            self._handle_exception(start_time)
-            return self.result
+            result = ("Error", f"❌ Error de socket: {str(e)}")
+            error_type = classify_exception(e)
         except Exception as e:
-            self.result = ("Error", f"❌ Error de conexión: {str(e)}")
-            self._handle_exception(start_time)
-            return self.result
-        status_type, message_template = SOCKET_STATUS_DICT.get(
-            socket_result, 
+            result = ("Error", f"❌ Error de conexión: {str(e)}")
+            error_type = classify_exception(e)
+        else:
+            # Construir los datos del resultado para acceso externo
+            return self._build_socket_data(spec, spec.target, ip, port, connection, time.perf_counter() - start_time, dns_time)
+
+        record = self._create_exception_data(spec, start_time, result, error_type, dns_time)
+        # El puerto real del target, si se llegó a leer
+        record.port = port
+        return result, record
+
+    def _probe_endpoint(self, target):
+        """Host y puerto del target IP:PUERTO para las sondas de protocolo"""
+        host, port = split_target(target)
+        return host, port, None
+
+    def _tcp_connect(self, addresses, port, timeout, udp_payload=None):
+        """
+        Conectar a las direcciones de un host en carrera (Happy Eyeballs)
+
+        Se lanza una conexión no bloqueante a la primera dirección y, si no
+        termina en CONNECTION_ATTEMPT_DELAY o falla, a la siguiente
+        (alternando IPv4 e IPv6) sin cancelar las anteriores. Gana la primera
+        que conecta, así que una familia rota no cuesta un timeout completo.
+
+        Args:
+            addresses (list): Tuplas (familia, dirección) del resolver
+            port (int): Puerto
+            timeout (float): Límite total en segundos
+            udp_payload (str, optional): Sin uso en TCP (misma firma que _udp_exchange). Defaults to None
+
+        Returns:
+            dict: socket_code, connection_type, host_info (dirección ganadora o la última probada),
+                connect_time y addresses_tried
+        """
+        pending = deque(interleave_families(addresses))
+        selector = selectors.DefaultSelector()
+        in_flight = {}
+        end_time = time.monotonic() + timeout
+        next_start = time.monotonic()
+        connection = {"socket_code": errno.ETIMEDOUT, "connection_type": None, "host_info": None, "connect_time": None, "addresses_tried": 0}
+
+        try:
+            while pending or in_flight:
+                now = time.monotonic()
+                if now >= end_time:
+                    connection["socket_code"] = errno.ETIMEDOUT
+                    break
+                if pending and (not in_flight or now >= next_start):
+                    family, address = pending.popleft()
+                    connection.update(connection_type=_family_name(family), host_info=address, addresses_tried=connection["addresses_tried"] + 1)
+                    try:
+                        sock = socket.socket(family, socket.SOCK_STREAM)
+                    except OSError as e:
+                        # Familia no soportada en este host: cuenta como fallo de esta dirección
+                        connection["socket_code"] = e.errno if e.errno is not None else -1
+                        continue
+                    sock.setblocking(False)
+                    socket_result = sock.connect_ex((address, port))
+                    if socket_result == 0:
+                        sock.close()
+                        connection.update(socket_code=0, connect_time=time.monotonic() - now)
+                        return connection
+                    if socket_result in _IN_PROGRESS:
+                        in_flight[sock] = (family, address, now)
+                        selector.register(sock, selectors.EVENT_WRITE)
+                        next_start = now + CONNECTION_ATTEMPT_DELAY
+                    else:
+                        # Fallo inmediato: pasar ya a la siguiente dirección
+                        sock.close()
+                        connection["socket_code"] = socket_result
+                    continue
+
+                wait = end_time if not pending else min(end_time, next_start)
+                for key, _ in selector.select(max(0.0, wait - now)):
+                    sock = key.fileobj
+                    family, address, started = in_flight.pop(sock)
+                    selector.unregister(sock)
+                    socket_result = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    sock.close()
+                    if socket_result == 0:
+                        connection.update(socket_code=0, connection_type=_family_name(family), host_info=address, connect_time=time.monotonic() - started)
+                        return connection
+                    connection.update(socket_code=socket_result, connection_type=_family_name(family), host_info=address)
+                    next_start = time.monotonic()
+            return connection
+        finally:
+            for sock in in_flight:
+                sock.close()
+            selector.close()
+
+    def _udp_exchange(self, addresses, port, timeout, udp_payload=None):
+        """
+        Enviar la petición UDP del protocolo y esperar una respuesta que corresponda
+
+        El datagrama se reenvía UDP_RETRANSMITS veces repartidas en el
+        timeout y se descartan las respuestas que no corresponden a la
+        petición. Un ICMP port unreachable llega como ECONNREFUSED en el
+        socket conectado (puerto cerrado) y se pasa a la siguiente dirección;
+        sin respuesta el puerto queda como abierto o filtrado (ETIMEDOUT).
+
+        Args:
+            addresses (list): Tuplas (familia, dirección) del resolver
+            port (int): Puerto
+            timeout (float): Límite total en segundos
+            udp_payload (str, optional): Payload UDP (dns, ntp, echo). Defaults to el del puerto
+
+        Returns:
+            dict: Mismos campos que _tcp_connect más protocol, probe_payload y response_bytes
+        """
+        payload = payload_for(port, udp_payload)
+        end_time = time.monotonic() + timeout
+        connection = _udp_connection(payload)
+
+        for family, address in interleave_families(addresses):
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                break
+            connection.update(connection_type=_family_name(family), host_info=address, addresses_tried=connection["addresses_tried"] + 1)
+            datagram, token = payload.build()
+            started = time.monotonic()
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                try:
+                    sock.connect((address, port))
+                    for _ in range(UDP_RETRANSMITS + 1):
+                        sock.send(datagram)
+                        resend_at = min(end_time, time.monotonic() + remaining / (UDP_RETRANSMITS + 1))
+                        while (wait := resend_at - time.monotonic()) > 0:
+                            sock.settimeout(wait)
+                            try:
+                                data = sock.recv(65535)
+                            except socket.timeout:
+                                break
+                            if payload.matches(data, token):
+                                connection.update(socket_code=0, connect_time=time.monotonic() - started, response_bytes=len(data))
+                                return connection
+                except OSError as e:
+                    # Cerrado (ICMP) o inalcanzable: probar la siguiente dirección
+                    connection["socket_code"] = e.errno if e.errno is not None else -1
+                    continue
+            connection["socket_code"] = errno.ETIMEDOUT
+            break
+        return connection
+
+    def probe_tcp(self, targets, concurrency=500, timeout=None, deadline=None, on_result=None, analytics=True, retries=None):
+        """
+        Verificar muchos puertos TCP con asyncio desde código síncrono
+
+        Args:
+            targets (iterable): Targets IP:PUERTO
+            concurrency (int, optional): Conexiones simultáneas. Defaults to 500
+            timeout (float, optional): Límite por sonda en segundos. Defaults to self.timeout
+            deadline (float, optional): Límite global del barrido en segundos. Defaults to None
+            on_result (callable, optional): Recibe (target, resultado) en lugar de acumularlos. Defaults to None
+            analytics (bool, optional): Enviar cada sonda al callback de analytics. Defaults to True
+            retries (int, optional): Reintentos por sonda. Defaults to None (self.retries)
+
+        Returns:
+            list: Tuplas (target, (estado, mensaje)) en orden de finalización (vacía con on_result)
+        """
+        return asyncio.run(self.probe_tcp_async(targets, concurrency, timeout, deadline, on_result, analytics, retries))
+
+    def scan_range(self, hosts, ports, concurrency=500, timeout=None, deadline=None, analytics=False):
+        """
+        Escanear hosts × puertos y reunir los resultados en una matriz
+
+        Los targets se generan a medida que los workers los piden y cada
+        resultado se escribe directamente en la matriz, así que ni la lista
+        de targets ni la de resultados llegan a existir en memoria.
+
+        Por defecto las sondas del escaneo no se envían a analytics: un
+        barrido de miles de puertos inundaría el histórico y llenaría el
+        límite de targets de los rollups y de los sketches por target.
+        Tampoco se reintentan: en un barrido, repetir cada puerto filtrado
+        duplicaría el tiempo total.
+
+        Args:
+            hosts (str): CIDR, rangos IP y hosts separados por comas ("10.0.0.0/24")
+            ports (str | list): Puertos, rangos y presets ("22,80,8000-8100,web") o rangos de parse_ports
+            concurrency (int, optional): Conexiones simultáneas. Defaults to 500
+            timeout (float, optional): Límite por sonda en segundos. Defaults to self.timeout
+            deadline (float, optional): Límite global del barrido en segundos. Defaults to None
+            analytics (bool, optional): Enviar cada sonda al callback de analytics. Defaults to False
+
+        Returns:
+            ScanMatrix: Estado de cada host y puerto
+        """
+        ranges = parse_ports(ports) if isinstance(ports, str) else ports
+        matrix = ScanMatrix(ranges)
+        self.probe_tcp(expand_targets(hosts, ranges), concurrency, timeout, deadline, matrix.record, analytics, retries=0)
+        return matrix
+
+    async def probe_tcp_async(self, targets, concurrency=500, timeout=None, deadline=None, on_result=None, analytics=True, retries=None):
+        """
+        Verificar muchos puertos TCP con conexiones no bloqueantes
+
+        Un número fijo de workers consume el iterable de targets de forma
+        perezosa, así que nunca hay más de `concurrency` sockets abiertos.
+        Las sondas que no pueden empezar antes del límite global se registran
+        como timeout. Cada resultado se envía a analytics como en check_tcp_socket.
+
+        Args:
+            targets (iterable): Targets IP:PUERTO
+            concurrency (int, optional): Conexiones simultáneas. Defaults to 500
+            timeout (float, optional): Límite por sonda en segundos. Defaults to self.timeout
+            deadline (float, optional): Límite global del barrido en segundos. Defaults to None
+            on_result (callable, optional): Recibe (target, resultado) en lugar de acumularlos. Defaults to None
+            analytics (bool, optional): Enviar cada sonda al callback de analytics. Defaults to True
+            retries (int, optional): Reintentos por sonda. Defaults to None (self.retries)
+
+        Returns:
+            list: Tuplas (target, (estado, mensaje)) en orden de finalización (vacía con on_result)
+        """
+        return await self._probe_many_async(targets, concurrency, timeout, deadline, on_result, self._tcp_connect_async, analytics, retries)
+
+    def probe_udp(self, targets, concurrency=500, timeout=None, deadline=None, on_result=None, analytics=True):
+        """
+        Verificar muchos puertos UDP con asyncio desde código síncrono
+
+        Args:
+            targets (iterable): Targets IP:PUERTO
+            concurrency (int, optional): Sondas simultáneas. Defaults to 500
+            timeout (float, optional): Límite por sonda en segundos. Defaults to self.timeout
+            deadline (float, optional): Límite global del barrido en segundos. Defaults to None
+            on_result (callable, optional): Recibe (target, resultado) en lugar de acumularlos. Defaults to None
+            analytics (bool, optional): Enviar cada sonda al callback de analytics. Defaults to True
+
+        Returns:
+            list: Tuplas (target, (estado, mensaje)) en orden de finalización (vacía con on_result)
+        """
+        return asyncio.run(self.probe_udp_async(targets, concurrency, timeout, deadline, on_result, analytics))
+
+    async def probe_udp_async(self, targets, concurrency=500, timeout=None, deadline=None, on_result=None, analytics=True):
+        """
+        Verificar muchos puertos UDP con sockets no bloqueantes
+
+        Igual que probe_tcp_async, pero cada sonda envía la petición del
+        protocolo del puerto (o el udp_payload del manager) y espera su respuesta.
+
+        Args:
+            targets (iterable): Targets IP:PUERTO
+            concurrency (int, optional): Sondas simultáneas. Defaults to 500
+            timeout (float, optional): Límite por sonda en segundos. Defaults to self.timeout
+            deadline (float, optional): Límite global del barrido en segundos. Defaults to None
+            on_result (callable, optional): Recibe (target, resultado) en lugar de acumularlos. Defaults to None
+            analytics (bool, optional): Enviar cada sonda al callback de analytics. Defaults to True
+
+        Returns:
+            list: Tuplas (target, (estado, mensaje)) en orden de finalización (vacía con on_result)
+        """
+        return await self._probe_many_async(targets, concurrency, timeout, deadline, on_result, self._udp_exchange_async, analytics)
+
+    async def _probe_many_async(self, targets, concurrency, timeout, deadline, on_result, exchange, analytics=True, retries=None):
+        """Repartir los targets entre `concurrency` workers que sondean con `exchange`"""
+        loop = asyncio.get_running_loop()
+        # Los parámetros del barrido se fijan al empezar, aunque el manager cambie después
+        spec = self.build_spec()
+        if retries is not None:
+            spec = spec.with_target(spec.target, retries=retries)
+        timeout = timeout or spec.timeout or 3
+        end_time = loop.time() + deadline if deadline is not None else None
+        targets = iter(targets)
+        results = []
+
+        async def worker():
+            for target in targets:
+                result = await self._probe_target(spec, target, timeout, end_time, exchange, analytics)
+                if on_result is None:
+                    results.append((target, result))
+                else:
+                    on_result(target, result)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, int(concurrency or 1)))))
+        return results
+
+    async def _probe_target(self, spec, target, timeout, end_time, exchange, analytics=True):
+        """
+        Sonda no bloqueante para un único target
+
+        Args:
+            spec (CheckSpec): Parámetros del barrido (reintentos, protocolo y payload UDP)
+            target (str): Target IP:PUERTO
+            timeout (float): Límite de la sonda en segundos
+            end_time (float): Instante límite global según el reloj del loop, o None
+            exchange (callable): _tcp_connect_async o _udp_exchange_async
+            analytics (bool, optional): Enviar el resultado al callback de analytics. Defaults to True
+
+        Returns:
+            tuple: (estado, mensaje)
+        """
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+
+        try:
+            ip, port = split_target(target)
+        except ValueError:
+            result = ("Error", "❌ Formato inválido: Debe ser <IP> : <PUERTO>")
+            record = self._create_exception_data(spec, start_time, result, INVALID_FORMAT)
+            record.target = target
+            if analytics:
+                self._send_to_analytics(record)
+            return result
+
+        # Un NXDOMAIN no se reintenta: la caché negativa daría el mismo resultado
+        dns_start = loop.time()
+        try:
+            addresses = await self.dns_cache.resolve_async(ip)
+            max_attempts = self.retry_policy.max_attempts(spec.retries)
+        except socket.gaierror as e:
+            addresses, resolve_error, max_attempts = None, e.errno, 1
+        dns_time = loop.time() - dns_start
+
+        attempts = []
+        probe_start = loop.time()
+
+        for attempt_number in range(1, max_attempts + 1):
+            attempt_start = loop.time()
+            if addresses is None:
+                connection = {"socket_code": resolve_error}
+            else:
+                connection = await exchange(addresses, port, timeout, end_time, spec.udp_payload)
+            result, record = self._build_socket_data(
+                spec, target, ip, port, connection, time.perf_counter() - start_time, dns_time
+            )
+            attempts.append({
+                "attempt": attempt_number,
+                "status": result[0],
+                "error_type": record.error_type,
+                "latency": loop.time() - attempt_start
+            })
+            if result[0] != "Error":
+                break
+            delay = self.retry_policy.backoff(attempt_number)
+            if not self.retry_policy.should_retry(attempt_number, max_attempts, record.error_type, loop.time() - probe_start, delay):
+                break
+            if end_time is not None and loop.time() + delay >= end_time:
+                break
+            await asyncio.sleep(delay)
+
+        record.attempts = attempts
+        record.attempt_count = len(attempts)
+        if analytics:
+            self._send_to_analytics(record)
+        return result
+
+    async def _tcp_connect_async(self, addresses, port, timeout, end_time, udp_payload=None):
+        """
+        Conexión TCP no bloqueante en carrera entre direcciones (ver _tcp_connect)
+
+        Args:
+            addresses (list): Tuplas (familia, dirección) del resolver
+            port (int): Puerto
+            timeout (float): Límite de la conexión en segundos
+            end_time (float): Instante límite global según el reloj del loop, o None
+            udp_payload (str, optional): Sin uso en TCP (misma firma que _udp_exchange_async). Defaults to None
+
+        Returns:
+            dict: Mismos campos que _tcp_connect
+        """
+        loop = asyncio.get_running_loop()
+        connection = {"socket_code": errno.ETIMEDOUT, "connection_type": None, "host_info": None, "connect_time": None, "addresses_tried": 0}
+        remaining = timeout if end_time is None else min(timeout, end_time - loop.time())
+        if remaining <= 0:
+            return connection
+
+        async def attempt(family, address):
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            started = loop.time()
+            try:
+                await loop.sock_connect(sock, (address, port))
+                return loop.time() - started
+            finally:
+                sock.close()
+
+        pending = deque(interleave_families(addresses))
+        tasks = {}
+        probe_end = loop.time() + remaining
+        try:
+            while pending or tasks:
+                if pending:
+                    family, address = pending.popleft()
+                    connection.update(connection_type=_family_name(family), host_info=address, addresses_tried=connection["addresses_tried"] + 1)
+                    tasks[asyncio.ensure_future(attempt(family, address))] = (family, address)
+                remaining = probe_end - loop.time()
+                if remaining <= 0:
+                    connection["socket_code"] = errno.ETIMEDOUT
+                    break
+                done, _ = await asyncio.wait(
+                    tasks,
+                    timeout=min(CONNECTION_ATTEMPT_DELAY, remaining) if pending else remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    family, address = tasks.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        connection.update(socket_code=0, connection_type=_family_name(family), host_info=address, connect_time=task.result())
+                        return connection
+                    socket_code = error.errno if isinstance(error, OSError) and error.errno is not None else -1
+                    connection.update(socket_code=socket_code, connection_type=_family_name(family), host_info=address)
+            return connection
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _udp_exchange_async(self, addresses, port, timeout, end_time, udp_payload=None):
+        """
+        Petición UDP no bloqueante con reenvíos y validación de la respuesta (ver _udp_exchange)
+
+        Args:
+            addresses (list): Tuplas (familia, dirección) del resolver
+            port (int): Puerto
+            timeout (float): Límite de la sonda en segundos
+            end_time (float): Instante límite global según el reloj del loop, o None
+            udp_payload (str, optional): Payload UDP (dns, ntp, echo). Defaults to el del puerto
+
+        Returns:
+            dict: Mismos campos que _udp_exchange
+        """
+        loop = asyncio.get_running_loop()
+        payload = payload_for(port, udp_payload)
+        connection = _udp_connection(payload)
+        remaining = timeout if end_time is None else min(timeout, end_time - loop.time())
+        probe_end = loop.time() + remaining
+
+        for family, address in interleave_families(addresses):
+            remaining = probe_end - loop.time()
+            if remaining <= 0:
+                break
+            connection.update(connection_type=_family_name(family), host_info=address, addresses_tried=connection["addresses_tried"] + 1)
+            datagram, token = payload.build()
+            started = loop.time()
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                sock.setblocking(False)
+                try:
+                    sock.connect((address, port))
+                    for _ in range(UDP_RETRANSMITS + 1):
+                        sock.send(datagram)
+                        resend_at = min(probe_end, loop.time() + remaining / (UDP_RETRANSMITS + 1))
+                        while (wait := resend_at - loop.time()) > 0:
+                            try:
+                                data = await asyncio.wait_for(loop.sock_recv(sock, 65535), wait)
+                            except asyncio.TimeoutError:
+                                break
+                            if payload.matches(data, token):
+                                connection.update(socket_code=0, connect_time=loop.time() - started, response_bytes=len(data))
+                                return connection
+                except OSError as e:
+                    connection["socket_code"] = e.errno if e.errno is not None else -1
+                    continue
+            connection["socket_code"] = errno.ETIMEDOUT
+            break
+        return connection
+
+    def _build_socket_data(self, spec, target, ip, port, connection, response_time, dns_time=None):
+        """
+        Construir resultado y datos de analytics a partir de un código de socket
+
+        Args:
+            spec (CheckSpec): Parámetros de la verificación
+            target (str): Target verificado (IP:PUERTO)
+            ip (str): IP o host del target
+            port (int): Puerto del target
+            connection (dict): Resultado de la conexión (socket_code y, si hubo carrera,
+                connection_type, host_info, connect_time y addresses_tried)
+            response_time (float): Tiempo de la verificación en segundos
+            dns_time (float, optional): Segundos de la fase DNS. Defaults to None
+
+        Returns:
+            tuple: (result, record) con record como CheckResult
+        """
+        socket_result = connection["socket_code"]
+        protocol = connection.get("protocol", spec.protocol)
+        status_dict = UDP_STATUS_DICT if protocol == "udp" else SOCKET_STATUS_DICT
+        status_type, message_template = status_dict.get(
+            socket_result,
             ("Error", f"❌ Error de conexión ({socket_result}) a {ip}:{port}")
         )
         # Reemplazar placeholders en el mensaje
-        message = message_template.format(port=port, ip=ip)
-        self.result = (status_type, message)
-
-        # Guardar los datos de la entrada para acceso externo
-        self.request_data = {
-            "target": self.target,
-            "protocol": self.protocol,
-            "port": self.port,
-            "timeout": self.timeout,
-            "retries": self.retries
-        }
-
-        # Guardar los datos de la respuesta para acceso externo
-        self.response_data = {
-            'socket_code': socket_result,
-            'response_time': time.time() - start_time,
-            'host_info': socket.gethostbyname(ip) if ':' not in ip else ip,
-            'connection_type': 'IPv4' if '.' in ip else 'IPv6'
-        }
-
-        # Guardar los datos de metadata para acceso externo
-        self.request_metadata = {
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "type": "ip",
-            "status": self.result[0],
-            "error_type": self._extract_error_type(self.result[1]) if self.result[0] == "Error" else None
-        }
-        
-        # Enviar a analytics
-        self._send_to_analytics(self.request_data, self.response_data, self.request_metadata)
-        
-        return self.result
+        result = (status_type, message_template.format(port=port, ip=ip))
 
-    def _handle_exception(self, start_time):
-        """Manejar excepción usando datos centralizados"""
-        request_data, response_data, request_metadata = self._create_exception_data(start_time, self.result)
-        
-        # Asignar como atributos para que los tests los encuentren
-        self.request_data = request_data
-        self.response_data = response_data
-        self.request_metadata = request_metadata
-        
-        self._send_to_analytics(request_data, response_data, request_metadata)
-    
-    def _create_exception_data(self, start_time, error_result):
+        record = CheckResult(
+            target=target,
+            protocol=protocol,
+            port=int(port),
+            timeout=spec.timeout,
+            retries=spec.retries,
+            socket_code=socket_result,
+            response_time=response_time,
+            host_info=connection.get("host_info"),
+            dns_time=dns_time,
+            connect_time=connection.get("connect_time"),
+            addresses_tried=connection.get("addresses_tried"),
+            connection_type=connection.get("connection_type"),
+            probe_payload=connection.get("probe_payload"),
+            response_bytes=connection.get("response_bytes"),
+            timestamp=time.time(),
+            type="ip",
+            status=result[0],
+            error_type=classify_errno(socket_result, protocol) if result[0] == "Error" else None
+        )
+        return result, record
+
+    def _create_exception_data(self, spec, start_time, error_result, error_type, dns_time=None):
         """
-        Crear datos de excepción para analytics
-        
+        Crear el resultado de una excepción para analytics
+
         Args:
-            start_time: Tiempo de inicio
+            spec: Parámetros de la verificación (CheckSpec)
+            start_time: Tiempo de inicio (time.perf_counter)
             error_result: Tupla (status, message)
-        
+            error_type: Código de error (ver managers.error_codes)
+            dns_time: Segundos de la fase DNS, si se llegó a resolver. Defaults to None
+
         Returns:
-            tuple: (request_data, response_data, request_metadata)
-        """
-        import time
-        request_data = {
-            "target": getattr(self, 'target', None),
-            "protocol": getattr(self, 'protocol', None),
-            "port": getattr(self, 'port', None),
-            "timeout": getattr(self, 'timeout', None),
-            "retries": getattr(self, 'retries', None)
-        }
-        response_data = {
-            'response_time': time.time() - start_time,
-            'socket_code': None,
-            'host_info': None,
-            'connection_type': None
-        }
-        request_metadata = {
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "type": "ip",  
-            "status": error_result[0],
-            "error_type": self._extract_error_type(error_result[1]) if hasattr(self, '_extract_error_type') else None
-        }
-        return request_data, response_data, request_metadata
-    
+            CheckResult: Resultado sin datos de socket
+        """
+        return CheckResult(
+            target=spec.target,
+            protocol=spec.protocol,
+            port=spec.port,
+            timeout=spec.timeout,
+            retries=spec.retries,
+            response_time=time.perf_counter() - start_time,
+            dns_time=dns_time,
+            timestamp=time.time(),
+            type="ip",
+            status=error_result[0],
+            error_type=error_type
+        )
+
     def set_analytics_callback(self, manager):
         """Configurar callback para analytics"""
         self.analytics_callback = manager
-    
-    def _extract_error_type(self, message):
-        """Extraer tipo de error del mensaje"""
-        if "Timeout" in message:
-            return "timeout"
-        elif "conexión" in message or "connection" in message.lower():
-            return "connection_refused"
-        elif "Formato inválido" in message:
-            return "invalid_format"
-        elif "socket" in message.lower():
-            return "socket_error"
-        else:
-            return "unknown"
-    
-    def _send_to_analytics(self, request_data, response_data, request_metadata):
-        """Enviar datos a analytics si hay callback configurado"""
-        if hasattr(self, 'analytics_callback') and self.analytics_callback:
-            complete_data = {**request_data, **response_data, **request_metadata}
-            self.analytics_callback.add_data(complete_data)
 
 if __name__ == "__main__":
     ip_manager = IPManager()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Registro de sondas de protocolo (TLS, WebSocket, FTP, SMTP, Redis, Postgres...)
+
+Cada sonda se registra con la ruta "módulo:Clase" y solo se importa la
+primera vez que se usa, así que arrancar la aplicación no paga las
+importaciones de todos los plugins.
+"""
+import importlib
+
+# Sondas incluidas: nombre (protocolo o esquema de URL) -> "módulo:Clase"
+PROBES = {
+    "tls": "managers.probes.tls:TLSProbe",
+    "ws": "managers.probes.websocket:WebSocketProbe",
+    "wss": "managers.probes.websocket:SecureWebSocketProbe",
+    "ftp": "managers.probes.banner:FTPProbe",
+    "smtp": "managers.probes.banner:SMTPProbe",
+    "redis": "managers.probes.redis:RedisProbe",
+    "postgres": "managers.probes.postgres:PostgresProbe"
+}
+
+_loaded = {}
+
+def register_probe(name, probe):
+    """
+    Registrar una sonda
+
+    Args:
+        name (str): Protocolo que atiende la sonda (también como esquema de URL)
+        probe (str | type | Probe): Ruta "módulo:Clase" (carga diferida), clase o instancia
+    """
+    PROBES[name] = probe
+    _loaded.pop(name, None)
+
+def unregister_probe(name):
+    """
+    Quitar una sonda del registro (y su instancia ya cargada)
+
+    Args:
+        name (str): Protocolo de la sonda
+
+    Returns:
+        bool: True si la sonda estaba registrada
+    """
+    _loaded.pop(name, None)
+    return PROBES.pop(name, None) is not None
+
+def probe_names():
+    """Nombres de las sondas registradas"""
+    return list(PROBES)
+
+def get_probe(name):
+    """
+    Obtener la sonda de un protocolo, importándola si aún no se ha usado
+
+    Args:
+        name (str): Protocolo registrado
+
+    Returns:
+        Probe: Instancia de la sonda
+
+    Raises:
+        ValueError: Si no hay ninguna sonda registrada para el protocolo
+    """
+    probe = _loaded.get(name)
+    if probe is not None:
+        return probe
+    if name not in PROBES:
+        raise ValueError(f"Unknown probe: {name!r} (available: {probe_names()})")
+
+    probe = PROBES[name]
+    if isinstance(probe, str):
+        module_name, _, class_name = probe.partition(":")
+        probe = getattr(importlib.import_module(module_name), class_name)
+    if isinstance(probe, type):
+        probe = probe()
+    _loaded[name] = probe
+    return probe
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+from managers.probes.base import Probe, ProbeError, read_line
+
+class BannerProbe(Probe):
+    """Lee el saludo del servidor y comprueba su código; después se despide con QUIT"""
+    ready_code = b"220"
+
+    def exchange(self, sock, host, port, path):
+        banner = read_line(sock)
+        if not banner:
+            raise ProbeError("el servidor cerró la conexión sin saludo")
+        detail = banner.decode("utf-8", "replace")[:200]
+        if not banner.startswith(self.ready_code):
+            # 421 y similares: el servicio existe pero no atiende ahora
+            return ("Advertencia", f"⚠️ {self.name.upper()} en {host}:{port} no disponible: {detail}", detail)
+        try:
+            sock.sendall(b"QUIT\r\n")
+        except OSError:
+            pass
+        return ("Éxito", f"✅ {self.name.upper()} responde en {host}:{port}", detail)
+
+class FTPProbe(BannerProbe):
+    name = "ftp"
+    default_port = 21
+
+class SMTPProbe(BannerProbe):
+    name = "smtp"
+    default_port = 25
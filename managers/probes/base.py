@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+import socket
+import time
+
+class ProbeError(Exception):
+    """El servicio contestó, pero no como el protocolo esperado"""
+    error_type = "protocol_error"
+
+class Probe:
+    """
+    Sonda de un protocolo sobre TCP
+
+    La sonda solo implementa el intercambio con el servicio; resolver con la
+    caché DNS, conectar, negociar TLS y medir cada fase es común a todas.
+    Las fases se registran en el PhaseTimer del manager: "dns", "connect",
+    "tls" y "ttfb" (desde el envío hasta la respuesta del servicio). El
+    handshake TLS usa el contexto compartido del SessionPool, así que
+    reanuda las sesiones y reutiliza los certificados de su TLSCache.
+
+    Attributes:
+        name (str): Protocolo que atiende
+        default_port (int): Puerto si el target no lo indica
+        tls (bool): Negociar TLS antes del intercambio
+
+    Methods:
+        check: Ejecuta la sonda completa contra un host y puerto
+        exchange: Diálogo del protocolo sobre el socket ya conectado
+    """
+    name = None
+    default_port = None
+    tls = False
+
+    def check(self, host, port, path, timeout, dns_cache, verify_ssl, phase_timer, session_pool=None):
+        """
+        Ejecutar la sonda
+
+        Steps:
+            1. Resolver el host con la caché DNS
+            2. Conectar a la primera dirección que acepte
+            3. Negociar TLS si el protocolo lo requiere
+            4. Hacer el intercambio del protocolo
+
+        Args:
+            host (str): Host o IP
+            port (int): Puerto (None = default_port)
+            path (str): Ruta (solo la usan protocolos como WebSocket)
+            timeout (float): Límite total en segundos
+            dns_cache (DNSCache): Caché DNS compartida
+            verify_ssl (bool): Verificar certificados
+            phase_timer (PhaseTimer): Acumulador de tiempos por fase
+            session_pool (SessionPool, optional): Pool con el contexto TLS y la TLSCache. Defaults to el pool compartido
+
+        Returns:
+            tuple: (estado, mensaje, detalle) con detalle como texto corto o None
+
+        Raises:
+            socket.gaierror, OSError, ssl.SSLError, ProbeError: Si la sonda falla
+        """
+        port = port or self.default_port
+        end_time = time.monotonic() + timeout
+
+        with phase_timer.measure("dns"):
+            addresses = dns_cache.resolve(host)
+        with phase_timer.measure("connect"):
+            sock = self._connect(addresses, port, end_time)
+        try:
+            if self.tls:
+                if session_pool is None:
+                    from managers.session_pool import get_shared_pool
+                    session_pool = get_shared_pool()
+                with phase_timer.measure("tls"):
+                    sock = self._wrap_tls(sock, host, port, verify_ssl, session_pool, phase_timer)
+            sock.settimeout(max(0.001, end_time - time.monotonic()))
+            with phase_timer.measure("ttfb"):
+                result = self.exchange(sock, host, port, path)
+            if self.tls:
+                # En TLS 1.3 el ticket de sesión llega después del handshake
+                session_pool.tls_cache.store_session(host, port, sock)
+            return result
+        finally:
+            sock.close()
+
+    def exchange(self, sock, host, port, path):
+        """Diálogo del protocolo (lo implementa cada sonda)"""
+        raise NotImplementedError("Subclass must implement exchange")
+
+    def _connect(self, addresses, port, end_time):
+        """Conectar a las direcciones en orden hasta que una acepte"""
+        error = None
+        for family, address in addresses:
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                break
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.settimeout(remaining)
+            try:
+                sock.connect((address, port))
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+        raise error or socket.timeout("timed out")
+
+    def _wrap_tls(self, sock, host, port, verify_ssl, session_pool, phase_timer):
+        """Negociar TLS sobre el socket conectado ofreciendo la sesión guardada del host"""
+        tls_cache = session_pool.tls_cache
+        sock = session_pool.ssl_context(verify_ssl).wrap_socket(sock, server_hostname=host)
+        resumed = sock.session_reused
+        tls_cache.record_handshake(resumed)
+        certificate = tls_cache.inspect_certificate(host, port, sock, verify_ssl is not False)
+        phase_timer.record_tls(sock, certificate, resumed)
+        return sock
+
+def read_line(sock, limit=4096):
+    """Leer una línea terminada en CRLF (o lo que llegue antes de cerrar)"""
+    data = b""
+    while b"\n" not in data and len(data) < limit:
+        chunk = sock.recv(limit - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data.split(b"\n", 1)[0].rstrip(b"\r")
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+import struct
+from managers.probes.base import Probe, ProbeError
+
+# Código del SSLRequest del protocolo de PostgreSQL (1234 << 16 | 5679)
+_SSL_REQUEST_CODE = 80877103
+
+class PostgresProbe(Probe):
+    """
+    SSLRequest de PostgreSQL: el servidor contesta un único byte ("S" o "N")
+    sin necesidad de credenciales, así que sirve de ping
+    """
+    name = "postgres"
+    default_port = 5432
+
+    def exchange(self, sock, host, port, path):
+        sock.sendall(struct.pack("!II", 8, _SSL_REQUEST_CODE))
+        reply = sock.recv(1)
+        if reply == b"S":
+            return ("Éxito", f"✅ PostgreSQL responde en {host}:{port}", "SSL disponible")
+        if reply == b"N":
+            return ("Éxito", f"✅ PostgreSQL responde en {host}:{port}", "SSL no disponible")
+        if reply == b"E":
+            return ("Advertencia", f"⚠️ PostgreSQL en {host}:{port} rechazó el SSLRequest", "ErrorResponse")
+        raise ProbeError(f"respuesta inesperada: {reply!r}")
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+from managers.probes.base import Probe, ProbeError, read_line
+
+class RedisProbe(Probe):
+    """PING en RESP: +PONG es éxito; un error de autenticación indica que el servicio existe"""
+    name = "redis"
+    default_port = 6379
+
+    def exchange(self, sock, host, port, path):
+        sock.sendall(b"*1\r\n$4\r\nPING\r\n")
+        reply = read_line(sock).decode("utf-8", "replace")
+        if reply.upper() == "+PONG":
+            return ("Éxito", f"✅ Redis responde PONG en {host}:{port}", reply)
+        if reply.startswith("-"):
+            return ("Advertencia", f"⚠️ Redis en {host}:{port} responde con error: {reply[1:80]}", reply[:200])
+        raise ProbeError(f"respuesta no RESP: {reply[:80]!r}")
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+import ssl
+import time
+from managers.probes.base import Probe
+
+class TLSProbe(Probe):
+    """Solo el handshake TLS: versión, cifrado y días hasta que caduca el certificado"""
+    name = "tls"
+    default_port = 443
+    tls = True
+
+    def exchange(self, sock, host, port, path):
+        version = sock.version()
+        cipher = sock.cipher()[0]
+        detail = f"{version} {cipher}"
+        certificate = sock.getpeercert()
+        if certificate and certificate.get("notAfter"):
+            days_left = int((ssl.cert_time_to_seconds(certificate["notAfter"]) - time.time()) // 86400)
+            detail += f", certificado caduca en {days_left} días"
+            if days_left < 14:
+                return ("Advertencia", f"⚠️ Certificado de {host}:{port} caduca en {days_left} días", detail)
+        return ("Éxito", f"✅ Handshake {version} con {host}:{port}", detail)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+import base64
+import hashlib
+import os
+from managers.probes.base import Probe, ProbeError
+
+# GUID fijo del handshake WebSocket (RFC 6455)
+_WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+class WebSocketProbe(Probe):
+    """Upgrade HTTP a WebSocket: espera 101 con un Sec-WebSocket-Accept válido"""
+    name = "ws"
+    default_port = 80
+
+    def exchange(self, sock, host, port, path):
+        key = base64.b64encode(os.urandom(16))
+        sock.sendall(
+            f"GET {path or '/'} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key.decode()}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        head = b""
+        while b"\r\n\r\n" not in head and len(head) < 16384:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            head += chunk
+        lines = head.split(b"\r\n\r\n", 1)[0].decode("latin-1").split("\r\n")
+        status_parts = lines[0].split(" ", 2)
+        if len(status_parts) < 2 or not status_parts[0].startswith("HTTP/"):
+            raise ProbeError(f"respuesta HTTP inválida: {lines[0][:80]!r}")
+        if status_parts[1] != "101":
+            return ("Error", f"❌ Upgrade WebSocket rechazado: HTTP {status_parts[1]}", lines[0])
+
+        headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(":") for line in lines[1:])}
+        expected = base64.b64encode(hashlib.sha1(key + _WEBSOCKET_GUID).digest()).decode()
+        if headers.get("sec-websocket-accept") != expected:
+            raise ProbeError("Sec-WebSocket-Accept no corresponde a la clave enviada")
+        return ("Éxito", f"✅ WebSocket aceptado en {host}:{port}", lines[0])
+
+class SecureWebSocketProbe(WebSocketProbe):
+    """Upgrade a WebSocket sobre TLS (wss://)"""
+    name = "wss"
+    default_port = 443
+    tls = True
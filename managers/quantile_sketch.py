@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import math
+
+class DDSketch:
+    """
+    Sketch de cuantiles con error relativo acotado (estilo DDSketch)
+
+    Cada valor cae en un bucket logarítmico de índice ceil(log_gamma(valor)),
+    así que cualquier cuantil se estima con un error relativo menor que
+    `relative_accuracy` usando memoria proporcional al rango de valores, no
+    al número de muestras. Dos sketches con la misma precisión se combinan
+    sumando los contadores de sus buckets.
+
+    Methods:
+        add: Añade un valor
+        quantile: Estima un cuantil
+        merge: Combina otro sketch en este
+        to_dict: Exporta el sketch a un diccionario serializable
+        from_dict: Reconstruye un sketch exportado
+    """
+    def __init__(self, relative_accuracy=0.01, max_bins=2048, min_value=1e-6):
+        """
+        Args:
+            relative_accuracy (float, optional): Error relativo máximo de los cuantiles. Defaults to 0.01
+            max_bins (int, optional): Buckets máximos; al superarlos se combinan los más bajos. Defaults to 2048
+            min_value (float, optional): Valores por debajo cuentan como cero. Defaults to 1e-6
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        """Añadir un valor (p. ej. un tiempo de respuesta en segundos)"""
+        if value <= self.min_value:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + 1
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimar un cuantil
+
+        Args:
+            q (float): Cuantil entre 0 y 1 (0.95 para p95)
+
+        Returns:
+            float: Valor estimado, o None si el sketch está vacío
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return max(0.0, self.min)
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def merge(self, other):
+        """
+        Combinar otro sketch en este
+
+        Args:
+            other (DDSketch): Sketch con la misma precisión relativa
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self):
+        """Exportar el sketch a un diccionario serializable (JSON)"""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "min_value": self.min_value,
+            "bins": {str(index): count for index, count in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstruir un sketch exportado con to_dict"""
+        sketch = cls(data["relative_accuracy"], data["max_bins"], data["min_value"])
+        sketch.bins = {int(index): count for index, count in data["bins"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+    def _collapse(self):
+        """Combinar los dos buckets más bajos (sacrifica precisión en la cola baja)"""
+        lowest, second = sorted(self.bins)[:2]
+        self.bins[second] += self.bins.pop(lowest)
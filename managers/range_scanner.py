@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+import bisect
+import ipaddress
+
+# Conjuntos de puertos habituales (se pueden usar por nombre en las expresiones de puertos)
+PORT_PRESETS = {
+    "comunes": "22,23,25,53,3306,5432",
+    "web": "80,443,8000,8080,8443",
+    "correo": "25,110,143,465,587,993,995",
+    "bases de datos": "1433,1521,3306,5432,6379,27017",
+    "todos": "1-65535"
+}
+
+# Código de cada estado en la matriz de resultados (0 = sin sondear)
+STATE_CODES = {"Éxito": 1, "Advertencia": 2, "Error": 3}
+_STATE_NAMES = {code: name for name, code in STATE_CODES.items()}
+
+def parse_ports(expression):
+    """
+    Interpretar una expresión de puertos
+
+    Args:
+        expression (str): Puertos, rangos y presets separados por comas ("22,80,8000-8100,web")
+
+    Returns:
+        list: Rangos (inicio, fin) ordenados y sin solapes
+
+    Raises:
+        ValueError: Si algún puerto o rango no es válido
+    """
+    ranges = []
+    for token in str(expression).split(","):
+        token = token.strip()
+        if not token:
+            continue
+        if token.lower() in PORT_PRESETS:
+            ranges.extend(parse_ports(PORT_PRESETS[token.lower()]))
+            continue
+        start, _, end = token.partition("-")
+        try:
+            start = int(start)
+            end = int(end) if end else start
+        except ValueError:
+            raise ValueError(f"Invalid port expression: {token!r}") from None
+        if not 1 <= start <= end <= 65535:
+            raise ValueError(f"Invalid port range: {token!r}")
+        ranges.append((start, end))
+
+    # Unir rangos solapados o contiguos para no sondear dos veces
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def iter_ports(ranges):
+    """Recorrer los puertos de una lista de rangos sin materializarla"""
+    for start, end in ranges:
+        yield from range(start, end + 1)
+
+def count_ports(ranges):
+    """Contar los puertos de una lista de rangos"""
+    return sum(end - start + 1 for start, end in ranges)
+
+def _host_groups(expression):
+    """Separar una expresión de hosts en redes, rangos y hosts sueltos"""
+    for token in str(expression).split(","):
+        token = token.strip()
+        if not token:
+            continue
+        if "/" in token:
+            yield ipaddress.ip_network(token, strict=False)
+        elif "-" in token:
+            first, _, last = token.partition("-")
+            try:
+                yield (ipaddress.ip_address(first.strip()), ipaddress.ip_address(last.strip()))
+            except ValueError:
+                # Un nombre con guion (mi-servidor.local) es un host suelto
+                yield token
+        else:
+            yield token
+
+def iter_hosts(expression):
+    """
+    Recorrer los hosts de una expresión de forma perezosa
+
+    Args:
+        expression (str): CIDR, rangos IP y hosts separados por comas ("10.0.0.0/24,10.0.1.5-10.0.1.9,db.local")
+
+    Yields:
+        str: IP o nombre de host
+    """
+    for group in _host_groups(expression):
+        if isinstance(group, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+            for address in group.hosts():
+                yield str(address)
+        elif isinstance(group, tuple):
+            first, last = group
+            for value in range(int(first), int(last) + 1):
+                yield str(ipaddress.ip_address(value))
+        else:
+            yield group
+
+def count_hosts(expression):
+    """Contar los hosts de una expresión sin recorrerlos"""
+    total = 0
+    for group in _host_groups(expression):
+        if isinstance(group, ipaddress.IPv4Network) and group.prefixlen < 31:
+            total += group.num_addresses - 2
+        elif isinstance(group, ipaddress.IPv6Network) and group.prefixlen < 127:
+            total += group.num_addresses - 1
+        elif isinstance(group, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+            total += group.num_addresses
+        elif isinstance(group, tuple):
+            total += max(0, int(group[1]) - int(group[0]) + 1)
+        else:
+            total += 1
+    return total
+
+def format_target(host, port):
+    """Construir el target IP:PUERTO (las IPv6 van entre corchetes)"""
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+def expand_targets(hosts, ports):
+    """
+    Expandir hosts × puertos en targets IP:PUERTO de forma perezosa
+
+    Solo se guardan en memoria los rangos de puertos, nunca la lista de
+    targets, así que un barrido de 65535 puertos por host cuesta lo mismo
+    que uno de diez.
+
+    Args:
+        hosts (str): Expresión de hosts (ver iter_hosts)
+        ports (str | list): Expresión de puertos o rangos ya interpretados (ver parse_ports)
+
+    Yields:
+        str: Target IP:PUERTO
+    """
+    ranges = parse_ports(ports) if isinstance(ports, str) else ports
+    for host in iter_hosts(hosts):
+        for port in iter_ports(ranges):
+            yield format_target(host, port)
+
+class ScanMatrix:
+    """
+    Matriz host × puerto con el resultado de un escaneo
+
+    Las columnas son solo los puertos pedidos (los rangos de parse_ports)
+    y cada host guarda un array de un byte por columna con el código de
+    estado (STATE_CODES). El puerto se traduce a columna con una búsqueda
+    binaria sobre los rangos, así que registrar un resultado es O(log
+    rangos) y un /16 con tres puertos ocupa 3 bytes por host en lugar de
+    64 KB.
+
+    Methods:
+        record: Registra el resultado de un target (callback de probe_tcp)
+        get: Obtiene el estado de un host y puerto
+        open_ports: Obtiene los puertos abiertos de un host
+        counts: Cuenta resultados por estado
+        to_dataframe: Matriz de los puertos con algún resultado distinto de error
+    """
+    def __init__(self, ports="1-65535"):
+        """
+        Args:
+            ports (str | list, optional): Puertos del escaneo (expresión o rangos de parse_ports). Defaults to todos
+        """
+        import numpy as np
+        ranges = parse_ports(ports) if isinstance(ports, str) else list(ports)
+        self.ranges = ranges
+        self.hosts = {}
+        self._starts = [start for start, _ in ranges]
+        self._offsets = np.cumsum([0] + [end - start + 1 for start, end in ranges]).tolist()
+        self._ports = np.fromiter(iter_ports(ranges), dtype=np.int32, count=count_ports(ranges))
+
+    def __len__(self):
+        import numpy as np
+        return sum(int(np.count_nonzero(states)) for states in self.hosts.values())
+
+    def _column(self, port):
+        """Columna de un puerto (None si no está en los rangos del escaneo)"""
+        index = bisect.bisect_right(self._starts, port) - 1
+        if index < 0 or port > self.ranges[index][1]:
+            return None
+        return self._offsets[index] + port - self._starts[index]
+
+    def record(self, target, result):
+        """
+        Registrar el resultado de un target
+
+        Args:
+            target (str): Target IP:PUERTO
+            result (tuple): (estado, mensaje)
+        """
+        import numpy as np
+        host, _, port = target.rpartition(":")
+        if not host or not port.isdigit():
+            return
+        column = self._column(int(port))
+        if column is None:
+            return
+        host = host.strip("[]")
+        states = self.hosts.get(host)
+        if states is None:
+            states = self.hosts[host] = np.zeros(len(self._ports), dtype=np.uint8)
+        states[column] = STATE_CODES.get(result[0], STATE_CODES["Error"])
+
+    def get(self, host, port):
+        """Obtener el estado de un host y puerto (None si no se ha sondeado)"""
+        states = self.hosts.get(host)
+        column = self._column(port)
+        return None if states is None or column is None else _STATE_NAMES.get(int(states[column]))
+
+    def open_ports(self, host):
+        """Obtener los puertos abiertos de un host"""
+        states = self.hosts.get(host)
+        if states is None:
+            return []
+        return self._ports[states == STATE_CODES["Éxito"]].tolist()
+
+    def counts(self):
+        """Contar resultados por estado"""
+        import numpy as np
+        totals = np.zeros(len(STATE_CODES) + 1, dtype=np.int64)
+        for states in self.hosts.values():
+            totals += np.bincount(states, minlength=len(totals))
+        return {name: int(totals[code]) for name, code in STATE_CODES.items()}
+
+    def to_dataframe(self, ports=None):
+        """
+        Construir la matriz como DataFrame (filas = hosts, columnas = puertos)
+
+        Solo se copian las columnas que se muestran, nunca la matriz completa.
+
+        Args:
+            ports (list, optional): Puertos a incluir. Defaults to los que no son error en algún host
+
+        Returns:
+            pandas.DataFrame: Estado de cada host y puerto ("" si no se ha sondeado)
+        """
+        import pandas as pd
+        import numpy as np
+        if not self.hosts:
+            return pd.DataFrame()
+        if ports is None:
+            shown = np.zeros(len(self._ports), dtype=bool)
+            for states in self.hosts.values():
+                shown |= (states != 0) & (states != STATE_CODES["Error"])
+            columns = np.flatnonzero(shown)
+        else:
+            columns = [self._column(port) for port in ports]
+            if None in columns:
+                raise ValueError(f"Ports outside the scanned ranges: {[port for port, column in zip(ports, columns) if column is None]}")
+        matrix = np.vstack([states[columns] for states in self.hosts.values()])
+        names = np.array([""] + [_STATE_NAMES[code] for code in sorted(_STATE_NAMES)], dtype=object)
+        return pd.DataFrame(names[matrix], index=list(self.hosts), columns=self._ports[columns].tolist())
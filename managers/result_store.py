@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from managers.check_result import to_epoch
+
+# Campos con columna propia (indexables); el resto va como JSON en `extra`
+INDEXED_FIELDS = ("timestamp", "type", "status", "error_type", "target", "response_time")
+
+_INSERT_SQL = "INSERT INTO results (timestamp, type, status, error_type, target, response_time, extra) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+logger = logging.getLogger(__name__)
+
+class SQLiteResultStore:
+    """
+    Almacén persistente de resultados en SQLite (modo WAL)
+
+    Los registros se encolan en memoria y un hilo escritor los inserta por
+    lotes en una sola transacción (write-behind), así que add_data nunca
+    espera al disco. Las consultas usan índices por tiempo, target, tipo y
+    estado, y los registros más antiguos que la retención se borran
+    periódicamente. Un registro que no se puede escribir se descarta solo
+    (se registra en el log y se cuenta en `dropped`) sin perder el resto
+    de su lote ni detener el escritor.
+
+    Methods:
+        enqueue: Encola un registro para escribirlo
+        flush: Espera a que todo lo encolado esté escrito
+        query: Consulta registros por rango de tiempo, target, tipo y estado
+        count: Cuenta registros con los mismos filtros
+        page: Consulta una página filtrada y ordenada por un campo indexado
+        aggregate: Agrega los registros por intervalo de tiempo, estado, tipo y target
+        purge: Borra los registros fuera de la retención
+        close: Vacía la cola y detiene el escritor
+    """
+    def __init__(self, path, retention_days=30, batch_size=500, flush_interval=1.0, purge_interval=3600):
+        """
+        Args:
+            path (str): Fichero de la base de datos
+            retention_days (float, optional): Días de histórico a conservar (None = sin límite). Defaults to 30
+            batch_size (int, optional): Registros máximos por transacción. Defaults to 500
+            flush_interval (float, optional): Espera máxima en segundos antes de escribir un lote. Defaults to 1.0
+            purge_interval (float, optional): Segundos entre purgas de retención. Defaults to 3600
+        """
+        self.path = path
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.purge_interval = purge_interval
+        self.dropped = 0
+        self._queue = queue.Queue()
+        self._closed = threading.Event()
+
+        connection = self._connect()
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY,
+                timestamp REAL NOT NULL,
+                type TEXT,
+                status TEXT,
+                error_type TEXT,
+                target TEXT,
+                response_time REAL,
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_results_target ON results (target, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_results_type ON results (type, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_results_status ON results (status, timestamp);
+        """)
+        connection.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="result-store-writer", daemon=True)
+        self._writer.start()
+
+    def enqueue(self, record):
+        """
+        Encolar un registro para escribirlo en segundo plano
+
+        Args:
+            record (CheckResult | dict): Registro completo de una verificación
+        """
+        self._queue.put(record)
+
+    def flush(self):
+        """Esperar a que todos los registros encolados estén escritos"""
+        self._queue.join()
+
+    def query(self, start=None, end=None, target=None, check_type=None, status=None, limit=None):
+        """
+        Consultar registros usando los índices
+
+        Args:
+            start (float, optional): Inicio del rango (epoch, incluido). Defaults to None
+            end (float, optional): Fin del rango (epoch, excluido). Defaults to None
+            target (str, optional): Filtrar por target. Defaults to None
+            check_type (str, optional): Filtrar por tipo (url/ip). Defaults to None
+            status (str, optional): Filtrar por estado. Defaults to None
+            limit (int, optional): Máximo de registros (los más recientes). Defaults to None
+
+        Returns:
+            list: Registros en orden cronológico
+        """
+        where, params = self._where(start, end, target, check_type, status)
+        sql = f"SELECT timestamp, type, status, error_type, target, response_time, extra FROM results{where} ORDER BY timestamp DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        connection = self._connect()
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+        return [self._row_to_record(row) for row in reversed(rows)]
+
+    def count(self, start=None, end=None, target=None, check_type=None, status=None):
+        """Contar registros con los mismos filtros que query"""
+        where, params = self._where(start, end, target, check_type, status)
+        connection = self._connect()
+        try:
+            return connection.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+        finally:
+            connection.close()
+
+    def page(self, start=None, end=None, filters=None, sort="timestamp", descending=True, offset=0, limit=50):
+        """
+        Consultar una página de registros filtrada y ordenada
+
+        Args:
+            start (float, optional): Inicio del rango (epoch, incluido). Defaults to None
+            end (float, optional): Fin del rango (epoch, excluido). Defaults to None
+            filters (dict, optional): Campo indexado -> valor o lista de valores aceptados. Defaults to None
+            sort (str, optional): Campo indexado de ordenación (nulos al final). Defaults to "timestamp"
+            descending (bool, optional): Orden descendente. Defaults to True
+            offset (int, optional): Registros a saltar. Defaults to 0
+            limit (int, optional): Tamaño de la página. Defaults to 50 (None = todos)
+
+        Returns:
+            tuple: (total de registros que cumplen los filtros, registros de la página)
+
+        Raises:
+            ValueError: Si un filtro o el campo de ordenación no tienen columna propia
+        """
+        if sort not in INDEXED_FIELDS:
+            raise ValueError(f"Cannot sort by {sort!r} (available: {list(INDEXED_FIELDS)})")
+        clauses, params = [], []
+        for clause, value in (("timestamp >= ?", start), ("timestamp < ?", end)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        for name, values in (filters or {}).items():
+            if values is None:
+                continue
+            if name not in INDEXED_FIELDS:
+                raise ValueError(f"Cannot filter by {name!r} (available: {list(INDEXED_FIELDS)})")
+            if isinstance(values, (str, int, float, bool)):
+                values = (values,)
+            values = list(values)
+            clauses.append(f"{name} IN ({', '.join('?' * len(values))})" if values else "0")
+            params.extend(values)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        direction = "DESC" if descending else "ASC"
+        # Desempate por orden de inserción para que las páginas sean estables
+        sql = (
+            f"SELECT timestamp, type, status, error_type, target, response_time, extra FROM results{where} "
+            f"ORDER BY {sort} IS NULL, {sort} {direction}, id {direction} LIMIT ? OFFSET ?"
+        )
+
+        connection = self._connect()
+        try:
+            total = connection.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+            rows = connection.execute(sql, params + [-1 if limit is None else int(limit), int(offset)]).fetchall()
+        finally:
+            connection.close()
+        return total, [self._row_to_record(row) for row in rows]
+
+    def aggregate(self, width, start=None, end=None):
+        """
+        Agregar los registros por intervalo de tiempo, estado, tipo, target y tipo de error
+
+        La agregación la hace SQLite y las filas se leen de una en una, así
+        que reconstruir los rollups no carga el histórico en memoria.
+
+        Args:
+            width (int): Segundos por intervalo
+            start (float, optional): Inicio del rango (epoch, incluido). Defaults to None
+            end (float, optional): Fin del rango (epoch, excluido). Defaults to None
+
+        Yields:
+            tuple: (inicio del intervalo, estado, tipo, target, tipo de error, verificaciones, errores,
+                suma, número y máximo de response_time)
+        """
+        where, params = self._where(start, end, None, None, None)
+        sql = (
+            "SELECT CAST(timestamp / ? AS INTEGER) * ? AS bucket, status, type, target, error_type, COUNT(*), "
+            "SUM(status = 'Error'), TOTAL(response_time), COUNT(response_time), MAX(response_time) "
+            f"FROM results{where} GROUP BY bucket, status, type, target, error_type"
+        )
+        connection = self._connect()
+        try:
+            yield from connection.execute(sql, [int(width), int(width)] + params)
+        finally:
+            connection.close()
+
+    def purge(self, connection=None):
+        """
+        Borrar los registros más antiguos que la retención
+
+        Returns:
+            int: Registros borrados
+        """
+        if self.retention_days is None:
+            return 0
+        own_connection = connection is None
+        connection = connection or self._connect()
+        try:
+            with connection:
+                cursor = connection.execute(
+                    "DELETE FROM results WHERE timestamp < ?",
+                    (time.time() - self.retention_days * 86400,)
+                )
+            return cursor.rowcount
+        finally:
+            if own_connection:
+                connection.close()
+
+    def close(self):
+        """Escribir lo pendiente y detener el hilo escritor"""
+        if not self._closed.is_set():
+            self.flush()
+            self._closed.set()
+            self._writer.join()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _write_loop(self):
+        """Hilo escritor: agrupa registros encolados y los inserta por lotes"""
+        connection = self._connect()
+        self._purge_safely(connection)
+        last_purge = time.monotonic()
+
+        while not self._closed.is_set():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(connection, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if time.monotonic() - last_purge >= self.purge_interval:
+                self._purge_safely(connection)
+                last_purge = time.monotonic()
+
+        connection.close()
+
+    def _write_batch(self, connection, batch):
+        """
+        Insertar un lote en una transacción
+
+        Steps:
+            1. Convertir cada registro a fila (los que fallan se descartan solos)
+            2. Insertar todas las filas en una sola transacción
+            3. Si la transacción falla, insertar fila a fila para perder solo las inválidas
+        """
+        rows = []
+        for record in batch:
+            try:
+                rows.append(self._record_to_row(record))
+            except Exception as e:
+                self._drop(1, e)
+        if not rows:
+            return
+
+        try:
+            with connection:
+                connection.executemany(_INSERT_SQL, rows)
+            return
+        except Exception as e:
+            logger.warning("Lote de %d registros rechazado, se reintenta fila a fila: %s", len(rows), e)
+
+        for row in rows:
+            try:
+                with connection:
+                    connection.execute(_INSERT_SQL, row)
+            except Exception as e:
+                self._drop(1, e)
+
+    def _drop(self, count, error):
+        """Contar y registrar registros que no se han podido escribir"""
+        self.dropped += count
+        logger.error("Registro descartado por el almacén de resultados (%d en total): %s", self.dropped, error)
+
+    def _purge_safely(self, connection):
+        """Purgar sin detener el escritor si la base está ocupada o falla"""
+        try:
+            self.purge(connection)
+        except sqlite3.Error as e:
+            logger.warning("No se pudo purgar el histórico: %s", e)
+
+    @staticmethod
+    def _where(start, end, target, check_type, status):
+        clauses, params = [], []
+        for clause, value in (
+            ("timestamp >= ?", start),
+            ("timestamp < ?", end),
+            ("target = ?", target),
+            ("type = ?", check_type),
+            ("status = ?", status)
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    @staticmethod
+    def _record_to_row(record):
+        timestamp = to_epoch(record.get("timestamp"))
+        if timestamp is None:
+            timestamp = time.time()
+        response_time = record.get("response_time")
+        extra = {key: value for key, value in record.items() if key not in INDEXED_FIELDS and key != "headers"}
+        return (
+            timestamp,
+            record.get("type"),
+            record.get("status"),
+            record.get("error_type"),
+            record.get("target"),
+            response_time if isinstance(response_time, (int, float)) else None,
+            json.dumps(extra, default=str)
+        )
+
+    @staticmethod
+    def _row_to_record(row):
+        timestamp, check_type, status, error_type, target, response_time, extra = row
+        record = {
+            "target": target,
+            "response_time": response_time,
+            "timestamp": timestamp,
+            "type": check_type,
+            "status": status,
+            "error_type": error_type
+        }
+        if extra:
+            record.update(json.loads(extra))
+        return record
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+def get_shared_store(path=None, **kwargs):
+    """
+    Obtener el almacén persistente compartido del proceso
+
+    Args:
+        path (str, optional): Fichero de la base de datos. Defaults to $CONNECTIVITY_DB o "connectivity_results.db"
+        **kwargs: Parámetros de SQLiteResultStore (retention_days, batch_size, ...)
+
+    Returns:
+        SQLiteResultStore: Almacén compartido
+    """
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = SQLiteResultStore(path or os.environ.get("CONNECTIVITY_DB", "connectivity_results.db"), **kwargs)
+            atexit.register(_shared_store.close)
+        return _shared_store
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+import random
+
+class RetryPolicy:
+    """
+    Política de reintentos compartida por URLManager e IPManager
+
+    Decide si un intento fallido se repite según su error_type (los
+    códigos de managers.error_codes), cuánto esperar antes del siguiente
+    intento (backoff exponencial con jitter completo) y si aún queda tiempo
+    dentro del límite global de la verificación.
+
+    Methods:
+        max_attempts: Número de intentos para una verificación
+        backoff: Espera antes del siguiente intento
+        should_retry: Decide si se hace otro intento
+    """
+    # Un puerto que rechaza la conexión es una respuesta definitiva, no un fallo transitorio
+    DEFAULT_RETRY_ON = frozenset({"timeout", "connection_reset", "socket_error"})
+
+    def __init__(self, attempts=None, backoff_base=0.2, backoff_max=5.0, jitter=True, retry_on=None, deadline=None):
+        """
+        Args:
+            attempts (int, optional): Intentos totales. Defaults to None (`retries` del manager + 1)
+            backoff_base (float, optional): Espera tras el primer fallo en segundos. Defaults to 0.2
+            backoff_max (float, optional): Espera máxima entre intentos en segundos. Defaults to 5.0
+            jitter (bool, optional): Aleatorizar la espera entre 0 y el backoff. Defaults to True
+            retry_on (iterable, optional): error_type que se reintentan. Defaults to DEFAULT_RETRY_ON
+            deadline (float, optional): Tiempo total máximo de la verificación en segundos. Defaults to None
+        """
+        self.attempts = attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_on = frozenset(retry_on) if retry_on is not None else self.DEFAULT_RETRY_ON
+        self.deadline = deadline
+
+    def max_attempts(self, retries=None):
+        """
+        Número de intentos para una verificación
+
+        Args:
+            retries (int, optional): Valor `retries` del manager (reintentos tras el primer intento). Defaults to None
+
+        Returns:
+            int: Intentos totales, al menos 1
+        """
+        if self.attempts is not None:
+            return max(1, int(self.attempts))
+        return 1 + max(0, int(retries or 0))
+
+    def backoff(self, attempt):
+        """
+        Espera antes del siguiente intento
+
+        Args:
+            attempt (int): Número del intento que acaba de fallar (desde 1)
+
+        Returns:
+            float: Segundos de espera
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def should_retry(self, attempt, max_attempts, error_type, elapsed, delay):
+        """
+        Decidir si se hace otro intento
+
+        Args:
+            attempt (int): Número del intento que acaba de fallar (desde 1)
+            max_attempts (int): Intentos totales permitidos
+            error_type (str): Categoría del error del intento
+            elapsed (float): Segundos transcurridos desde el primer intento
+            delay (float): Espera prevista antes del siguiente intento
+
+        Returns:
+            bool: True si se debe reintentar
+        """
+        if attempt >= max_attempts or error_type not in self.retry_on:
+            return False
+        return self.deadline is None or elapsed + delay < self.deadline
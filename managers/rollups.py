@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+from dataclasses import dataclass
+
+# Resoluciones de los rollups: nombre -> segundos por bucket
+RESOLUTIONS = {"1min": 60, "1h": 3600, "1d": 86400}
+
+# Buckets que se conservan de cada serie (1 día por minuto, 30 días por hora, 1 año por día)
+RETENTION = {"1min": 1440, "1h": 720, "1d": 366}
+
+# Campos del registro por los que se agrupa
+DIMENSIONS = ("status", "type", "target", "error_type")
+
+# Métricas que se pueden pedir a timeline
+METRICS = ("count", "errors", "error_rate", "avg_response_time", "max_response_time")
+
+@dataclass(slots=True)
+class RollupBucket:
+    """Agregados de las verificaciones de un intervalo"""
+    count: int = 0
+    errors: int = 0
+    response_time_sum: float = 0.0
+    response_time_count: int = 0
+    response_time_max: float = 0.0
+
+    def add(self, is_error, response_time):
+        """Añadir una verificación al bucket"""
+        self.count += 1
+        if is_error:
+            self.errors += 1
+        if response_time is not None:
+            self.response_time_sum += response_time
+            self.response_time_count += 1
+            if response_time > self.response_time_max:
+                self.response_time_max = response_time
+
+    def merge(self, other):
+        """Combinar otro bucket del mismo intervalo"""
+        self.count += other.count
+        self.errors += other.errors
+        self.response_time_sum += other.response_time_sum
+        self.response_time_count += other.response_time_count
+        self.response_time_max = max(self.response_time_max, other.response_time_max)
+
+    def value(self, metric):
+        """Valor de una métrica del bucket"""
+        if metric == "count":
+            return self.count
+        if metric == "errors":
+            return self.errors
+        if metric == "error_rate":
+            return (self.errors / self.count) * 100 if self.count else 0.0
+        if metric == "avg_response_time":
+            return self.response_time_sum / self.response_time_count if self.response_time_count else 0.0
+        if metric == "max_response_time":
+            return self.response_time_max
+        raise ValueError(f"Unknown metric: {metric!r} (available: {list(METRICS)})")
+
+class TimeRollups:
+    """
+    Rollups por intervalo de tiempo (1 min, 1 h y 1 día) por estado, tipo, target y tipo de error
+
+    Cada verificación suma en un bucket por resolución y por valor de cada
+    dimensión, alineado a múltiplos de la resolución en segundos epoch
+    (los días empiezan a las 00:00 UTC). Cada serie conserva como mucho
+    RETENTION buckets, así que pedir una línea de tiempo cuesta lo mismo
+    con cien registros que con millones.
+
+    Methods:
+        add: Añade una verificación
+        add_bucket: Suma un bucket ya agregado
+        timeline: Serie densa de una métrica por bucket y valor de la dimensión
+        totals: Suma de los buckets de un rango por valor de la dimensión
+        merge: Combina los rollups de otro manager o worker
+    """
+    def __init__(self, max_targets=10000):
+        """
+        Args:
+            max_targets (int, optional): Targets distintos con rollup propio; los siguientes
+                solo cuentan en estado y tipo. Defaults to 10000
+        """
+        self.max_targets = max_targets
+        self._series = {resolution: {dimension: {} for dimension in DIMENSIONS} for resolution in RESOLUTIONS}
+        self._latest = {resolution: None for resolution in RESOLUTIONS}
+
+    def add(self, timestamp, status, check_type, target, response_time, error_type=None):
+        """
+        Añadir una verificación a los rollups
+
+        Args:
+            timestamp (float): Segundos epoch de la verificación
+            status (str): Éxito, Advertencia o Error
+            check_type (str): url o ip
+            target (str): Target verificado
+            response_time (float): Tiempo de respuesta en segundos (None si no hay)
+            error_type (str, optional): Código de error (ver managers.error_codes). Defaults to None
+        """
+        is_error = status == "Error"
+        for resolution, width in RESOLUTIONS.items():
+            bucket_start = int(timestamp // width * width)
+            for bucket in self._buckets(resolution, bucket_start, status, check_type, target, error_type):
+                bucket.add(is_error, response_time)
+
+    def add_bucket(self, resolution, bucket_start, status, check_type, target, error_type, bucket):
+        """
+        Sumar un bucket ya agregado (p. ej. por SQLite al reconstruir los rollups)
+
+        Args:
+            resolution (str): "1min", "1h" o "1d"
+            bucket_start (int): Inicio del bucket en segundos epoch (múltiplo de la resolución)
+            status (str): Estado de las verificaciones del bucket
+            check_type (str): Tipo de las verificaciones del bucket
+            target (str): Target de las verificaciones del bucket
+            error_type (str): Código de error de las verificaciones del bucket (None si no hay)
+            bucket (RollupBucket): Agregados a sumar
+        """
+        for existing in self._buckets(resolution, int(bucket_start), status, check_type, target, error_type):
+            existing.merge(bucket)
+
+    def _buckets(self, resolution, bucket_start, status, check_type, target, error_type):
+        """Buckets de un intervalo para el estado, el tipo, el target y el error (se crean si faltan)"""
+        if self._latest[resolution] is None or bucket_start > self._latest[resolution]:
+            self._latest[resolution] = bucket_start
+        series = self._series[resolution]
+        for dimension, key in (("status", status), ("type", check_type), ("target", target), ("error_type", error_type)):
+            if key is None:
+                continue
+            by_key = series[dimension]
+            buckets = by_key.get(key)
+            if buckets is None:
+                if dimension == "target" and len(by_key) >= self.max_targets:
+                    continue
+                buckets = by_key[key] = {}
+            bucket = buckets.get(bucket_start)
+            if bucket is None:
+                bucket = buckets[bucket_start] = RollupBucket()
+                if len(buckets) > RETENTION[resolution]:
+                    del buckets[min(buckets)]
+            yield bucket
+
+    def timeline(self, resolution="1h", dimension="status", metric="count", start=None, end=None, keys=None):
+        """
+        Obtener una métrica por bucket para cada valor de una dimensión
+
+        El rango se limita a lo que conserva la resolución, y los buckets
+        sin verificaciones valen 0.
+
+        Args:
+            resolution (str, optional): "1min", "1h" o "1d". Defaults to "1h"
+            dimension (str, optional): "status", "type", "target" o "error_type". Defaults to "status"
+            metric (str, optional): Una de METRICS. Defaults to "count"
+            start (float, optional): Inicio del rango en segundos epoch. Defaults to None (lo más antiguo)
+            end (float, optional): Fin del rango en segundos epoch. Defaults to None (el último bucket)
+            keys (iterable, optional): Valores de la dimensión a incluir. Defaults to None (todos)
+
+        Returns:
+            tuple: (inicios de bucket en segundos epoch, {valor: [métrica por bucket]})
+
+        Raises:
+            ValueError: Si la resolución, la dimensión o la métrica no existen
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution!r} (available: {list(RESOLUTIONS)})")
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension!r} (available: {list(DIMENSIONS)})")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric!r} (available: {list(METRICS)})")
+
+        latest = self._latest[resolution]
+        by_key = self._series[resolution][dimension]
+        if latest is None:
+            return [], {}
+
+        width = RESOLUTIONS[resolution]
+        oldest = latest - (RETENTION[resolution] - 1) * width
+        first = oldest if start is None else max(oldest, int(start // width * width))
+        if start is None:
+            first = max(first, min((min(buckets) for buckets in by_key.values() if buckets), default=latest))
+        last = latest if end is None else min(latest, int(end // width * width))
+        if last < first:
+            return [], {}
+
+        bucket_starts = list(range(first, last + width, width))
+        series = {}
+        for key, buckets in by_key.items():
+            if keys is not None and key not in keys:
+                continue
+            empty = RollupBucket()
+            series[key] = [buckets.get(bucket_start, empty).value(metric) for bucket_start in bucket_starts]
+        return bucket_starts, series
+
+    def totals(self, resolution="1h", dimension="status", start=None, end=None):
+        """
+        Sumar los buckets de un rango para cada valor de una dimensión
+
+        Args:
+            resolution (str, optional): "1min", "1h" o "1d". Defaults to "1h"
+            dimension (str, optional): "status", "type", "target" o "error_type". Defaults to "status"
+            start (float, optional): Inicio del rango en segundos epoch. Defaults to None
+            end (float, optional): Fin del rango en segundos epoch. Defaults to None
+
+        Returns:
+            dict: {valor: RollupBucket con la suma del rango}
+        """
+        width = RESOLUTIONS[resolution]
+        first = None if start is None else int(start // width * width)
+        last = None if end is None else int(end // width * width)
+        totals = {}
+        for key, buckets in self._series[resolution][dimension].items():
+            total = RollupBucket()
+            for bucket_start, bucket in buckets.items():
+                if (first is None or bucket_start >= first) and (last is None or bucket_start <= last):
+                    total.merge(bucket)
+            if total.count:
+                totals[key] = total
+        return totals
+
+    def merge(self, other):
+        """
+        Combinar los rollups de otro TimeRollups (otra sesión o worker)
+
+        Args:
+            other (TimeRollups): Rollups a combinar en estos
+        """
+        for resolution in RESOLUTIONS:
+            if other._latest[resolution] is not None and (
+                self._latest[resolution] is None or other._latest[resolution] > self._latest[resolution]
+            ):
+                self._latest[resolution] = other._latest[resolution]
+            for dimension in DIMENSIONS:
+                by_key = self._series[resolution][dimension]
+                for key, other_buckets in other._series[resolution][dimension].items():
+                    buckets = by_key.get(key)
+                    if buckets is None:
+                        if dimension == "target" and len(by_key) >= self.max_targets:
+                            continue
+                        buckets = by_key[key] = {}
+                    for bucket_start, other_bucket in other_buckets.items():
+                        bucket = buckets.get(bucket_start)
+                        if bucket is None:
+                            bucket = buckets[bucket_start] = RollupBucket()
+                        bucket.merge(other_bucket)
+                    while len(buckets) > RETENTION[resolution]:
+                        del buckets[min(buckets)]
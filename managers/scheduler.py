@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+class RateLimiter:
+    """
+    Limitador de ritmo por token bucket
+
+    Acumula `rate` tokens por segundo hasta `burst`; cada verificación
+    consume uno. No bloquea: indica cuánto falta para el siguiente token.
+    """
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Verificaciones por segundo
+            burst (float, optional): Tokens máximos acumulados. Defaults to max(1, rate)
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def wait_time(self, now):
+        """Segundos hasta que haya un token disponible (0 si ya lo hay)"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Consumir un token (llamar solo si wait_time devolvió 0)"""
+        self.tokens -= 1
+
+class _MonitorJob:
+    """Target monitorizado con su intervalo y su estado"""
+    def __init__(self, job_id, manager, target, interval):
+        self.job_id = job_id
+        self.manager = manager
+        self.target = target
+        self.spec = manager.spec_for_target(target)
+        self.interval = interval
+        self.host = _target_host(target)
+        self.in_flight = False
+        self.runs = 0
+        self.skipped = 0
+        self.rate_limited = 0
+        self.next_run = None
+        self.last_run = None
+        self.last_result = None
+
+def _target_host(target):
+    """Host de una URL o de un target IP:PUERTO (clave del límite por host)"""
+    if "://" in target:
+        return urlparse(target).hostname or target
+    return target.rsplit(":", 1)[0]
+
+class MonitorScheduler:
+    """
+    Planificador de verificaciones continuas en segundo plano
+
+    Cada target tiene su propio intervalo. El primer arranque se reparte
+    al azar dentro del intervalo y los siguientes llevan jitter, de modo que
+    muchos targets registrados a la vez no se ejecutan en ráfaga. Los
+    límites de ritmo global y por host retrasan las verificaciones que no
+    caben, y si una verificación sigue en curso cuando vuelve a tocar, esa
+    ejecución se omite en lugar de solaparse.
+
+    Cada target guarda al registrarse el spec de su verificación con los
+    parámetros del manager (URLManager o IPManager ya configurado). Todas
+    las verificaciones usan ese mismo manager con check, así que comparten
+    su pool de conexiones y sus resultados llegan a su callback de
+    analytics igual que en check_connectivity.
+
+    Methods:
+        add_target: Registra un target con su intervalo
+        remove_target: Deja de monitorizar un target
+        get_jobs: Obtiene el estado de los targets registrados
+        start: Arranca el hilo planificador
+        stop: Detiene el planificador
+    """
+    def __init__(self, max_workers=10, global_rate=10.0, per_host_rate=1.0, jitter=0.1):
+        """
+        Args:
+            max_workers (int, optional): Verificaciones simultáneas. Defaults to 10
+            global_rate (float, optional): Verificaciones por segundo en total (None = sin límite). Defaults to 10.0
+            per_host_rate (float, optional): Verificaciones por segundo a un mismo host (None = sin límite). Defaults to 1.0
+            jitter (float, optional): Variación relativa del intervalo (0.1 = ±10%). Defaults to 0.1
+        """
+        self.max_workers = max_workers
+        self.global_rate = global_rate
+        self.per_host_rate = per_host_rate
+        self.jitter = jitter
+        self._jobs = {}
+        self._queue = []
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()
+        self._global_limiter = RateLimiter(global_rate) if global_rate else None
+        self._host_limiters = {}
+        self._condition = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._stopped = True
+
+    @property
+    def running(self):
+        """Indica si el planificador está en marcha"""
+        return not self._stopped
+
+    def add_target(self, manager, target, interval=60.0):
+        """
+        Registrar un target para verificarlo periódicamente
+
+        Args:
+            manager (BaseManager): URLManager o IPManager configurado (timeout, reintentos, callback...)
+            target (str): Target final ya construido (URL o IP:PUERTO)
+            interval (float, optional): Segundos entre verificaciones. Defaults to 60.0
+
+        Returns:
+            int: Identificador del target registrado
+        """
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+        with self._condition:
+            job = _MonitorJob(next(self._ids), manager, target, interval)
+            self._jobs[job.job_id] = job
+            # Repartir el primer arranque dentro del intervalo
+            self._schedule(job, time.monotonic() + random.uniform(0, interval))
+            self._condition.notify()
+            return job.job_id
+
+    def remove_target(self, job_id):
+        """Dejar de monitorizar un target (una verificación en curso termina igualmente)"""
+        with self._condition:
+            return self._jobs.pop(job_id, None) is not None
+
+    def get_jobs(self):
+        """
+        Obtener el estado de los targets registrados
+
+        Returns:
+            list: Diccionarios con target, intervalo, ejecuciones, omitidas, último resultado...
+        """
+        now = time.monotonic()
+        with self._condition:
+            return [
+                {
+                    "job_id": job.job_id,
+                    "target": job.target,
+                    "interval": job.interval,
+                    "in_flight": job.in_flight,
+                    "runs": job.runs,
+                    "skipped": job.skipped,
+                    "rate_limited": job.rate_limited,
+                    "next_run_in": max(0.0, job.next_run - now),
+                    "last_run": job.last_run,
+                    "last_status": job.last_result[0] if job.last_result else None,
+                    "last_message": job.last_result[1] if job.last_result else None
+                }
+                for job in self._jobs.values()
+            ]
+
+    def start(self):
+        """Arrancar el hilo planificador (sin efecto si ya está en marcha)"""
+        with self._condition:
+            if not self._stopped:
+                return
+            self._stopped = False
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="monitor-check")
+            self._thread = threading.Thread(target=self._loop, name="monitor-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, wait=True):
+        """
+        Detener el planificador
+
+        Args:
+            wait (bool, optional): Esperar a que terminen las verificaciones en curso. Defaults to True
+        """
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    def _schedule(self, job, when):
+        job.next_run = when
+        heapq.heappush(self._queue, (when, next(self._sequence), job.job_id))
+
+    def _loop(self):
+        """Hilo planificador: lanza cada target cuando le toca"""
+        with self._condition:
+            while not self._stopped:
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                when, _, job_id = self._queue[0]
+                now = time.monotonic()
+                if when > now:
+                    self._condition.wait(when - now)
+                    continue
+                heapq.heappop(self._queue)
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    self._dispatch(job, now)
+
+    def _dispatch(self, job, now):
+        """Lanzar un target, omitirlo si sigue en curso o retrasarlo por los límites de ritmo"""
+        if job.in_flight:
+            job.skipped += 1
+            self._schedule(job, now + self._jittered(job.interval))
+            return
+
+        limiters = [self._global_limiter] if self._global_limiter else []
+        if self.per_host_rate:
+            limiters.append(self._host_limiters.setdefault(job.host, RateLimiter(self.per_host_rate)))
+        wait = max((limiter.wait_time(now) for limiter in limiters), default=0.0)
+        if wait > 0:
+            job.rate_limited += 1
+            self._schedule(job, now + wait)
+            return
+
+        for limiter in limiters:
+            limiter.take()
+        job.in_flight = True
+        job.runs += 1
+        self._schedule(job, now + self._jittered(job.interval))
+        self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        """Verificar un target con su manager y el spec registrado"""
+        try:
+            result = job.manager.check(job.spec)[0]
+        except Exception as e:
+            result = ("Error", f"❌ Error de monitorización: {str(e)}")
+        with self._condition:
+            job.in_flight = False
+            job.last_run = time.time()
+            job.last_result = result
+
+    def _jittered(self, interval):
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+def get_shared_scheduler():
+    """Obtener el planificador compartido por todas las sesiones del proceso"""
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = MonitorScheduler()
+        return _shared_scheduler
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+import socket
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection
+from managers.check_result import PHASES, PHASE_FIELDS
+from managers.dns_cache import get_shared_dns_cache
+from managers.tls_cache import get_shared_tls_cache
+
+# Datos del handshake TLS y del certificado que acompañan a los tiempos
+TLS_FIELDS = ("tls_resumed", "tls_version", "cert_issuer", "cert_days_left", "cert_valid")
+
+_active_timer = threading.local()
+
+class PhaseTimer:
+    """
+    Tiempos por fase de una verificación HTTP (reloj monotónico)
+
+    Mientras una petición del pool está en curso, el timer activo del hilo
+    recibe los tiempos de resolución, conexión TCP, handshake TLS y espera
+    del primer byte medidos por las conexiones. Una fase que no ocurre (p.
+    ej. conectar con una conexión reutilizada) queda en None. Con
+    redirecciones, los tiempos de cada salto se suman.
+
+    En HTTPS también recibe los datos TLS de la conexión (TLS_FIELDS): si
+    la sesión se reanudó, la versión y lo inspeccionado del certificado.
+    """
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES)
+        self.tls = dict.fromkeys(TLS_FIELDS)
+        self.resolved = {}
+
+    def resolve(self, dns_cache, host):
+        """
+        Resolver un host como fase "dns" y guardar el resultado para las conexiones
+
+        Las conexiones que se abran con este timer activo usan estas
+        direcciones (o este error) en lugar de resolver otra vez.
+
+        Args:
+            dns_cache (DNSCache): Caché DNS
+            host (str): Host a resolver
+        """
+        with self.measure("dns"):
+            try:
+                self.resolved[host] = dns_cache.resolve(host)
+            except socket.gaierror as e:
+                self.resolved[host] = e
+
+    def add(self, phase, seconds):
+        """Sumar `seconds` a una fase"""
+        self.phases[phase] = (self.phases[phase] or 0.0) + seconds
+
+    @contextmanager
+    def measure(self, phase):
+        """Medir el bloque `with` como parte de una fase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    @contextmanager
+    def activate(self):
+        """Hacer que las conexiones de este hilo registren sus fases en este timer"""
+        previous = getattr(_active_timer, "timer", None)
+        _active_timer.timer = self
+        try:
+            yield self
+        finally:
+            _active_timer.timer = previous
+
+    def record_tls(self, sock, certificate, resumed=None):
+        """
+        Guardar los datos TLS de una conexión
+
+        Args:
+            sock (ssl.SSLSocket): Conexión TLS establecida
+            certificate (dict): Entrada de TLSCache.inspect_certificate (None si no hay)
+            resumed (bool, optional): Si la sesión se reanudó. Defaults to None (no cambia)
+        """
+        if resumed is not None:
+            self.tls["tls_resumed"] = resumed
+        self.tls["tls_version"] = sock.version()
+        if certificate is not None:
+            self.tls["cert_issuer"] = certificate["issuer"]
+            self.tls["cert_valid"] = certificate["valid"]
+            if certificate["expires"] is not None:
+                self.tls["cert_days_left"] = (certificate["expires"] - time.time()) / 86400
+
+    def as_fields(self):
+        """Obtener los tiempos y los datos TLS como campos de analytics (dns_time, connect_time...)"""
+        return {**{field: self.phases[phase] for phase, field in zip(PHASES, PHASE_FIELDS)}, **self.tls}
+
+@contextmanager
+def _measure(phase):
+    """Medir una fase en el timer activo del hilo (sin efecto si no hay ninguno)"""
+    timer = getattr(_active_timer, "timer", None)
+    if timer is None:
+        yield
+    else:
+        with timer.measure(phase):
+            yield
+
+class PoolStats:
+    """
+    Contadores de reutilización de conexiones del pool
+
+    Cada petición toma una conexión del pool; si ya estaba abierta es un
+    acierto (hit), si hay que abrirla cuenta como conexión nueva y, en HTTPS,
+    como handshake TLS.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.https_requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    def record_request(self, https):
+        """Registrar una petición servida por el pool"""
+        with self._lock:
+            self.requests += 1
+            if https:
+                self.https_requests += 1
+
+    def record_connection(self, https):
+        """Registrar una conexión nueva (TCP y, en HTTPS, handshake TLS)"""
+        with self._lock:
+            self.new_connections += 1
+            if https:
+                self.tls_handshakes += 1
+
+    def as_dict(self):
+        """Obtener estadísticas del pool"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hits": max(0, self.requests - self.new_connections),
+                "new_connections": self.new_connections,
+                "tls_handshakes": self.tls_handshakes,
+                "handshakes_avoided": max(0, self.https_requests - self.tls_handshakes)
+            }
+
+def _cached_new_conn(conn, dns_cache):
+    """
+    Abrir el socket de una conexión de urllib3 resolviendo con la caché DNS
+
+    Equivale a HTTPConnection._new_conn pero conecta a las direcciones de la
+    caché en lugar de llamar a getaddrinfo. Si el timer activo ya resolvió
+    el host (ver PhaseTimer.resolve) usa esas direcciones sin volver a
+    resolver ni medir otra fase "dns". El host original se conserva para la
+    cabecera Host y el SNI/verificación del certificado.
+    """
+    timer = getattr(_active_timer, "timer", None)
+    resolved = timer.resolved.get(conn._dns_host) if timer is not None else None
+    try:
+        if isinstance(resolved, socket.gaierror):
+            raise resolved
+        if resolved is not None:
+            addresses = resolved
+        else:
+            with _measure("dns"):
+                addresses = dns_cache.resolve(conn._dns_host)
+    except socket.gaierror as e:
+        raise NameResolutionError(conn.host, conn, e) from e
+
+    error = None
+    for _, address in addresses:
+        try:
+            with _measure("connect"):
+                sock = connection.create_connection(
+                    (address, conn.port),
+                    conn.timeout,
+                    source_address=conn.source_address,
+                    socket_options=conn.socket_options,
+                )
+            conn._socket_ready = time.perf_counter()
+            return sock
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                conn, f"Connection to {conn.host} timed out. (connect timeout={conn.timeout})"
+            ) from e
+        except OSError as e:
+            error = e
+    raise NewConnectionError(conn, f"Failed to establish a new connection: {error}") from error
+
+class _ResumingSSLContext(ssl.SSLContext):
+    """
+    Contexto TLS compartido por las conexiones de un pool que ofrece la
+    sesión guardada del host al abrir cada conexión
+
+    Las sesiones solo se pueden reanudar con el mismo contexto que las creó,
+    así que el pool usa siempre este contexto en lugar de crear uno (y
+    cargar el bundle de CAs) por conexión, y solo pide a la caché las
+    sesiones guardadas con este mismo contexto.
+    """
+    tls_cache = None
+    ca_bundle = None
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True, suppress_ragged_eofs=True, server_hostname=None, session=None):
+        if session is None and self.tls_cache is not None and server_hostname:
+            session = self.tls_cache.get_session(self, server_hostname, sock.getpeername()[1])
+        return super().wrap_socket(
+            sock, server_side, do_handshake_on_connect, suppress_ragged_eofs, server_hostname, session
+        )
+
+def _resuming_context(verify_ssl, tls_cache):
+    """Crear el contexto TLS de un pool (con las CAs de requests si verifica)"""
+    context = _ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    if verify_ssl:
+        context.load_verify_locations(DEFAULT_CA_BUNDLE_PATH)
+        context.ca_bundle = DEFAULT_CA_BUNDLE_PATH
+    else:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    context.tls_cache = tls_cache
+    return context
+
+def _record_tls(conn, sock, tls_cache):
+    """
+    Guardar la sesión y el certificado de una conexión HTTPS y pasar sus datos al timer activo
+
+    Se llama con la respuesta ya recibida, cuando en TLS 1.3 el servidor ya
+    ha enviado el ticket de sesión. El socket se pasa aparte porque
+    http.client lo suelta de la conexión si la respuesta la cierra.
+    """
+    if not isinstance(sock, ssl.SSLSocket):
+        return
+    host = conn.server_hostname or conn.host
+    tls_cache.store_session(host, conn.port, sock)
+    certificate = getattr(conn, "_certificate", None)
+    timer = getattr(_active_timer, "timer", None)
+    if timer is not None:
+        timer.record_tls(sock, certificate)
+
+def _counting_pool_classes(stats, dns_cache, tls_cache):
+    """
+    Crear clases de pool de urllib3 que registran uso en `stats`, resuelven
+    con `dns_cache`, reanudan sesiones TLS con `tls_cache` y miden las fases
+    de cada petición en el timer activo
+    """
+
+    class CountingHTTPConnection(HTTPConnection):
+        def connect(self):
+            stats.record_connection(https=False)
+            super().connect()
+
+        def _new_conn(self):
+            return _cached_new_conn(self, dns_cache)
+
+        def getresponse(self):
+            with _measure("ttfb"):
+                return super().getresponse()
+
+    class CountingHTTPSConnection(HTTPSConnection):
+        def connect(self):
+            stats.record_connection(https=True)
+            if isinstance(self.ssl_context, _ResumingSSLContext) and self.ca_certs == self.ssl_context.ca_bundle:
+                # Las CAs ya están cargadas en el contexto compartido
+                self.ca_certs = None
+            super().connect()
+            # El handshake TLS es lo que tarda connect desde que el socket está abierto
+            timer = getattr(_active_timer, "timer", None)
+            if timer is not None:
+                timer.add("tls", time.perf_counter() - self._socket_ready)
+            if isinstance(self.sock, ssl.SSLSocket):
+                resumed = self.sock.session_reused
+                tls_cache.record_handshake(resumed)
+                self._certificate = tls_cache.inspect_certificate(
+                    self.server_hostname or self.host, self.port, self.sock, bool(self.is_verified)
+                )
+                if timer is not None:
+                    timer.tls["tls_resumed"] = resumed
+
+        def _new_conn(self):
+            return _cached_new_conn(self, dns_cache)
+
+        def getresponse(self):
+            sock = self.sock
+            with _measure("ttfb"):
+                response = super().getresponse()
+            _record_tls(self, sock, tls_cache)
+            return response
+
+    class CountingHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = CountingHTTPConnection
+
+        def _get_conn(self, timeout=None):
+            stats.record_request(https=False)
+            return super()._get_conn(timeout)
+
+    class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = CountingHTTPSConnection
+
+        def _get_conn(self, timeout=None):
+            stats.record_request(https=True)
+            return super()._get_conn(timeout)
+
+    return {"http": CountingHTTPConnectionPool, "https": CountingHTTPSConnectionPool}
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter cuyo PoolManager usa los pools con contadores, caché DNS y contexto TLS compartido"""
+    def __init__(self, stats, dns_cache, tls_cache, ssl_context, **kwargs):
+        self._stats = stats
+        self._dns_cache = dns_cache
+        self._tls_cache = tls_cache
+        self._ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = self._ssl_context
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _counting_pool_classes(self._stats, self._dns_cache, self._tls_cache)
+
+class SessionPool:
+    """
+    Pool compartido de sesiones HTTP con conexiones keep-alive
+
+    Mantiene una requests.Session por combinación de verify_ssl y
+    allow_redirects, de modo que una conexión abierta con verificación SSL
+    nunca se reutiliza para una petición sin ella (ni al revés). Las
+    conexiones nuevas resuelven el host con la caché DNS compartida y, en
+    HTTPS, ofrecen la sesión TLS guardada del host para reanudar el handshake.
+    Hay un contexto TLS por valor de verify_ssl, compartido por las sesiones
+    y por las sondas de protocolo, así que todas reanudan las mismas sesiones.
+
+    Methods:
+        get_session: Obtiene la sesión para una configuración
+        ssl_context: Obtiene el contexto TLS compartido para una configuración
+        request: Hace una petición usando el pool
+        get: Hace una petición GET usando el pool
+        close: Cierra todas las conexiones abiertas
+    """
+    def __init__(self, max_hosts=100, max_per_host=10, max_total=100, block=False, dns_cache=None, tls_cache=None):
+        """
+        Args:
+            max_hosts (int, optional): Hosts con conexiones en caché. Defaults to 100
+            max_per_host (int, optional): Conexiones abiertas por host. Defaults to 10
+            max_total (int, optional): Peticiones simultáneas en total. Defaults to 100
+            block (bool, optional): Esperar conexión libre en vez de abrir una extra. Defaults to False
+            dns_cache (DNSCache, optional): Caché DNS para las conexiones. Defaults to la caché compartida
+            tls_cache (TLSCache, optional): Caché de sesiones TLS y certificados. Defaults to la caché compartida
+        """
+        self.max_hosts = max_hosts
+        self.max_per_host = max_per_host
+        self.max_total = max_total
+        self.block = block
+        self.stats = PoolStats()
+        self.dns_cache = dns_cache or get_shared_dns_cache()
+        self.tls_cache = tls_cache or get_shared_tls_cache()
+        self._sessions = {}
+        self._contexts = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_total)
+
+    def get_session(self, verify_ssl=True, allow_redirects=True):
+        """
+        Obtener (o crear) la sesión para una configuración
+
+        Args:
+            verify_ssl (bool, optional): Verificar certificados SSL. Defaults to True
+            allow_redirects (bool, optional): Permitir redirecciones. Defaults to True
+
+        Returns:
+            requests.Session: Sesión con pool de conexiones propio
+        """
+        key = (verify_ssl is not False, bool(allow_redirects))
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.verify = key[0]
+                adapter = _PooledAdapter(
+                    self.stats,
+                    self.dns_cache,
+                    self.tls_cache,
+                    self._ssl_context(key[0]),
+                    pool_connections=self.max_hosts,
+                    pool_maxsize=self.max_per_host,
+                    pool_block=self.block
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[key] = session
+            return session
+
+    def ssl_context(self, verify_ssl=True):
+        """
+        Obtener el contexto TLS compartido para una configuración
+
+        Args:
+            verify_ssl (bool, optional): Verificar certificados SSL. Defaults to True
+
+        Returns:
+            ssl.SSLContext: Contexto que ofrece las sesiones guardadas en tls_cache
+        """
+        with self._lock:
+            return self._ssl_context(verify_ssl is not False)
+
+    def _ssl_context(self, verify_ssl):
+        context = self._contexts.get(verify_ssl)
+        if context is None:
+            context = self._contexts[verify_ssl] = _resuming_context(verify_ssl, self.tls_cache)
+        return context
+
+    def request(self, method, url, timeout=None, allow_redirects=True, verify_ssl=True, phase_timer=None, **kwargs):
+        """
+        Hacer una petición HTTP reutilizando conexiones del pool
+
+        Args:
+            method (str): Método HTTP
+            url (str): URL completa
+            timeout (float, optional): Tiempo máximo de espera. Defaults to None
+            allow_redirects (bool, optional): Permitir redirecciones. Defaults to True
+            verify_ssl (bool, optional): Verificar certificados SSL. Defaults to True
+            phase_timer (PhaseTimer, optional): Timer que recibe los tiempos por fase. Defaults to None
+
+        Returns:
+            requests.Response: Respuesta de la petición
+        """
+        session = self.get_session(verify_ssl, allow_redirects)
+        with self._slots:
+            if phase_timer is None:
+                return session.request(method, url, timeout=timeout, allow_redirects=allow_redirects, verify=verify_ssl, **kwargs)
+            with phase_timer.activate():
+                return session.request(method, url, timeout=timeout, allow_redirects=allow_redirects, verify=verify_ssl, **kwargs)
+
+    def get(self, url, timeout=None, allow_redirects=True, verify_ssl=True, **kwargs):
+        """Hacer una petición GET reutilizando conexiones del pool"""
+        return self.request("GET", url, timeout, allow_redirects, verify_ssl, **kwargs)
+
+    def close(self):
+        """Cerrar todas las sesiones y sus conexiones"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def get_shared_pool():
+    """Obtener el pool de sesiones compartido por todos los URLManager"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = SessionPool()
+        return _shared_pool
+
+def configure_shared_pool(**kwargs):
+    """
+    Reemplazar el pool compartido con nuevos límites
+
+    Args:
+        **kwargs: Parámetros de SessionPool (max_hosts, max_per_host, max_total, block, dns_cache, tls_cache)
+
+    Returns:
+        SessionPool: Nuevo pool compartido
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is not None:
+            _shared_pool.close()
+        _shared_pool = SessionPool(**kwargs)
+        return _shared_pool
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+import itertools
+import marshal
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import fields
+from managers.check_result import FIELD_NAMES, CheckResult
+from managers.check_spec import CheckSpec
+
+# Campos del manager que se copian del spec al crear el manager de cada worker
+_SPEC_FIELDS = tuple(field.name for field in fields(CheckSpec))
+
+# Posición de las cabeceras en las filas serializadas (se omiten salvo keep_headers)
+_HEADERS_INDEX = FIELD_NAMES.index("headers")
+
+# Estado de cada proceso worker (lo crea _init_worker)
+_worker_manager = None
+_worker_executor = None
+_worker_keep_headers = False
+
+def _init_worker(manager_class, spec, retry_policy, concurrency, keep_headers):
+    """
+    Crear el manager y el pool de hilos del proceso worker
+
+    El proceso arranca limpio (spawn), así que el manager obtiene sus
+    propios pools de conexiones, caché DNS y caché TLS del proceso.
+    """
+    global _worker_manager, _worker_executor, _worker_keep_headers
+    manager = manager_class()
+    for name in _SPEC_FIELDS:
+        if hasattr(manager, name):
+            setattr(manager, name, getattr(spec, name))
+    manager.retry_policy = retry_policy
+    _worker_manager = manager
+    _worker_executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="shard-check")
+    _worker_keep_headers = keep_headers
+
+def _check_target(target):
+    """Verificar un target en el worker y devolverlo como fila serializable"""
+    manager = _worker_manager
+    try:
+        result, record = manager.check(manager.spec_for_target(target))
+    except Exception as e:
+        result = ("Error", f"❌ Error en el worker: {str(e)}")
+        record = CheckResult(target=target, type=manager.check_type, status="Error", error_type="unknown")
+    values = [getattr(record, name) for name in FIELD_NAMES]
+    if not _worker_keep_headers:
+        values[_HEADERS_INDEX] = None
+    return target, result[1], tuple(values)
+
+def _run_shard(targets):
+    """
+    Verificar un lote de targets en el worker
+
+    Returns:
+        bytes: Filas (target, mensaje, valores de CheckResult) serializadas con marshal
+    """
+    return marshal.dumps(list(_worker_executor.map(_check_target, targets)))
+
+class ShardedRunner:
+    """
+    Barrido de targets repartido entre procesos worker
+
+    En un solo intérprete los handshakes TLS, la verificación de
+    certificados y el análisis de respuestas de URLManager compiten por el
+    GIL. El runner reparte los targets en lotes entre procesos, cada uno
+    con su propio manager (con la configuración del manager original), sus
+    pools de conexiones y su caché DNS, y dentro de cada proceso verifica
+    el lote con `concurrency` hilos.
+
+    Cada lote vuelve al proceso principal como filas de tuplas serializadas
+    con marshal (sin nombres de campo ni cabeceras HTTP) y cada registro se
+    envía al callback de analytics del manager original, así que todo el
+    barrido acaba en un único AnalyticsManager. Nunca hay más de dos lotes
+    por worker en vuelo, aunque el iterable de targets sea enorme.
+
+    Methods:
+        run: Verifica los targets y devuelve cada resultado según llega su lote
+    """
+    def __init__(self, manager, processes=None, concurrency=20, chunk_size=64, keep_headers=False):
+        """
+        Args:
+            manager (BaseManager): URLManager o IPManager configurado (timeout, reintentos, callback...)
+            processes (int, optional): Procesos worker. Defaults to os.cpu_count()
+            concurrency (int, optional): Verificaciones simultáneas por proceso. Defaults to 20
+            chunk_size (int, optional): Targets por lote enviado a un worker. Defaults to 64
+            keep_headers (bool, optional): Devolver las cabeceras HTTP de cada verificación. Defaults to False
+        """
+        self.manager = manager
+        self.processes = max(1, int(processes or os.cpu_count() or 1))
+        self.concurrency = max(1, int(concurrency or 1))
+        self.chunk_size = max(1, int(chunk_size or 1))
+        self.keep_headers = keep_headers
+
+    def run(self, targets):
+        """
+        Verificar los targets repartidos entre los procesos worker
+
+        Steps:
+            1. Arrancar los workers con la configuración del manager
+            2. Enviar lotes de chunk_size targets (como mucho dos por worker en vuelo)
+            3. Reconstruir cada registro, enviarlo a analytics y devolver el resultado
+            4. Rellenar el hueco con el siguiente lote pendiente
+
+        Args:
+            targets (iterable): Targets finales ya construidos (URL o IP:PUERTO)
+
+        Yields:
+            tuple: (target, (estado, mensaje)) por lotes, en orden de finalización
+        """
+        targets = iter(targets)
+        analytics_callback = getattr(self.manager, 'analytics_callback', None)
+        max_pending = self.processes * 2
+
+        with ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(type(self.manager), self.manager.build_spec(), self.manager.retry_policy, self.concurrency, self.keep_headers)
+        ) as executor:
+            pending = set()
+            # Llenar los workers sin consumir todo el iterable de targets
+            while len(pending) < max_pending and (shard := list(itertools.islice(targets, self.chunk_size))):
+                pending.add(executor.submit(_run_shard, shard))
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for target, message, values in marshal.loads(future.result()):
+                        record = CheckResult(*values)
+                        if analytics_callback:
+                            analytics_callback.add_data(record)
+                        yield target, (record.status, message)
+                    shard = list(itertools.islice(targets, self.chunk_size))
+                    if shard:
+                        pending.add(executor.submit(_run_shard, shard))
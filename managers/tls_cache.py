@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+import hashlib
+import ssl
+import threading
+import time
+
+class TLSCache:
+    """
+    Caché de sesiones TLS y de certificados por host
+
+    Sesiones: guarda la última sesión TLS (ticket o ID de sesión) de cada
+    (contexto, host, puerto) para ofrecerla en la siguiente conexión. Si el
+    servidor la acepta, el handshake se reanuda sin intercambio de claves
+    completo ni envío y verificación de la cadena de certificados. Una
+    sesión solo se puede reanudar con el SSLContext que la creó, así que
+    cada contexto tiene sus propias sesiones. Cada SessionPool tiene un
+    contexto por valor de verify_ssl, compartido por sus sesiones HTTP y
+    por las sondas de protocolo.
+
+    Certificados: guarda por (host, puerto) la huella SHA-256 del
+    certificado y lo ya inspeccionado (emisor, caducidad y si la cadena se
+    validó). Mientras la huella no cambia se reutiliza la entrada sin volver
+    a analizar el certificado, y un certificado validado una vez cuenta
+    como válido también en las conexiones sin verificación.
+
+    Methods:
+        get_session: Obtiene la sesión reanudable de un host
+        store_session: Guarda la sesión de una conexión
+        record_handshake: Cuenta un handshake completo o reanudado
+        inspect_certificate: Obtiene la información del certificado de una conexión
+        as_dict: Obtiene los contadores de reanudaciones y del caché de certificados
+        clear: Vacía la caché
+    """
+    def __init__(self, max_entries=1024):
+        """
+        Args:
+            max_entries (int, optional): Hosts máximos en caché. Defaults to 1024
+        """
+        self.max_entries = max_entries
+        self.resumed = 0
+        self.full_handshakes = 0
+        self.cert_hits = 0
+        self.cert_changes = 0
+        self._sessions = {}
+        self._certificates = {}
+        self._lock = threading.Lock()
+
+    def get_session(self, context, host, port):
+        """
+        Obtener la sesión guardada de un host para un contexto si no ha caducado
+
+        Args:
+            context (ssl.SSLContext): Contexto de la nueva conexión
+            host (str): Nombre del servidor (SNI)
+            port (int): Puerto
+
+        Returns:
+            ssl.SSLSession: Sesión a ofrecer, o None
+        """
+        key = (context, host, port)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and session.time + session.timeout < time.time():
+                del self._sessions[key]
+                session = None
+            return session
+
+    def store_session(self, host, port, ssl_sock):
+        """
+        Guardar la sesión de una conexión para reanudarla en la siguiente
+
+        En TLS 1.3 el ticket llega después del handshake, así que conviene
+        llamar cuando ya se ha leído algo de la respuesta.
+
+        Args:
+            host (str): Nombre del servidor (SNI)
+            port (int): Puerto
+            ssl_sock (ssl.SSLSocket): Conexión TLS establecida
+        """
+        session = ssl_sock.session
+        with self._lock:
+            if session is not None:
+                self._put(self._sessions, (ssl_sock.context, host, port), session)
+
+    def record_handshake(self, resumed):
+        """Contar un handshake completo o reanudado"""
+        with self._lock:
+            if resumed:
+                self.resumed += 1
+            else:
+                self.full_handshakes += 1
+
+    def inspect_certificate(self, host, port, ssl_sock, verified):
+        """
+        Obtener la información del certificado de una conexión
+
+        Args:
+            host (str): Nombre del servidor (SNI)
+            port (int): Puerto
+            ssl_sock (ssl.SSLSocket): Conexión TLS establecida
+            verified (bool): Si la conexión verificó la cadena y el nombre
+
+        Returns:
+            dict: fingerprint, issuer, expires (epoch), valid (True, o None si nunca se validó)
+        """
+        der = ssl_sock.getpeercert(binary_form=True)
+        if not der:
+            return None
+        fingerprint = hashlib.sha256(der).hexdigest()
+
+        with self._lock:
+            entry = self._certificates.get((host, port))
+            if entry is not None and entry["fingerprint"] == fingerprint and (entry["valid"] or not verified):
+                self.cert_hits += 1
+                return entry
+            if entry is not None and entry["fingerprint"] != fingerprint:
+                self.cert_changes += 1
+
+        # Solo una conexión verificada expone los campos del certificado
+        details = ssl_sock.getpeercert() if verified else None
+        entry = {"fingerprint": fingerprint, "issuer": None, "expires": None, "valid": True if verified else None}
+        if details:
+            issuer = dict(field for rdn in details.get("issuer", ()) for field in rdn)
+            entry["issuer"] = issuer.get("organizationName") or issuer.get("commonName")
+            if details.get("notAfter"):
+                entry["expires"] = ssl.cert_time_to_seconds(details["notAfter"])
+        with self._lock:
+            self._put(self._certificates, (host, port), entry)
+        return entry
+
+    def as_dict(self):
+        """Obtener contadores de la caché"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "resumed": self.resumed,
+                "full_handshakes": self.full_handshakes,
+                "certificates": len(self._certificates),
+                "cert_hits": self.cert_hits,
+                "cert_changes": self.cert_changes
+            }
+
+    def clear(self):
+        """Vaciar la caché"""
+        with self._lock:
+            self._sessions.clear()
+            self._certificates.clear()
+
+    def _put(self, entries, key, value):
+        entries.pop(key, None)
+        if len(entries) >= self.max_entries:
+            # Descartar la entrada más antigua (los dict conservan el orden de inserción)
+            del entries[next(iter(entries))]
+        entries[key] = value
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_tls_cache():
+    """Obtener la caché TLS compartida por todos los pools"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = TLSCache()
+        return _shared_cache
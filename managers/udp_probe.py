@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import os
+import struct
+
+# Reenvíos del datagrama dentro del timeout (UDP no garantiza la entrega)
+UDP_RETRANSMITS = 2
+
+class UDPPayload:
+    """
+    Petición UDP de un protocolo y validación de su respuesta
+
+    Un puerto UDP abierto solo se distingue de uno filtrado si el servicio
+    contesta, así que cada protocolo envía una petición válida y comprueba
+    que la respuesta corresponde a ella (no a otro datagrama).
+
+    Methods:
+        build: Construye el datagrama y el token que identifica la petición
+        matches: Comprueba si un datagrama recibido responde a la petición
+    """
+    name = "echo"
+
+    def build(self):
+        """
+        Construir la petición
+
+        Returns:
+            tuple: (datagrama, token para matches)
+        """
+        token = os.urandom(16)
+        return token, token
+
+    def matches(self, data, token):
+        """Cualquier respuesta del puerto demuestra que está abierto"""
+        return bool(data)
+
+class DNSPayload(UDPPayload):
+    """Consulta DNS de los NS de la raíz (la responde cualquier servidor recursivo o autoritativo)"""
+    name = "dns"
+
+    def build(self):
+        query_id = os.urandom(2)
+        # Cabecera: id, flags (RD), 1 pregunta; pregunta: raíz, tipo NS, clase IN
+        datagram = query_id + struct.pack("!HHHHH", 0x0100, 1, 0, 0, 0) + b"\x00" + struct.pack("!HH", 2, 1)
+        return datagram, query_id
+
+    def matches(self, data, token):
+        return len(data) >= 12 and data[:2] == token and bool(data[2] & 0x80)
+
+class NTPPayload(UDPPayload):
+    """Petición NTPv4 en modo cliente; el servidor devuelve nuestro transmit timestamp como origin"""
+    name = "ntp"
+
+    def build(self):
+        transmit = os.urandom(8)
+        datagram = bytes([0x23]) + bytes(39) + transmit
+        return datagram, transmit
+
+    def matches(self, data, token):
+        return len(data) >= 48 and data[0] & 0x07 == 4 and data[24:32] == token
+
+UDP_PAYLOADS = {payload.name: payload for payload in (DNSPayload(), NTPPayload(), UDPPayload())}
+
+# Payload por defecto según el puerto
+PORT_PAYLOADS = {53: "dns", 123: "ntp"}
+
+def payload_for(port, name=None):
+    """
+    Obtener el payload UDP de un puerto
+
+    Args:
+        port (int): Puerto destino
+        name (str, optional): Forzar un payload (dns, ntp, echo). Defaults to el del puerto o "echo"
+
+    Returns:
+        UDPPayload: Payload a enviar
+    """
+    name = name or PORT_PAYLOADS.get(port, "echo")
+    if name not in UDP_PAYLOADS:
+        raise ValueError(f"udp_payload must be one of {list(UDP_PAYLOADS)}")
+    return UDP_PAYLOADS[name]
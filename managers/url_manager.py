@@ -1,8 +1,32 @@
 #!/usr/bin/env python3
+import time
 import requests
+from urllib.parse import urlparse
 from managers.base_manager import BaseManager
+from managers.check_result import CheckResult
+from managers.check_spec import CheckSpec
+from managers.error_codes import CONNECTION_REFUSED, DNS_ERROR, HTTP_ERROR, SSL_ERROR, TIMEOUT, URL_ERROR, classify_exception
+from managers.session_pool import PhaseTimer, get_shared_pool
+from managers.probes import PROBES
 from data.status_codes_dicts import HTTP_STATUS_DICT
 
+# Modos de sonda HTTP (cómo se obtiene el código de estado sin leer todo el cuerpo)
+PROBE_MODES = {
+    "get": "GET completo",
+    "head": "HEAD (solo cabeceras)",
+    "stream": "GET con cierre anticipado",
+    "capped": "GET con límite de bytes"
+}
+
+# Mensaje de una petición fallida según su código de error
+REQUEST_ERROR_MESSAGES = {
+    URL_ERROR: "❌ Error de URL: {error}",
+    DNS_ERROR: "❌ Error de DNS: Dominio no encontrado",
+    CONNECTION_REFUSED: "❌ Conexión rechazada: Servidor no disponible",
+    TIMEOUT: "❌ Timeout: {error}",
+    SSL_ERROR: "❌ Error SSL: {error}"
+}
+
 class URLManager(BaseManager):
     """
     Clase para construir URLs y verificar conectividad
@@ -10,18 +34,36 @@ class URLManager(BaseManager):
     Methods:
         set_settings: Configura la estructura de la URL y los parámetros de conectividad
         build_target: Construye la URL final
+        build_spec: Construye el spec inmutable de la verificación
+        check: Verifica un spec sin modificar el manager (seguro entre hilos)
         check_connectivity: Verifica la conectividad de una URL
+        check_many: Verifica varias URLs en paralelo
+        check_probe: Verifica con una sonda de protocolo (ftp://, ws://, wss://, redis://...)
 
     """
-    def __init__(self):
+    check_type = "url"
+
+    def __init__(self, session_pool=None):
+        """
+        Args:
+            session_pool (SessionPool, optional): Pool de conexiones HTTP. Defaults to el pool compartido
+        """
         super().__init__()
+        self.session_pool = session_pool or get_shared_pool()
         self.protocol = None
         self.url_address = None
         self.port = None
         self.path = None
         self.extension = None
+        self.probe_mode = "get"
+        self.max_body_bytes = 65536
 
-    def set_target_params(self, url_address, protocol=None, port=None, path=None, extension=None, timeout=None, retries=None, allow_redirects=None, verify_ssl=None):
+    @property
+    def dns_cache(self):
+        """Caché DNS del pool de conexiones (la comparten las sondas de protocolo)"""
+        return self.session_pool.dns_cache
+
+    def set_target_params(self, url_address, protocol=None, port=None, path=None, extension=None, timeout=None, retries=None, allow_redirects=None, verify_ssl=None, probe_mode=None, max_body_bytes=None):
         """
         Configurar los componentes de la URL y los parámetros de conectividad
         
@@ -35,6 +77,8 @@ class URLManager(BaseManager):
             retries (int, optional): Número de reintentos. Defaults to None
             allow_redirects (bool, optional): Permitir redirecciones. Defaults to None
             verify_ssl (bool, optional): Verificar certificados SSL. Defaults to None
+            probe_mode (str, optional): Modo de sonda (ver PROBE_MODES). Defaults to "get"
+            max_body_bytes (int, optional): Bytes máximos a leer en modo "capped". Defaults to 65536
         """
 
         # Asignar componentes (dejar None si es Manual)
@@ -49,6 +93,12 @@ class URLManager(BaseManager):
         self.retries = retries
         self.allow_redirects = allow_redirects
         self.verify_ssl = verify_ssl
+        if probe_mode is not None:
+            if probe_mode not in PROBE_MODES:
+                raise ValueError(f"probe_mode must be one of {list(PROBE_MODES)}")
+            self.probe_mode = probe_mode
+        if max_body_bytes is not None:
+            self.max_body_bytes = max_body_bytes
 
         # Clase base
         self.target = url_address
@@ -80,163 +130,226 @@ class URLManager(BaseManager):
         self.target = "".join(components)
         return self.target
 
-    def check_connectivity(self):
+    def build_spec(self):
+        """
+        Construir el spec de la verificación con los atributos del manager
+
+        Returns:
+            CheckSpec: Parámetros inmutables de la verificación
+        """
+        return CheckSpec(
+            target=self.target,
+            protocol=self.protocol,
+            port=self.port,
+            timeout=self.timeout,
+            retries=self.retries,
+            allow_redirects=self.allow_redirects,
+            verify_ssl=self.verify_ssl,
+            probe_mode=self.probe_mode,
+            max_body_bytes=self.max_body_bytes
+        )
+
+    def spec_for_target(self, target):
+        """Spec de una URL completa con los parámetros de conectividad del manager"""
+        return self.build_spec().with_target(target, protocol=urlparse(target).scheme or None, port=None)
+
+    def check(self, spec):
+        """
+        Verificar la conectividad de una URL sin modificar el manager
+
+        Steps:
+            1. Delegar en la sonda registrada si el esquema no es HTTP (ftp, ws, wss...)
+            2. Hacer la petición HTTP, reintentando según la política de reintentos
+            3. Enviar el resultado final (con los intentos) a analytics
+
+        Args:
+            spec (CheckSpec): Parámetros de la verificación
+
+        Returns:
+            tuple: ((estado, mensaje), CheckResult)
+        """
+        scheme = urlparse(spec.target).scheme.lower() if spec.target else ""
+        if scheme not in ("", "http", "https") and scheme in PROBES:
+            return self._check_probe(spec, scheme)
+
+        result, record = self._run_with_retries(spec, self._check_once)
+
+        # Enviar a analytics
+        self._send_to_analytics(record)
+
+        return result, record
+
+    def _check_once(self, spec):
         """
-        Verifica la conectividad de una URL
+        Un único intento de verificación HTTP (sin enviar a analytics)
 
         Steps:
-            1. Validar que la dirección final exista
-            2. Hacer la petición HTTP
-            3. Analizar el status code
-            4. Guardar el resultado
-            
+            1. Resolver el host con la caché DNS
+            2. Hacer la petición HTTP (conexión, TLS y espera del primer byte)
+            3. Leer el cuerpo según el modo de sonda
+            4. Analizar el status code
+            5. Construir el resultado con el tiempo de cada fase
+
+        Args:
+            spec (CheckSpec): Parámetros de la verificación
+
         Returns:
-            tuple: (estado, mensaje)
+            tuple: ((estado, mensaje), CheckResult)
         """
-        import time
-        start_time = time.time()
-        
+        start_time = time.perf_counter()
+        phase_timer = PhaseTimer()
+        self._resolve_target_host(spec.target, phase_timer)
+
         try:
-            response = requests.get(
-                self.target, 
-                timeout=self.timeout, 
-                allow_redirects=self.allow_redirects,
-                verify=self.verify_ssl
-            )           
-                
-        except requests.exceptions.MissingSchema as e:
-            if "No scheme supplied" in str(e):
-                self.result = ("Error", "❌ Error de URL: Falta http:// o https://")
-            else:
-                self.result = ("Error", "❌ Error de URL: " + str(e))
-            self._handle_exception(start_time)
-            return self.result
-        except requests.exceptions.ConnectionError as e:
-            if "Name or service not known" in str(e):
-                self.result = ("Error", "❌ Error de DNS: Dominio no encontrado")
-            elif "Connection refused" in str(e):
-                self.result = ("Error", "❌ Conexión rechazada: Servidor no disponible")
-            else:
-                self.result = ("Error", "❌ Error de conexión: " + str(e))
-            self._handle_exception(start_time)
-            return self.result
-        except requests.exceptions.Timeout as e:
-            self.result = ("Error", "❌ Timeout: " + str(e))
-            self._handle_exception(start_time)
-            return self.result
+            # Siempre en streaming para medir la lectura del cuerpo como fase propia
+            response = self.session_pool.request(
+                "HEAD" if spec.probe_mode == "head" else "GET",
+                spec.target,
+                timeout=spec.timeout,
+                allow_redirects=spec.allow_redirects,
+                verify_ssl=spec.verify_ssl,
+                phase_timer=phase_timer,
+                stream=True
+            )
+            with phase_timer.measure("body"):
+                content_length, body_bytes_read = self._read_body(response, spec.probe_mode, spec.max_body_bytes)
+
+        except requests.exceptions.MissingSchema:
+            result = ("Error", "❌ Error de URL: Falta http:// o https://")
+            return result, self._create_exception_data(spec, start_time, result, URL_ERROR, phase_timer)
         except requests.exceptions.RequestException as e:
-            self.result = ("Error", "❌ Error de solicitud: " + str(e))
-            self._handle_exception(start_time)
-            return self.result
-        
+            # Clasificar por tipo de excepción y errno, no por el texto del error
+            error_type = classify_exception(e)
+            default = "❌ Error de conexión: {error}" if isinstance(e, requests.exceptions.ConnectionError) else "❌ Error de solicitud: {error}"
+            result = ("Error", REQUEST_ERROR_MESSAGES.get(error_type, default).format(error=e))
+            return result, self._create_exception_data(spec, start_time, result, error_type, phase_timer)
+
         status_type, base_message = HTTP_STATUS_DICT.get(response.status_code, ("Error", f"⚠️ Error HTTP"))
-        self.result = (status_type, f"{base_message}: {response.status_code}")
-
-        # Guardar los datos de la entrada para acceso externo
-        self.request_data = {
-            "target": self.target,
-            "protocol": self.protocol,
-            "port": self.port,
-            "timeout": self.timeout,
-            "retries": self.retries,
-            "allow_redirects": self.allow_redirects,
-            "verify_ssl": self.verify_ssl
-        }
-
-        # Guardar los datos de la respuesta para acceso externo
-        self.response_data = {
-            'status_code': response.status_code,
-            'content_length': len(response.content),
-            'redirect_count': len(response.history),
-            'headers': dict(response.headers),
-            'response_time': response.elapsed.total_seconds()
-        }
-
-        # Guardar los datos de metadata para acceso externo
-        self.request_metadata = {
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "type": "url",
-            "status": self.result[0],
-            "error_type": self._extract_error_type(self.result[1]) if self.result[0] == "Error" else None
-        }
-        
-        # Enviar a analytics
-        self._send_to_analytics(self.request_data, self.response_data, self.request_metadata)
-        
-        return self.result
+        result = (status_type, f"{base_message}: {response.status_code}")
 
-    def _handle_exception(self, start_time):
-        """Manejar excepción usando datos centralizados"""
-        request_data, response_data, request_metadata = self._create_exception_data(start_time, self.result)
-        
-        # Asignar como atributos para que los tests los encuentren
-        self.request_data = request_data
-        self.response_data = response_data
-        self.request_metadata = request_metadata
-        
-        self._send_to_analytics(request_data, response_data, request_metadata)
-    
-    def _create_exception_data(self, start_time, error_result):
+        record = CheckResult(
+            target=spec.target,
+            protocol=spec.protocol,
+            port=spec.port,
+            timeout=spec.timeout,
+            retries=spec.retries,
+            allow_redirects=spec.allow_redirects,
+            verify_ssl=spec.verify_ssl,
+            probe_mode=spec.probe_mode,
+            status_code=response.status_code,
+            content_length=content_length,
+            body_bytes_read=body_bytes_read,
+            redirect_count=len(response.history),
+            headers=dict(response.headers),
+            response_time=time.perf_counter() - start_time,
+            **phase_timer.as_fields(),
+            timestamp=time.time(),
+            type="url",
+            status=result[0],
+            error_type=HTTP_ERROR if result[0] == "Error" else None
+        )
+
+        return result, record
+
+    def _resolve_target_host(self, target, phase_timer):
         """
-        Crear datos de excepción para analytics
-        
+        Resolver el host del target con la caché DNS del pool (fase "dns")
+
+        La conexión que abra después la petición usa las direcciones del
+        timer sin resolver otra vez. Un fallo de resolución no se trata
+        aquí: la petición lo reporta como error de DNS.
+        """
+        host = urlparse(target).hostname if target else None
+        if not host:
+            return
+        phase_timer.resolve(self.session_pool.dns_cache, host)
+
+    def _probe_endpoint(self, target):
+        """Host, puerto y ruta de la URL para las sondas de protocolo"""
+        parsed = urlparse(target)
+        if not parsed.hostname:
+            raise ValueError(f"Invalid URL: {target!r}")
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        return parsed.hostname, parsed.port, path
+
+    def _read_body(self, response, probe_mode="get", max_body_bytes=65536):
+        """
+        Obtener el tamaño de la respuesta según el modo de sonda
+
+        Steps:
+            1. "get": el cuerpo ya está descargado, se mide entero
+            2. "head": solo hay cabeceras, se usa Content-Length
+            3. "stream": se usa Content-Length y se cierra la respuesta sin leerla
+            4. "capped": se leen como máximo max_body_bytes y se cierra
+
+        Args:
+            response (requests.Response): Respuesta de la petición
+            probe_mode (str, optional): Modo de sonda (ver PROBE_MODES). Defaults to "get"
+            max_body_bytes (int, optional): Bytes máximos a leer. Defaults to 65536
+
+        Returns:
+            tuple: (content_length, body_bytes_read), content_length es None si no se conoce
+        """
+        if probe_mode == "get":
+            content_length = len(response.content)
+            return content_length, content_length
+
+        header_length = response.headers.get('Content-Length')
+        header_length = int(header_length) if header_length and header_length.isdigit() else None
+        body_bytes_read = 0
+
+        # Un cuerpo pequeño y conocido (o vacío, en HEAD) se drena para devolver la conexión al pool
+        if probe_mode in ("capped", "head") or (
+            probe_mode == "stream" and header_length is not None and header_length <= max_body_bytes
+        ):
+            for chunk in response.iter_content(chunk_size=min(8192, max_body_bytes)):
+                body_bytes_read += len(chunk)
+                if body_bytes_read >= max_body_bytes:
+                    break
+        response.close()
+
+        if header_length is None and probe_mode == "capped" and body_bytes_read < max_body_bytes:
+            # El cuerpo completo cabía en el límite
+            return body_bytes_read, body_bytes_read
+        return header_length, body_bytes_read
+
+    def _create_exception_data(self, spec, start_time, error_result, error_type, phase_timer=None):
+        """
+        Crear el resultado de una excepción para analytics
+
         Args:
-            start_time: Tiempo de inicio
+            spec: Parámetros de la verificación (CheckSpec)
+            start_time: Tiempo de inicio (time.perf_counter)
             error_result: Tupla (status, message)
-        
+            error_type: Código de error (ver managers.error_codes)
+            phase_timer: Tiempos por fase medidos hasta el fallo. Defaults to None
+
         Returns:
-            tuple: (request_data, response_data, request_metadata)
-        """
-        import time
-        request_data = {
-            "target": getattr(self, 'target', None),
-            "protocol": getattr(self, 'protocol', None),
-            "port": getattr(self, 'port', None),
-            "timeout": getattr(self, 'timeout', None),
-            "retries": getattr(self, 'retries', None)
-        }
-        response_data = {
-            'response_time': time.time() - start_time,
-            "allow_redirects": getattr(self, 'allow_redirects', None),
-            "verify_ssl": getattr(self, 'verify_ssl', None),
-            'status_code': None,
-            'content_length': None,
-            'redirect_count': None,
-            'headers': None
-        }
-        request_metadata = {
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "type": "url",
-            "status": error_result[0],
-            "error_type": self._extract_error_type(error_result[1]) if hasattr(self, '_extract_error_type') else None
-        }
-        return request_data, response_data, request_metadata
-    
+            CheckResult: Resultado sin datos de respuesta HTTP
+        """
+        phase_timer = phase_timer or PhaseTimer()
+        return CheckResult(
+            target=spec.target,
+            protocol=spec.protocol,
+            port=spec.port,
+            timeout=spec.timeout,
+            retries=spec.retries,
+            allow_redirects=spec.allow_redirects,
+            verify_ssl=spec.verify_ssl,
+            probe_mode=spec.probe_mode,
+            response_time=time.perf_counter() - start_time,
+            **phase_timer.as_fields(),
+            timestamp=time.time(),
+            type="url",
+            status=error_result[0],
+            error_type=error_type
+        )
+
     def set_analytics_callback(self, manager):
         """Configurar callback para analytics"""
         self.analytics_callback = manager
-    
-    def _extract_error_type(self, message):
-        """Extraer tipo de error del mensaje"""
-        if "Timeout" in message:
-            return "timeout"
-        elif "DNS" in message or "Dominio no encontrado" in message:
-            return "dns_error"
-        elif "Conexión rechazada" in message:
-            return "connection_refused"
-        elif "URL" in message:
-            return "url_error"
-        elif "SSL" in message or "certificado" in message.lower():
-            return "ssl_error"
-        else:
-            return "unknown"
-    
-    def _send_to_analytics(self, request_data, response_data, request_metadata):
-        """Enviar datos a analytics si hay callback configurado"""
-
-        if hasattr(self, 'analytics_callback') and self.analytics_callback:
-            complete_data = {**self.request_data, **self.response_data, **self.request_metadata}
-            self.analytics_callback.add_data(complete_data)
 
 if __name__ == "__main__":
     url_manager = URLManager()
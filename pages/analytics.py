@@ -2,75 +2,179 @@
 """
 Página de análisis - Streamlit
 """
-import streamlit as st
+import time
 import pandas as pd
-from managers.analytics_manager import AnalyticsManager
+import streamlit as st
+from managers.analytics_manager import get_shared_analytics
+from managers.check_result import PHASE_FIELDS, format_timestamp
+
+# Ventanas de análisis (métricas desde los rollups; la tabla fuera de la memoria, desde el almacén persistente)
+ANALYTICS_WINDOWS = {
+    "Última hora": 3600,
+    "Últimas 24 horas": 86400,
+    "Últimos 7 días": 7 * 86400,
+    "Últimos 30 días": 30 * 86400
+}
 
-# Inicializar analytics manager en session state
-if 'analytics_manager' not in st.session_state:
-    st.session_state.analytics_manager = AnalyticsManager()
+# Resolución de la línea de tiempo (rollup) por defecto para cada ventana
+TIMELINE_RESOLUTIONS = {"1 minuto": "1min", "1 hora": "1h", "1 día": "1d"}
+DEFAULT_RESOLUTION = {3600: "1 minuto", 86400: "1 hora", 7 * 86400: "1 hora", 30 * 86400: "1 día"}
 
-analytics_manager = st.session_state.analytics_manager
+# Columnas de la tabla de datos detallados (sin cabeceras ni intentos anidados)
+TABLE_FIELDS = [
+    "timestamp", "type", "target", "status", "error_type", "response_time",
+    "status_code", "socket_code", "protocol", "port", "attempt_count"
+]
+PAGE_SIZES = [25, 50, 100, 250]
 
 st.title("📊 Analytics Dashboard")
+window_label = st.selectbox("Ventana de análisis:", list(ANALYTICS_WINDOWS), index=1)
+window = ANALYTICS_WINDOWS[window_label]
 st.markdown("---")
 
-# Métricas principales
+# Analytics compartido por todas las sesiones: cada pestaña solo lee, no guarda copias
+analytics_manager = get_shared_analytics()
+
+# Métricas y errores de la ventana desde los rollups; percentiles del histórico en memoria (O(1), calculados al insertar)
+snapshot = analytics_manager.get_snapshot()
+window_metrics = analytics_manager.get_window_metrics(time.time() - window)
+
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_checks = analytics_manager.get_total_checks()
-    st.metric("Total Verificaciones", total_checks)
+    st.metric("Total Verificaciones", window_metrics['total_checks'])
 
 with col2:
-    success_rate = analytics_manager.get_success_rate()
-    st.metric("Tasa de Éxito", f"{success_rate:.1f}%")
+    st.metric("Tasa de Éxito", f"{window_metrics['success_rate']:.1f}%")
 
 with col3:
-    avg_response_time = analytics_manager.get_average_response_time()
-    st.metric("Tiempo Promedio", f"{avg_response_time:.3f}s")
+    st.metric("Tiempo Promedio", f"{window_metrics['average_response_time']:.3f}s")
 
 with col4:
-    checks_by_type = analytics_manager.get_checks_by_type()
+    checks_by_type = window_metrics['checks_by_type']
     ip_checks = checks_by_type.get('ip', 0)
     url_checks = checks_by_type.get('url', 0)
     st.metric("IPs vs URLs", f"{ip_checks}:{url_checks}")
 
+# Latencia de cola: los sketches de cuantiles no se parten por ventana, cubren todo el histórico en memoria
+latency = snapshot['latency']
+st.caption(f"Latencia de todo el histórico en memoria ({snapshot['total_checks']} verificaciones), no solo de la ventana")
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.metric("Latencia p50 (histórico)", f"{latency['p50']:.3f}s")
+
+with col2:
+    st.metric("Latencia p95 (histórico)", f"{latency['p95']:.3f}s")
+
+with col3:
+    st.metric("Latencia p99 (histórico)", f"{latency['p99']:.3f}s")
+
+with col4:
+    st.metric("Latencia Máxima (histórico)", f"{latency['max']:.3f}s")
+
 st.markdown("---")
 
 # Gráficos
-if analytics_manager.get_data():
+if window_metrics['total_checks']:
     # Gráfico de estado
     st.subheader("📈 Estado de Verificaciones")
-    status_data = analytics_manager.get_checks_by_status()
+    status_data = window_metrics['checks_by_status']
     if status_data:
         st.bar_chart(status_data)
     
     # Gráfico de tipos
     st.subheader("🔍 Tipos de Verificación")
-    type_data = analytics_manager.get_checks_by_type()
+    type_data = window_metrics['checks_by_type']
     if type_data:
         st.bar_chart(type_data)
     
     # Errores
     st.subheader("❌ Tipos de Error")
-    error_data = analytics_manager.get_error_types()
+    error_data = window_metrics['error_types']
     if error_data:
         st.bar_chart(error_data)
     
-    # Timeline
+    # Latencia por tipo (sketches: todo el histórico en memoria)
+    st.subheader("🐢 Latencia por Tipo (histórico en memoria)")
+    st.dataframe(
+        {check_type: analytics_manager.get_latency_percentiles(check_type=check_type) for check_type in snapshot['checks_by_type']},
+        use_container_width=True
+    )
+
+    # Desglose por fases (apilado) de las 20 URLs más lentas, desde las sumas por fase del manager
+    phase_data = analytics_manager.get_phase_breakdown("url", limit=20)
+    if any(any(phases.values()) for phases in phase_data.values()):
+        st.subheader("⏱️ Fases de las Verificaciones de URL (s)")
+        st.bar_chart(
+            pd.DataFrame.from_dict(phase_data, orient="index")
+            .rename(columns={field: field.removesuffix('_time').upper() for field in PHASE_FIELDS})
+        )
+
+    # Timeline (desde los rollups: no depende del tamaño del histórico)
     st.subheader("⏰ Línea de Tiempo")
-    df = analytics_manager.get_data_for_chart()
-    if not df.empty:
-        # Agrupar por hora
-        df['hour'] = df['timestamp'].dt.floor('H')
-        timeline_data = df.groupby(['hour', 'status']).size().unstack(fill_value=0)
+    col1, col2 = st.columns(2)
+    with col1:
+        resolution_labels = list(TIMELINE_RESOLUTIONS)
+        resolution_label = st.selectbox(
+            "Resolución:", resolution_labels,
+            index=resolution_labels.index(DEFAULT_RESOLUTION[window])
+        )
+    with col2:
+        dimension = st.selectbox(
+            "Agrupar por:", ["status", "type", "error_type"],
+            format_func={"status": "Estado", "type": "Tipo", "error_type": "Tipo de error"}.get
+        )
+    timeline_data = analytics_manager.get_timeline(
+        TIMELINE_RESOLUTIONS[resolution_label], dimension, start=time.time() - window
+    )
+    if not timeline_data.empty:
         st.line_chart(timeline_data)
     
-    # Datos crudos
+    # Datos crudos: solo se reconstruye la página visible
     st.subheader("📋 Datos Detallados")
-    df_display = analytics_manager.get_data_for_chart()
-    if not df_display.empty:
-        st.dataframe(df_display, use_container_width=True)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        type_filter = st.multiselect("Tipo:", list(window_metrics['checks_by_type']))
+    with col2:
+        status_filter = st.multiselect("Estado:", list(window_metrics['checks_by_status']))
+    with col3:
+        error_filter = st.multiselect("Tipo de error:", list(window_metrics['error_types']))
+    with col4:
+        target_filter = st.text_input("Target:", placeholder="Todos")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_field = st.selectbox("Ordenar por:", ["timestamp", "response_time", "target", "status", "type"])
+    with col2:
+        descending = st.toggle("Descendente", value=True)
+    with col3:
+        page_size = st.selectbox("Filas por página:", PAGE_SIZES, index=1)
+
+    with col4:
+        page = st.number_input("Página:", min_value=1, value=1)
+
+    page_data = analytics_manager.query(
+        check_type=type_filter or None,
+        status=status_filter or None,
+        error_type=error_filter or None,
+        target=target_filter.strip() or None,
+        start=time.time() - window,
+        sort=sort_field,
+        descending=descending,
+        offset=(page - 1) * page_size,
+        limit=page_size,
+        fields=TABLE_FIELDS
+    )
+    total = page_data['total']
+    if page_data['records']:
+        for record in page_data['records']:
+            record['timestamp'] = format_timestamp(record['timestamp'])
+        st.dataframe(page_data['records'], use_container_width=True)
+        st.caption(f"{page_data['offset'] + 1}-{page_data['offset'] + len(page_data['records'])} de {total} verificaciones • {-(-total // page_size)} páginas")
+    elif total:
+        st.info(f"La página {page} está fuera de rango ({-(-total // page_size)} páginas).")
+    else:
+        st.info("Ninguna verificación cumple los filtros.")
 else:
-    st.info("📝 No hay datos de verificación aún. Realiza algunas verificaciones de URLs o IPs para ver los analytics.")
\ No newline at end of file
+    st.info("📝 No hay datos de verificación aún. Realiza algunas verificaciones de URLs o IPs para ver los analytics.")
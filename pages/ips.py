@@ -4,19 +4,19 @@ Página de verificación de IPs - Streamlit
 """
 import streamlit as st
 from managers.ip_manager import IPManager
-from managers.analytics_manager import AnalyticsManager
+from managers.analytics_manager import get_shared_analytics
+from managers.check_result import format_timestamp
+from managers.range_scanner import PORT_PRESETS, parse_ports, iter_ports, count_ports, count_hosts
+from managers.udp_probe import UDP_PAYLOADS
+from managers.probes import probe_names
 
 def ips_page():
     st.header("🌍 Verificación de IPs")
-    st.markdown("Verifica la conectividad de direcciones IP y puertos TCP")
+    st.markdown("Verifica la conectividad de direcciones IP y puertos TCP y UDP")
     
-    # Inicializar analytics manager en session state
-    if 'analytics_manager' not in st.session_state:
-        st.session_state.analytics_manager = AnalyticsManager()
-    
-    # Crear instancia del manager
+    # Crear instancia del manager (los resultados van al analytics compartido del proceso)
     ip_manager = IPManager()
-    ip_manager.set_analytics_callback(st.session_state.analytics_manager)
+    ip_manager.set_analytics_callback(get_shared_analytics())
     # GUI (form) para ingresar IP
     with st.form("ip_verification_form"):
         ip_address = st.text_input(label="Dirección IP", placeholder="192.168.1.1, localhost, etc.", key="ip_input")
@@ -42,11 +42,13 @@ def ips_page():
             subcol1, subcol2 = st.columns(2)
             with subcol1:
                 # Protocolo
-                protocol = st.selectbox("Protocolo:", ["tcp"], index=0, key="protocol_select")
+                protocol = st.selectbox("Protocolo:", ["tcp", "udp", *probe_names()], index=0, key="protocol_select")
                 # Puerto
-                port = st.selectbox("Puerto:", ["Manual", 22, 23, 25, 53, 3306, 5432], index=0, key="port_select")
+                port = st.selectbox("Puerto:", ["Manual", *iter_ports(parse_ports(PORT_PRESETS["comunes"]))], index=0, key="port_select")
             with subcol2:
-                pass
+                # Payload UDP (por defecto el del puerto: 53 → dns, 123 → ntp)
+                udp_payload = st.selectbox("Payload UDP:", ["Automático", *UDP_PAYLOADS], index=0, key="udp_payload_select", disabled=protocol != "udp")
+                udp_payload = None if udp_payload == "Automático" else udp_payload
         with col2:
             st.markdown("**Parámetros de Conexión:**")
             subcol1, subcol2 = st.columns(2)
@@ -54,11 +56,11 @@ def ips_page():
                 # Timeout
                 timeout = st.number_input("Timeout (segundos):", min_value=1, max_value=60, value=3)
                 # Reintentos
-                retries = st.number_input("Reintentos:", min_value=1, max_value=10, value=1)
+                retries = st.number_input("Reintentos:", min_value=0, max_value=10, value=1)
             with subcol2:
                 pass
         # Configurar parámetros del target
-        ip_manager.set_target_params(ip_address, port, protocol, timeout, retries)
+        ip_manager.set_target_params(ip_address, port, protocol, timeout, retries, udp_payload=udp_payload)
         # Construir target usando el manager
         preview_target = ip_manager.build_target()
         # Mostrar previsualización
@@ -76,6 +78,7 @@ def ips_page():
             - `1.1.1.1:53` - DNS Cloudflare
             - `192.168.1.1:80` - Router local
             - `localhost:3000` - Desarrollo local
+            - `[2001:4860:4860::8888]:53` - DNS Google (IPv6)
             
             **🔍 Herramientas Online:**
             - `208.67.222.222:53` - DNS OpenDNS
@@ -92,6 +95,7 @@ def ips_page():
             **🔌 Protocolo:** Método de comunicación
             - `TCP` - Conexión fiable y ordenada
             - `UDP` - Conexión rápida sin confirmación
+            - `tls`, `ftp`, `smtp`, `redis`, `postgres`... - Sonda del protocolo (handshake, saludo o ping)
             
             **🚪 Puerto:** Servicio específico
             - `22` - SSH (acceso remoto)
@@ -133,7 +137,7 @@ def ips_page():
             message = None
         else:
             # Configurar parámetros del target
-            ip_manager.set_target_params(ip_address, port, protocol, timeout, retries)
+            ip_manager.set_target_params(ip_address, port, protocol, timeout, retries, udp_payload=udp_payload)
             # Construir target usando el manager
             ip_manager.build_target()
             # Mostrar IP que se va a verificar y enlace para abrir
@@ -171,11 +175,16 @@ def ips_page():
 📋 DATOS DE RESPUESTA
 • Código Socket: {response_data.get('socket_code', 'N/A')}
 • Tiempo de Respuesta: {response_data.get('response_time', 0):.3f}s
+• Intentos: {response_data.get('attempt_count', 1)} ({', '.join(f"{attempt['latency']:.3f}s" for attempt in response_data.get('attempts', []))})
+• Resolución DNS: {f"{response_data['dns_time'] * 1000:.1f} ms" if response_data.get('dns_time') is not None else 'N/A'}
 • Host Info: {response_data.get('host_info', 'N/A')}
-• Tipo Conexión: {response_data.get('connection_type', 'N/A')}
+• Tipo Conexión: {response_data.get('connection_type', 'N/A')} ({response_data.get('addresses_tried') or 0} direcciones probadas)
+• Tiempo de Conexión: {f"{response_data['connect_time'] * 1000:.1f} ms" if response_data.get('connect_time') is not None else 'N/A'}
+• Payload UDP: {response_data.get('probe_payload') or 'N/A'} ({response_data.get('response_bytes') or 0} bytes de respuesta)
+• Detalle de sonda: {response_data.get('probe_detail') or 'N/A'}
 
 📅 METADATOS
-• Timestamp: {request_metadata.get('timestamp', 'N/A')}
+• Timestamp: {format_timestamp(request_metadata.get('timestamp'))}
 • Type: {request_metadata.get('type', 'N/A')}
 • Status: {request_metadata.get('status', 'N/A')}
 • Error Type: {request_metadata.get('error_type', 'N/A')}""")
@@ -184,4 +193,68 @@ def ips_page():
             result_details_placeholder.info("🔍 Realiza una verificación para ver los datos enriquecidos")
     else:
         # Mostrar mensaje informativo en el placeholder
-        result_details_placeholder.info("🔍 Realiza una verificación para ver los detalles aquí")
\ No newline at end of file
+        result_details_placeholder.info("🔍 Realiza una verificación para ver los detalles aquí")
+    # ==============================================================================
+    # 4. LOTES - Barrido de varios IP:PUERTO con asyncio
+    # ==============================================================================
+
+    with st.expander("📦 Verificación por lotes"):
+        with st.form("ip_batch_form"):
+            batch_input = st.text_area("Targets IP:PUERTO (uno por línea):", placeholder="192.168.1.1:22\n192.168.1.1:80", key="ip_batch_input")
+            concurrency = st.number_input("Conexiones simultáneas:", min_value=1, max_value=5000, value=500)
+            deadline = st.number_input("Límite global (segundos, 0 = sin límite):", min_value=0, max_value=3600, value=0)
+            batch_submitted = st.form_submit_button("Verificar Lote")
+
+        if batch_submitted:
+            batch_targets = [line.strip() for line in batch_input.splitlines() if line.strip()]
+            if not batch_targets:
+                st.warning("Es necesario ingresar al menos un target")
+            else:
+                with st.spinner(f"Verificando {len(batch_targets)} targets..."):
+                    if protocol in ("tcp", "udp"):
+                        probe = ip_manager.probe_udp if protocol == "udp" else ip_manager.probe_tcp
+                        batch_results = probe(batch_targets, concurrency, timeout, deadline or None)
+                    else:
+                        # Las sondas de protocolo mantienen un diálogo, van por el pool de hilos
+                        batch_results = list(ip_manager.check_many(batch_targets, min(concurrency, 50)))
+                st.dataframe(
+                    [{"Target": target, "Estado": batch_status, "Mensaje": batch_message} for target, (batch_status, batch_message) in batch_results],
+                    use_container_width=True
+                )
+
+    # ==============================================================================
+    # 5. ESCANEO - Rangos CIDR × puertos en una matriz
+    # ==============================================================================
+
+    with st.expander("🗺️ Escaneo de rangos"):
+        with st.form("ip_scan_form"):
+            scan_hosts = st.text_input("Hosts:", placeholder="192.168.1.0/24, 10.0.0.5-10.0.0.9, servidor.local", key="ip_scan_hosts")
+            scan_col1, scan_col2 = st.columns([2, 1])
+            with scan_col1:
+                scan_ports = st.text_input("Puertos:", placeholder="22,80,443,8000-8100", key="ip_scan_ports")
+            with scan_col2:
+                scan_preset = st.selectbox("Preset:", ["Ninguno", *PORT_PRESETS], key="ip_scan_preset")
+            scan_concurrency = st.number_input("Conexiones simultáneas:", min_value=1, max_value=5000, value=500, key="ip_scan_concurrency")
+            scan_deadline = st.number_input("Límite global (segundos, 0 = sin límite):", min_value=0, max_value=3600, value=0, key="ip_scan_deadline")
+            scan_submitted = st.form_submit_button("Escanear")
+
+        if scan_submitted:
+            port_expression = ",".join(part for part in (scan_ports, scan_preset if scan_preset != "Ninguno" else "") if part.strip())
+            try:
+                port_ranges = parse_ports(port_expression)
+                host_count = count_hosts(scan_hosts)
+            except ValueError as e:
+                st.error(f"❌ Expresión inválida: {e}")
+            else:
+                if not port_ranges or not host_count:
+                    st.warning("Es necesario ingresar al menos un host y un puerto")
+                else:
+                    with st.spinner(f"Escaneando {host_count * count_ports(port_ranges)} puertos..."):
+                        matrix = ip_manager.scan_range(scan_hosts, port_ranges, scan_concurrency, timeout, scan_deadline or None)
+                    counts = matrix.counts()
+                    st.caption(f"✅ {counts['Éxito']} abiertos • ⚠️ {counts['Advertencia']} advertencias • ❌ {counts['Error']} cerrados o con error")
+                    matrix_df = matrix.to_dataframe()
+                    if matrix_df.empty or not len(matrix_df.columns):
+                        st.info("No se encontraron puertos abiertos")
+                    else:
+                        st.dataframe(matrix_df, use_container_width=True)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Página de monitorización continua - Streamlit
+"""
+import time
+import streamlit as st
+from managers.url_manager import URLManager
+from managers.ip_manager import IPManager
+from managers.analytics_manager import get_shared_analytics
+from managers.scheduler import get_shared_scheduler
+
+st.title("🛰️ Monitorización Continua")
+st.markdown("Registra targets con su intervalo y se verificarán en segundo plano")
+
+# Planificador y analytics compartidos por todas las sesiones (los targets siguen activos al cerrar la pestaña)
+scheduler = get_shared_scheduler()
+
+# ==============================================================================
+# 1. REGISTRO - Añadir targets al planificador
+# ==============================================================================
+
+with st.form("monitor_add_form"):
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        target = st.text_input("Target:", placeholder="https://example.com/health o 192.168.1.1:443")
+    with col2:
+        check_type = st.selectbox("Tipo:", ["URL", "IP"])
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        interval = st.number_input("Intervalo (s):", min_value=1, max_value=86400, value=60)
+    with col2:
+        timeout = st.number_input("Timeout (s):", min_value=1, max_value=60, value=3)
+    with col3:
+        retries = st.number_input("Reintentos:", min_value=0, max_value=10, value=1)
+    add_submitted = st.form_submit_button("Añadir a la monitorización")
+
+if add_submitted:
+    if not target.strip():
+        st.warning("Es necesario ingresar un target")
+    else:
+        if check_type == "URL":
+            manager = URLManager()
+            manager.set_target_params(target.strip(), None, None, None, None, timeout, retries, True, True, "stream")
+        else:
+            manager = IPManager()
+            manager.set_target_params(target.strip(), None, "tcp", timeout, retries)
+        manager.set_analytics_callback(get_shared_analytics())
+        scheduler.add_target(manager, target.strip(), float(interval))
+        st.success(f"✅ {target.strip()} se verificará cada {interval}s")
+
+# ==============================================================================
+# 2. CONTROL - Arrancar y detener el planificador
+# ==============================================================================
+
+with st.expander("⚙️ Límites de ritmo"):
+    st.caption(
+        f"Global: {scheduler.global_rate or '∞'} verificaciones/s • "
+        f"Por host: {scheduler.per_host_rate or '∞'} verificaciones/s • "
+        f"Jitter: ±{scheduler.jitter * 100:.0f}%"
+    )
+
+col1, col2 = st.columns(2)
+with col1:
+    if st.button("▶️ Iniciar", use_container_width=True, disabled=scheduler.running):
+        scheduler.start()
+        st.rerun()
+with col2:
+    if st.button("⏹️ Detener", use_container_width=True, disabled=not scheduler.running):
+        scheduler.stop(wait=False)
+        st.rerun()
+
+st.caption("🟢 En marcha" if scheduler.running else "⚪ Detenido")
+
+# ==============================================================================
+# 3. ESTADO - Targets registrados
+# ==============================================================================
+
+jobs = scheduler.get_jobs()
+if jobs:
+    st.dataframe(
+        [
+            {
+                "ID": job["job_id"],
+                "Target": job["target"],
+                "Intervalo (s)": job["interval"],
+                "Estado": job["last_status"] or "Pendiente",
+                "Mensaje": job["last_message"] or "",
+                "Última": time.strftime("%H:%M:%S", time.localtime(job["last_run"])) if job["last_run"] else "-",
+                "Próxima en (s)": round(job["next_run_in"], 1),
+                "Ejecuciones": job["runs"],
+                "Omitidas": job["skipped"],
+                "Retrasadas": job["rate_limited"]
+            }
+            for job in jobs
+        ],
+        use_container_width=True
+    )
+    remove_id = st.selectbox("Quitar target:", [job["job_id"] for job in jobs], format_func=lambda job_id: next(job["target"] for job in jobs if job["job_id"] == job_id))
+    if st.button("🗑️ Quitar"):
+        scheduler.remove_target(remove_id)
+        st.rerun()
+    if st.button("🔄 Actualizar estado"):
+        st.rerun()
+else:
+    st.info("📝 No hay targets en monitorización. Añade uno con el formulario.")
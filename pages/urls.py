@@ -3,20 +3,17 @@
 Página de verificación de URLs - Streamlit
 """
 import streamlit as st
-from managers.url_manager import URLManager
-from managers.analytics_manager import AnalyticsManager
+from managers.url_manager import URLManager, PROBE_MODES
+from managers.analytics_manager import get_shared_analytics
+from managers.check_result import PHASE_FIELDS, format_timestamp
 
 def urls_page():
     st.header("🌐 Verificación de URLs")
     st.markdown("Verifica la conectividad de sitios web y APIs HTTP/HTTPS")
     
-    # Inicializar analytics manager en session state
-    if 'analytics_manager' not in st.session_state:
-        st.session_state.analytics_manager = AnalyticsManager()
-    
-    # Crear instancia del manager
+    # Crear instancia del manager (los resultados van al analytics compartido del proceso)
     url_manager = URLManager()
-    url_manager.set_analytics_callback(st.session_state.analytics_manager)
+    url_manager.set_analytics_callback(get_shared_analytics())
     # GUI (form) para ingresar URL
     with st.form("url_verification_form"):
         url_address = st.text_input(label="Dirección Web", placeholder="https://google.com, https://github.com, etc.", key="url_input")
@@ -67,13 +64,22 @@ def urls_page():
                 # Timeout
                 timeout = st.number_input("Timeout (segundos):", min_value=1, max_value=60, value=3)
                 # Reintentos
-                retries = st.number_input("Reintentos:", min_value=1, max_value=10, value=1)
+                retries = st.number_input("Reintentos:", min_value=0, max_value=10, value=1)
             with subcol2:
                 # Opciones básicas
                 allow_redirects = st.checkbox("Seguir redirecciones", value=True)
                 verify_ssl = st.checkbox("Verificar SSL", value=True)
+                # Modo de sonda
+                probe_mode = st.selectbox(
+                    "Modo de sonda:",
+                    list(PROBE_MODES),
+                    index=list(PROBE_MODES).index("stream"),
+                    format_func=PROBE_MODES.get,
+                    key="probe_mode_select"
+                )
+                max_body_kb = st.number_input("Límite de lectura (KB):", min_value=1, max_value=10240, value=64, disabled=probe_mode != "capped")
         # Configurar parámetros del target
-        url_manager.set_target_params(url_address, protocol, port, path, extension, timeout, retries, allow_redirects, verify_ssl)
+        url_manager.set_target_params(url_address, protocol, port, path, extension, timeout, retries, allow_redirects, verify_ssl, probe_mode, max_body_kb * 1024)
         # Construir target usando el manager
         preview_target = url_manager.build_target()
         # Mostrar previsualización
@@ -83,6 +89,9 @@ def urls_page():
                 st.code(preview_target)
     with tab2:
         result_details_placeholder = st.empty()
+        pool_stats_placeholder = st.empty()
+        dns_stats_placeholder = st.empty()
+        tls_stats_placeholder = st.empty()
 
     with tab3:
         with st.expander("💡 Casos de Uso Comunes"):
@@ -107,7 +116,8 @@ def urls_page():
             **🔗 Protocolo:** Método de conexión
             - `https://` - Conexión segura (SSL/TLS)
             - `http://` - Conexión estándar (sin encriptar)
-            - `ftp://` - Transferencia de archivos
+            - `ftp://` - Transferencia de archivos (se comprueba el saludo 220)
+            - `ws://` / `wss://` - WebSocket (se comprueba el upgrade 101)
             
             **🏷️ Extensión:** Dominio de nivel superior
             - `.com` - Comercial
@@ -157,7 +167,7 @@ def urls_page():
             message = None
         else:
             # Configurar parámetros del target
-            url_manager.set_target_params(url_address, protocol, port, path, extension, timeout, retries, allow_redirects, verify_ssl)
+            url_manager.set_target_params(url_address, protocol, port, path, extension, timeout, retries, allow_redirects, verify_ssl, probe_mode, max_body_kb * 1024)
             # Construir target usando el manager
             url_manager.build_target()
             # Mostrar URL que se va a verificar y enlace para abrir
@@ -193,16 +203,23 @@ def urls_page():
 • Reintentos: {request_data.get('retries', 'N/A')}
 • Allow Redirects: {request_data.get('allow_redirects', 'N/A')}
 • Verify SSL: {request_data.get('verify_ssl', 'N/A')}
+• Modo de sonda: {request_data.get('probe_mode', 'N/A')}
 
 📋 DATOS DE RESPUESTA
 • Código HTTP: {response_data.get('status_code', 'N/A')}
 • Tiempo de Respuesta: {response_data.get('response_time', 0):.3f}s
-• Tamaño: {response_data.get('content_length', 0)} bytes
+• Intentos: {response_data.get('attempt_count', 1)} ({', '.join(f"{attempt['latency']:.3f}s" for attempt in response_data.get('attempts', []))})
+• Fases: {' • '.join(f"{field[:-5].upper()} {response_data[field] * 1000:.1f} ms" for field in PHASE_FIELDS if response_data.get(field) is not None) or 'N/A'}
+• Tamaño: {response_data.get('content_length') if response_data.get('content_length') is not None else 'desconocido'} bytes
+• Bytes leídos: {response_data.get('body_bytes_read', 0)}
 • Redirecciones: {response_data.get('redirect_count', 0)}
-• Headers: {list(response_data.get('headers', {}).keys())[:5]}
+• Headers: {list((response_data.get('headers') or {}).keys())[:5]}
+• TLS: {response_data.get('tls_version') or 'N/A'}{' (sesión reanudada)' if response_data.get('tls_resumed') else ''}
+• Certificado: {response_data.get('cert_issuer') or 'emisor desconocido'} • {f"caduca en {response_data['cert_days_left']:.0f} días" if response_data.get('cert_days_left') is not None else 'caducidad desconocida'} • {'cadena válida' if response_data.get('cert_valid') else 'sin validar'}
+• Detalle de sonda: {response_data.get('probe_detail') or 'N/A'}
 
 📅 METADATOS
-• Timestamp: {request_metadata.get('timestamp', 'N/A')}
+• Timestamp: {format_timestamp(request_metadata.get('timestamp'))}
 • Type: {request_metadata.get('type', 'N/A')}
 • Status: {request_metadata.get('status', 'N/A')}
 • Error Type: {request_metadata.get('error_type', 'N/A')}""")
@@ -211,4 +228,44 @@ def urls_page():
             result_details_placeholder.info("🔍 Realiza una verificación para ver los datos enriquecidos")
     else:
         # Mostrar mensaje informativo en el placeholder
-        result_details_placeholder.info("🔍 Realiza una verificación para ver los detalles aquí")
\ No newline at end of file
+        result_details_placeholder.info("🔍 Realiza una verificación para ver los detalles aquí")
+
+    # Estadísticas del pool de conexiones compartido
+    pool_stats = url_manager.session_pool.stats.as_dict()
+    pool_stats_placeholder.caption(
+        f"🔌 Pool de conexiones: {pool_stats['requests']} peticiones • "
+        f"{pool_stats['hits']} reutilizadas • {pool_stats['new_connections']} nuevas • "
+        f"{pool_stats['handshakes_avoided']} handshakes TLS evitados"
+    )
+    dns_stats = url_manager.session_pool.dns_cache.as_dict()
+    dns_stats_placeholder.caption(
+        f"🧭 Caché DNS: {dns_stats['entries']} hosts • {dns_stats['hits']} aciertos • "
+        f"{dns_stats['misses']} fallos • {dns_stats['negative_hits']} NXDOMAIN cacheados"
+    )
+    tls_stats = url_manager.session_pool.tls_cache.as_dict()
+    tls_stats_placeholder.caption(
+        f"🔐 Caché TLS: {tls_stats['resumed']} sesiones reanudadas • {tls_stats['full_handshakes']} handshakes completos • "
+        f"{tls_stats['certificates']} certificados ({tls_stats['cert_hits']} reutilizados, {tls_stats['cert_changes']} cambios)"
+    )
+    # ==============================================================================
+    # 4. LOTES - Verificación de varias URLs en paralelo
+    # ==============================================================================
+
+    with st.expander("📦 Verificación por lotes"):
+        with st.form("url_batch_form"):
+            batch_input = st.text_area("URLs (una por línea):", placeholder="https://google.com\nhttps://github.com", key="url_batch_input")
+            concurrency = st.number_input("Verificaciones simultáneas:", min_value=1, max_value=100, value=10)
+            batch_submitted = st.form_submit_button("Verificar Lote")
+
+        if batch_submitted:
+            batch_targets = [line.strip() for line in batch_input.splitlines() if line.strip()]
+            if not batch_targets:
+                st.warning("Es necesario ingresar al menos una URL")
+            else:
+                progress = st.progress(0.0, text="Verificando lote...")
+                batch_results = st.empty()
+                rows = []
+                for target, (batch_status, batch_message) in url_manager.check_many(batch_targets, concurrency):
+                    rows.append({"Target": target, "Estado": batch_status, "Mensaje": batch_message})
+                    progress.progress(len(rows) / len(batch_targets), text=f"Verificadas {len(rows)}/{len(batch_targets)}")
+                    batch_results.dataframe(rows, use_container_width=True)
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Fixtures compartidas por las pruebas
+"""
+import socket
+import pytest
+
+@pytest.fixture
+def listening_port():
+    """Fixture con un puerto TCP local escuchando"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(64)
+    yield server.getsockname()[1]
+    server.close()
@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+Pruebas de AnalyticsManager y su almacenamiento columnar
+"""
+import pytest
+import threading
+import time
+from managers.analytics_manager import AnalyticsManager
+from managers.check_result import CheckResult, to_epoch
+from managers.result_store import SQLiteResultStore
+
+def make_record(status="Éxito", check_type="url", error_type=None, response_time=0.5, **extra):
+    """Crear un registro de verificación como los que envían los managers"""
+    record = {
+        "target": "https://example.com",
+        "protocol": "https",
+        "port": None,
+        "timeout": 3,
+        "retries": 1,
+        "status_code": 200 if status == "Éxito" else None,
+        "headers": {"Content-Type": "text/html"},
+        "response_time": response_time,
+        "timestamp": "2026-01-01 10:00:00",
+        "type": check_type,
+        "status": status,
+        "error_type": error_type
+    }
+    record.update(extra)
+    return record
+
+class TestColumnarExamples:
+    """Pruebas del almacenamiento columnar de analytics"""
+
+    @pytest.fixture
+    def analytics_manager(self):
+        """Fixture con algunos registros de URL e IP"""
+        analytics_manager = AnalyticsManager()
+        analytics_manager.add_data(make_record(response_time=0.2))
+        analytics_manager.add_data(make_record(status="Error", error_type="timeout", response_time=3.0))
+        analytics_manager.add_data(make_record(check_type="ip", response_time=0.1, socket_code=0, host_info="10.0.0.1"))
+        return analytics_manager
+
+    def test_metrics(self, analytics_manager):
+        """Prueba las métricas principales"""
+        assert analytics_manager.get_total_checks() == 3
+        assert analytics_manager.get_checks_by_type() == {"url": 2, "ip": 1}
+        assert analytics_manager.get_checks_by_status() == {"Éxito": 2, "Error": 1}
+        assert analytics_manager.get_error_types() == {"timeout": 1}
+        assert analytics_manager.get_success_rate() == pytest.approx(200 / 3)
+        assert analytics_manager.get_average_response_time() == pytest.approx(1.1)
+
+        print("✅ Métricas de analytics funcionan correctamente")
+
+    def test_records_round_trip(self, analytics_manager):
+        """Prueba que los registros se reconstruyen con los mismos valores"""
+        records = analytics_manager.get_data()
+        # Los timestamps en texto se guardan como segundos epoch
+        assert records[0]["timestamp"] == to_epoch("2026-01-01 10:00:00")
+        assert records[1]["status_code"] is None
+        assert records[2]["socket_code"] == 0
+        # Campos nuevos rellenan con None los registros anteriores
+        assert records[0]["socket_code"] is None
+        # Las cabeceras no se guardan por defecto
+        assert "headers" not in records[0]
+
+        keep_headers = AnalyticsManager(keep_headers=True)
+        keep_headers.add_data(make_record())
+        assert keep_headers.get_data()[0]["headers"] == {"Content-Type": "text/html"}
+
+        print("✅ Reconstrucción de registros funciona correctamente")
+
+    def test_dataframe(self, analytics_manager):
+        """Prueba el DataFrame para gráficos"""
+        df = analytics_manager.get_data_for_chart()
+        assert len(df) == 3
+        assert str(df["timestamp"].dtype).startswith("datetime64")
+        assert df["status"].dtype == "category"
+        assert df["status_code"].isna().tolist() == [False, True, False]
+
+        # Un registro nuevo no modifica un DataFrame ya entregado
+        analytics_manager.add_data(make_record())
+        assert len(df) == 3
+        assert len(analytics_manager.get_data_for_chart()) == 4
+
+        print("✅ DataFrame de analytics funciona correctamente")
+
+    def test_growth_and_incompatible_values(self):
+        """Prueba el crecimiento de buffers y valores de tipo inesperado"""
+        analytics_manager = AnalyticsManager()
+        analytics_manager.store = type(analytics_manager.store)(initial_capacity=2)
+        for index in range(10):
+            analytics_manager.add_data(make_record(port=index))
+        analytics_manager.add_data(make_record(port="Manual"))
+
+        assert analytics_manager.get_total_checks() == 11
+        # El valor incompatible queda como nulo y la columna sigue siendo entera
+        assert [record["port"] for record in analytics_manager.get_data()] == list(range(10)) + [None]
+        assert analytics_manager.store.column("port").kind == "int"
+
+        print("✅ Crecimiento del almacenamiento funciona correctamente")
+
+    def test_max_rows_drops_oldest(self):
+        """Prueba que con max_rows se descartan los registros más antiguos sin perder los agregados"""
+        analytics_manager = AnalyticsManager(max_rows=8)
+        for index in range(20):
+            analytics_manager.add_data(make_record(target=f"host-{index}", timestamp=1_700_000_000 + index))
+
+        store = analytics_manager.store
+        assert len(store) <= 8 and store.evicted == 20 - len(store)
+        targets = [record["target"] for record in analytics_manager.get_data()]
+        assert targets == [f"host-{index}" for index in range(20 - len(store), 20)]
+        # Las categorías sin registros también se descartan
+        assert store.column("target").categories == targets
+        assert analytics_manager.memory_start() == 1_700_000_000 + 19 - len(store)
+        assert analytics_manager.query(target="host-19")["total"] == 1
+        assert analytics_manager.get_total_checks() == 20
+
+        print("✅ Límite de registros en memoria funciona correctamente")
+
+    def test_max_rows_keeps_dataframes(self):
+        """Prueba que descartar registros antiguos no modifica un DataFrame ya entregado"""
+        analytics_manager = AnalyticsManager(max_rows=8)
+        for index in range(8):
+            analytics_manager.add_data(make_record(
+                target=f"host-{index}", status="Error" if index % 2 else "Éxito",
+                response_time=index / 10, timestamp=1_700_000_000 + index
+            ))
+        df = analytics_manager.get_data_for_chart()
+        expected = df.copy(deep=True)
+
+        for index in range(8, 12):
+            analytics_manager.add_data(make_record(
+                target=f"host-{index}", status="Error" if index % 2 else "Éxito",
+                response_time=index / 10, timestamp=1_700_000_000 + index
+            ))
+
+        assert analytics_manager.store.evicted > 0
+        assert df.equals(expected)
+        assert df["target"].tolist() == [f"host-{index}" for index in range(8)]
+
+        print("✅ DataFrames con límite de registros funcionan correctamente")
+
+    def test_check_result_records(self):
+        """Prueba que los CheckResult se guardan igual que los diccionarios"""
+        record = CheckResult(target="10.0.0.1:22", protocol="tcp", port=22, socket_code=0, response_time=0.1,
+                             timestamp="2026-01-01 10:00:00", type="ip", status="Éxito")
+        assert not hasattr(record, "__dict__")
+        assert record.get("status_code", "N/A") == "N/A"
+        assert "status_code" not in record and "error_type" in record
+        assert record.subset(("port", "status_code")) == {"port": 22, "status_code": None}
+
+        analytics_manager = AnalyticsManager()
+        analytics_manager.add_data(record)
+        analytics_manager.add_data(make_record())
+
+        assert analytics_manager.get_checks_by_type() == {"ip": 1, "url": 1}
+        assert analytics_manager.get_data()[0]["socket_code"] == 0
+        assert analytics_manager.get_data()[0]["status_code"] is None
+        with pytest.raises(KeyError):
+            record["unknown"]
+
+        print("✅ Registros CheckResult funcionan correctamente")
+
+class TestSnapshotExamples:
+    """Pruebas de agregados incrementales y snapshot versionado"""
+
+    def test_snapshot_tracks_new_data(self):
+        """Prueba que la versión cambia solo al añadir datos"""
+        analytics_manager = AnalyticsManager()
+        empty = analytics_manager.get_snapshot()
+        assert empty["total_checks"] == 0
+        assert empty["average_response_time"] == 0.0
+
+        analytics_manager.add_data(make_record(response_time=1.0))
+        analytics_manager.add_data(make_record(status="Error", error_type="dns_error", response_time=None))
+        snapshot = analytics_manager.get_snapshot()
+
+        assert snapshot["version"] == empty["version"] + 2
+        assert analytics_manager.get_snapshot()["version"] == snapshot["version"]
+        assert snapshot["total_checks"] == 2
+        assert snapshot["success_rate"] == pytest.approx(50.0)
+        assert snapshot["average_response_time"] == pytest.approx(1.0)
+        assert snapshot["error_types"] == {"dns_error": 1}
+
+        print("✅ Snapshot versionado funciona correctamente")
+
+    def test_phase_breakdown(self):
+        """Prueba el desglose medio por fase desde las sumas incrementales"""
+        analytics_manager = AnalyticsManager(max_targets=3)
+        analytics_manager.add_data(make_record(target="https://slow", dns_time=0.2, connect_time=0.4, ttfb_time=1.0))
+        analytics_manager.add_data(make_record(target="https://slow", dns_time=0.0, connect_time=None, ttfb_time=0.6))
+        analytics_manager.add_data(make_record(target="https://fast", dns_time=0.01, ttfb_time=0.05))
+        analytics_manager.add_data(make_record(check_type="ip", target="10.0.0.1:22", connect_time=5.0))
+        analytics_manager.add_data(make_record(target="https://overflow", ttfb_time=0.1))
+
+        breakdown = analytics_manager.get_phase_breakdown("url")
+        assert list(breakdown) == ["https://slow", "__other__", "https://fast"]
+        # Una fase que no ocurrió cuenta como 0
+        assert breakdown["https://slow"]["dns_time"] == pytest.approx(0.1)
+        assert breakdown["https://slow"]["connect_time"] == pytest.approx(0.2)
+        assert breakdown["https://slow"]["ttfb_time"] == pytest.approx(0.8)
+        assert breakdown["https://slow"]["tls_time"] == 0.0
+        assert list(analytics_manager.get_phase_breakdown("url", limit=1)) == ["https://slow"]
+        assert list(analytics_manager.get_phase_breakdown("ip")) == ["10.0.0.1:22"]
+
+        print("✅ Desglose por fases funciona correctamente")
+
+class TestQueryExamples:
+    """Pruebas de la consulta paginada de registros"""
+
+    @pytest.fixture
+    def analytics_manager(self):
+        """Fixture con 30 registros de dos targets, URL e IP, con y sin error"""
+        analytics_manager = AnalyticsManager()
+        for index in range(30):
+            analytics_manager.add_data(make_record(
+                target=f"host-{index % 2}",
+                check_type="ip" if index % 3 == 0 else "url",
+                status="Error" if index % 5 == 0 else "Éxito",
+                error_type="timeout" if index % 5 == 0 else None,
+                timestamp=1767261600.0 + index,
+                response_time=None if index == 7 else index / 10
+            ))
+        return analytics_manager
+
+    def test_filters_and_pagination(self, analytics_manager):
+        """Prueba filtros, rango de tiempo y páginas"""
+        page = analytics_manager.query(limit=10)
+        assert page["total"] == 30
+        assert [record["timestamp"] for record in page["records"]] == [1767261600.0 + index for index in range(29, 19, -1)]
+
+        second = analytics_manager.query(offset=10, limit=10, descending=False, fields=["target", "port"])
+        assert second["records"][0] == {"target": "host-0", "port": None}
+
+        assert analytics_manager.query(status="Error")["total"] == 6
+        assert analytics_manager.query(check_type="ip", target="host-0")["total"] == 5
+        assert analytics_manager.query(error_type=["timeout", "dns_error"], check_type="url")["total"] == 4
+        assert analytics_manager.query(start=1767261610.0, end=1767261620.0)["total"] == 10
+        assert analytics_manager.query(target="desconocido")["total"] == 0
+        assert "headers" not in page["records"][0]
+
+        print("✅ Filtros y paginación de la consulta funcionan correctamente")
+
+    def test_sorting(self, analytics_manager):
+        """Prueba la ordenación por latencia y target con nulos al final"""
+        slowest = analytics_manager.query(sort="response_time", limit=3)["records"]
+        assert [record["response_time"] for record in slowest] == [2.9, 2.8, 2.7]
+        fastest = analytics_manager.query(sort="response_time", descending=False, limit=30)["records"]
+        assert fastest[0]["response_time"] == 0.0 and fastest[-1]["response_time"] is None
+
+        by_target = analytics_manager.query(sort="target", descending=False, limit=30)["records"]
+        assert [record["target"] for record in by_target] == ["host-0"] * 15 + ["host-1"] * 15
+        # Los empates conservan el orden de inserción
+        assert by_target[0]["timestamp"] < by_target[1]["timestamp"]
+        analytics_manager.add_data(make_record(attempts=[{"attempt": 1}]))
+        with pytest.raises(ValueError):
+            analytics_manager.query(sort="attempts")
+
+        print("✅ Ordenación de la consulta funciona correctamente")
+
+    def test_invalid_values_keep_column_types(self, analytics_manager):
+        """Prueba que un valor incompatible se guarda como nulo sin perder el tipo de la columna"""
+        analytics_manager.add_data(make_record(response_time="n/a", status_code="OK", timestamp="2026-01-01 11:00:00"))
+        assert analytics_manager.store.column("response_time").kind == "float"
+        assert analytics_manager.store.column("status_code").kind == "int"
+
+        page = analytics_manager.query(sort="response_time", descending=False, limit=100)
+        assert page["records"][-1]["timestamp"] == to_epoch("2026-01-01 11:00:00")
+        assert page["records"][-1]["response_time"] is None
+        assert page["records"][-1]["status_code"] is None
+        assert analytics_manager.query(sort="status_code")["total"] == page["total"]
+
+        print("✅ Valores incompatibles funcionan correctamente")
+
+class TestSharedAnalyticsExamples:
+    """Pruebas del AnalyticsManager compartido por todas las sesiones"""
+
+    def test_shared_manager_concurrent_appends(self, tmp_path, monkeypatch):
+        """Prueba que todas las sesiones usan el mismo manager y que las escrituras concurrentes no se pierden"""
+        import managers.analytics_manager as analytics_module
+        result_store = SQLiteResultStore(str(tmp_path / "results.db"), flush_interval=0.05)
+        monkeypatch.setattr(analytics_module, "_shared_manager", None)
+        monkeypatch.setattr(analytics_module, "get_shared_store", lambda: result_store)
+
+        managers = []
+        def session(index):
+            analytics_manager = analytics_module.get_shared_analytics()
+            managers.append(analytics_manager)
+            for check in range(200):
+                analytics_manager.add_data(make_record(
+                    target=f"host-{index}", status="Error" if check % 4 == 0 else "Éxito", timestamp=time.time()
+                ))
+
+        threads = [threading.Thread(target=session, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        shared = managers[0]
+        assert all(analytics_manager is shared for analytics_manager in managers)
+        assert shared.get_total_checks() == 1600
+        assert shared.get_checks_by_status() == {"Éxito": 1200, "Error": 400}
+        window = shared.get_window_metrics(time.time() - 3600)
+        assert window["total_checks"] == 1600
+        assert window["success_rate"] == pytest.approx(75.0)
+        # Dentro de la ventana en memoria; sin inicio, desde el almacén persistente
+        assert shared.query(target="host-3", start=time.time() - 3600)["total"] == 200
+        result_store.flush()
+        assert shared.query(target="host-3")["total"] == 200
+        result_store.close()
+
+        print("✅ Analytics compartido entre sesiones funciona correctamente")
+
+    def test_snapshot_totals_match_counters(self):
+        """Prueba que un snapshot tomado durante escrituras concurrentes es coherente"""
+        analytics_manager = AnalyticsManager()
+        done = threading.Event()
+
+        def writer(index):
+            for check in range(500):
+                analytics_manager.add_data(make_record(
+                    target=f"host-{index}", status="Error" if check % 3 == 0 else "Éxito", timestamp=time.time()
+                ))
+
+        threads = [threading.Thread(target=writer, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+
+        mismatches = []
+        def reader():
+            while not done.is_set():
+                snapshot = analytics_manager.get_snapshot()
+                if snapshot["total_checks"] != sum(snapshot["checks_by_status"].values()):
+                    mismatches.append(snapshot)
+
+        reader_thread = threading.Thread(target=reader)
+        reader_thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        reader_thread.join()
+
+        assert mismatches == []
+        assert analytics_manager.get_total_checks() == 2000
+
+        print("✅ Snapshot coherente durante escrituras concurrentes")
+
+class TestRollupExamples:
+    """Pruebas de los rollups por intervalo de tiempo"""
+
+    def test_timeline_from_rollups(self):
+        """Prueba la línea de tiempo por estado en minutos y horas"""
+        analytics_manager = AnalyticsManager()
+        base = 1767261600.0  # 2026-01-01 10:00:00 UTC
+        for offset, status, response_time in ((5, "Éxito", 0.2), (30, "Error", 1.0), (70, "Éxito", 0.4), (3700, "Éxito", 0.6)):
+            analytics_manager.add_data(make_record(status=status, timestamp=base + offset, response_time=response_time))
+
+        minutes = analytics_manager.get_timeline("1min", "status", end=base + 120)
+        assert len(minutes) == 3
+        assert minutes["Éxito"].tolist() == [1, 1, 0]
+        assert minutes["Error"].tolist() == [1, 0, 0]
+
+        hours = analytics_manager.get_timeline("1h", "status")
+        assert hours["Éxito"].tolist() == [2, 1]
+        assert analytics_manager.get_timeline("1h", "type", "error_rate")["url"].tolist() == [pytest.approx(100 / 3), 0.0]
+        assert analytics_manager.get_timeline("1d", "target", "max_response_time").iloc[0].tolist() == [1.0]
+        with pytest.raises(ValueError):
+            analytics_manager.get_timeline("5min")
+
+        print("✅ Línea de tiempo desde rollups funciona correctamente")
+
+    def test_rollup_retention_and_merge(self):
+        """Prueba que cada serie conserva un número acotado de buckets y que se combinan"""
+        from managers.rollups import RETENTION, TimeRollups
+        first, second = TimeRollups(), TimeRollups()
+        for minute in range(RETENTION["1min"] + 100):
+            first.add(minute * 60, "Éxito", "ip", "10.0.0.1:22", 0.1)
+        second.add(RETENTION["1min"] * 60, "Error", "ip", "10.0.0.1:22", 0.5)
+
+        bucket_starts, series = first.timeline("1min")
+        assert len(bucket_starts) == RETENTION["1min"]
+        first.merge(second)
+        bucket_starts, series = first.timeline("1min", metric="count")
+        assert series["Error"][bucket_starts.index(RETENTION["1min"] * 60)] == 1
+
+        print("✅ Retención y combinación de rollups funcionan correctamente")
+
+    def test_window_metrics_errors_and_latency(self):
+        """Prueba que los errores y la latencia máxima de una ventana salen solo de esa ventana"""
+        analytics_manager = AnalyticsManager()
+        now = time.time()
+        analytics_manager.add_data(make_record(status="Error", error_type="timeout", response_time=9.0, timestamp=now - 2 * 86400))
+        analytics_manager.add_data(make_record(status="Error", error_type="dns_error", response_time=None, timestamp=now - 60))
+        analytics_manager.add_data(make_record(response_time=0.3, timestamp=now - 30))
+
+        window = analytics_manager.get_window_metrics(now - 3600)
+        assert window["error_types"] == {"dns_error": 1}
+        assert window["max_response_time"] == pytest.approx(0.3)
+        week = analytics_manager.get_window_metrics(now - 7 * 86400)
+        assert week["error_types"] == {"timeout": 1, "dns_error": 1}
+        assert week["max_response_time"] == pytest.approx(9.0)
+        assert analytics_manager.get_timeline("1d", "error_type")["timeout"].sum() == 1
+
+        print("✅ Errores y latencia por ventana funcionan correctamente")
+
+class TestLatencySketchExamples:
+    """Pruebas de percentiles de latencia con sketches"""
+
+    def test_percentiles_within_relative_error(self):
+        """Prueba que los percentiles respetan el error relativo"""
+        analytics_manager = AnalyticsManager()
+        for millis in range(1, 1001):
+            analytics_manager.add_data(make_record(response_time=millis / 1000, target=f"host-{millis % 2}"))
+
+        latency = analytics_manager.get_latency_percentiles()
+        assert latency["count"] == 1000
+        assert latency["p50"] == pytest.approx(0.5, rel=0.02)
+        assert latency["p95"] == pytest.approx(0.95, rel=0.02)
+        assert latency["p99"] == pytest.approx(0.99, rel=0.02)
+        assert latency["max"] == pytest.approx(1.0)
+        assert analytics_manager.get_latency_percentiles(target="host-0")["count"] == 500
+        assert analytics_manager.get_latency_percentiles(check_type="ip")["count"] == 0
+
+        print("✅ Percentiles de latencia funcionan correctamente")
+
+    def test_merge_sketches(self):
+        """Prueba que los sketches de dos managers se combinan"""
+        first, second = AnalyticsManager(), AnalyticsManager()
+        for millis in range(1, 501):
+            first.add_data(make_record(response_time=millis / 1000))
+            second.add_data(make_record(response_time=(millis + 500) / 1000, check_type="ip"))
+
+        first.merge_latency_sketches(second.export_latency_sketches())
+        latency = first.get_latency_percentiles()
+        assert latency["count"] == 1000
+        assert latency["p50"] == pytest.approx(0.5, rel=0.02)
+        assert latency["max"] == pytest.approx(1.0)
+        assert first.get_latency_percentiles(check_type="ip")["count"] == 500
+
+        print("✅ Combinación de sketches funciona correctamente")
+
+    def test_target_sketches_are_capped(self):
+        """Prueba que los targets por encima del límite comparten un sketch"""
+        first, second = AnalyticsManager(max_targets=3), AnalyticsManager()
+        for host in range(10):
+            first.add_data(make_record(response_time=0.1, target=f"host-{host}"))
+            second.add_data(make_record(response_time=0.2, target=f"other-{host}"))
+
+        first.merge_latency_sketches(second.export_latency_sketches())
+        exported = first.export_latency_sketches()
+        assert sorted(exported["target"]) == ["__other__", "host-0", "host-1", "host-2"]
+        assert first.get_latency_percentiles(target="__other__")["count"] == 17
+        assert first.get_latency_percentiles()["count"] == 20
+
+        print("✅ Límite de sketches por target funciona correctamente")
+
+class TestResultStoreExamples:
+    """Pruebas del almacén persistente de resultados"""
+
+    @pytest.fixture
+    def result_store(self, tmp_path):
+        """Fixture con un almacén SQLite temporal"""
+        result_store = SQLiteResultStore(str(tmp_path / "results.db"), flush_interval=0.05)
+        yield result_store
+        result_store.close()
+
+    def test_persist_and_reload_window(self, result_store):
+        """Prueba que los registros sobreviven a un manager nuevo"""
+        analytics_manager = AnalyticsManager(result_store=result_store)
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        old = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - 7200))
+        analytics_manager.add_data(make_record(timestamp=now, attempts=[{"attempt": 1}]))
+        analytics_manager.add_data(make_record(timestamp=now, status="Error", error_type="timeout", check_type="ip"))
+        analytics_manager.add_data(make_record(timestamp=old))
+        result_store.flush()
+
+        reloaded = AnalyticsManager.from_store(result_store, window=3600)
+        assert reloaded.get_total_checks() == 2
+        assert reloaded.get_checks_by_status() == {"Éxito": 1, "Error": 1}
+        assert reloaded.get_data()[0]["attempts"] == [{"attempt": 1}]
+        # Las cabeceras no se persisten
+        assert "headers" not in reloaded.get_data()[0]
+
+        print("✅ Persistencia de resultados funciona correctamente")
+
+    def test_long_windows_from_store(self, result_store):
+        """Prueba que lo anterior a la ventana en memoria sale de los rollups y del almacén"""
+        now = time.time()
+        for index in range(10):
+            result_store.enqueue(make_record(
+                target=f"host-{index % 2}", status="Error" if index % 5 == 0 else "Éxito",
+                error_type="timeout" if index % 5 == 0 else None, response_time=index / 10, timestamp=now - index * 86400
+            ))
+        result_store.flush()
+
+        reloaded = AnalyticsManager.from_store(result_store, window=3600, max_rows=100)
+        assert len(reloaded.store) == 1
+        assert reloaded.get_window_metrics(now - 30 * 86400)["total_checks"] == 10
+        assert reloaded.get_window_metrics(now - 30 * 86400)["checks_by_status"] == {"Éxito": 8, "Error": 2}
+        assert reloaded.get_window_metrics(now - 30 * 86400)["error_types"] == {"timeout": 2}
+
+        page = reloaded.query(start=now - 7 * 86400 - 60, target=["host-0", "host-1"], sort="response_time", offset=1, limit=3)
+        assert page["total"] == 8
+        assert [record["response_time"] for record in page["records"]] == [0.6, 0.5, 0.4]
+        assert reloaded.query(status="Error", fields=["target", "status"])["records"] == [
+            {"target": "host-0", "status": "Error"}, {"target": "host-1", "status": "Error"}
+        ]
+        assert reloaded.query(start=now - 60)["total"] == 1
+
+        # Con max_rows solo se cargan los más recientes y el resto queda en los rollups
+        capped = AnalyticsManager.from_store(result_store, window=30 * 86400, max_rows=4)
+        assert len(capped.store) == 4
+        assert capped.get_window_metrics(now - 30 * 86400)["total_checks"] == 10
+        assert capped.query()["total"] == 10
+
+        print("✅ Ventanas largas desde el almacén persistente funcionan correctamente")
+
+    def test_indexed_queries_and_retention(self, result_store):
+        """Prueba filtros por tipo, estado y target, y la retención"""
+        for index in range(20):
+            result_store.enqueue(make_record(
+                target=f"host-{index % 2}",
+                check_type="ip" if index % 4 == 0 else "url",
+                status="Error" if index % 5 == 0 else "Éxito",
+                timestamp=time.time() - index
+            ))
+        result_store.enqueue(make_record(timestamp=time.time() - 40 * 86400))
+        result_store.flush()
+
+        assert result_store.count() == 21
+        assert result_store.count(check_type="ip") == 5
+        assert result_store.count(status="Error") == 4
+        assert result_store.count(target="host-1", start=time.time() - 100) == 10
+        assert len(result_store.query(limit=3)) == 3
+        assert result_store.purge() == 1
+
+        print("✅ Consultas indexadas y retención funcionan correctamente")
+
+    def test_invalid_records_do_not_drop_batch(self, result_store):
+        """Prueba que un registro inválido solo se descarta a sí mismo y el escritor sigue vivo"""
+        result_store.enqueue(make_record(target="válido-1"))
+        result_store.enqueue(make_record(timestamp=["no", "es", "fecha"]))
+        result_store.enqueue(make_record(timestamp="ayer"))
+        result_store.enqueue(make_record(target=object()))
+        result_store.enqueue(make_record(target="válido-2"))
+        result_store.flush()
+
+        assert result_store.dropped == 3
+        assert sorted(record["target"] for record in result_store.query()) == ["válido-1", "válido-2"]
+
+        result_store.enqueue(make_record(target="válido-3"))
+        result_store.flush()
+        assert result_store.count() == 3
+
+        print("✅ Registros inválidos se descartan de uno en uno correctamente")
+
+if __name__ == "__main__":
+    print("🧪 Ejecutando pruebas de AnalyticsManager...")
+    pytest.main([__file__, "-v"])
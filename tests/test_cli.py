@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la CLI de verificaciones masivas
+"""
+import io
+import json
+import subprocess
+import sys
+import time
+import pytest
+import cli
+from managers.check_result import TIMESTAMP_FORMAT
+
+class TestCLIExamples:
+    """Pruebas de la CLI sin Streamlit"""
+
+    def test_ips_jsonl_and_thresholds(self, listening_port):
+        """Prueba la salida JSONL y el código de salida según umbrales"""
+        targets = f"127.0.0.1:{listening_port}\n# comentario\n\n127.0.0.1:1\n"
+
+        output = io.StringIO()
+        args = cli.build_parser().parse_args(["ips", "--timeout", "2", "--max-error-rate", "60"])
+        assert cli.run(args, io.StringIO(targets), output) == 0
+
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert {record["target"]: record["status"] for record in records} == {
+            f"127.0.0.1:{listening_port}": "Éxito",
+            "127.0.0.1:1": "Error"
+        }
+        for record in records:
+            time.strptime(record["timestamp"], TIMESTAMP_FORMAT)
+
+        args = cli.build_parser().parse_args(["ips", "--timeout", "2", "--max-error-rate", "10"])
+        assert cli.run(args, io.StringIO(targets), io.StringIO()) == 1
+
+        print("✅ CLI de IPs funciona correctamente")
+
+    def test_csv_output(self, listening_port):
+        """Prueba la salida CSV"""
+        output = io.StringIO()
+        args = cli.build_parser().parse_args(["ips", "--format", "csv"])
+        cli.run(args, io.StringIO(f"127.0.0.1:{listening_port}\n"), output)
+
+        lines = output.getvalue().splitlines()
+        assert lines[0].split(",") == cli.CSV_FIELDS
+        assert len(lines) == 2
+        # El timestamp sale en texto legible, no en segundos epoch
+        time.strptime(lines[1].split(",")[0], TIMESTAMP_FORMAT)
+
+        print("✅ Salida CSV funciona correctamente")
+
+    def test_no_heavy_imports(self):
+        """Prueba que la CLI no importa streamlit, pandas, altair ni numpy"""
+        code = "import sys, cli, managers.url_manager, managers.ip_manager; print(sorted(m for m in ('streamlit', 'pandas', 'altair', 'numpy') if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "[]"
+
+        print("✅ La CLI arranca sin dependencias de la interfaz")
+
+if __name__ == "__main__":
+    print("🧪 Ejecutando pruebas de la CLI...")
+    pytest.main([__file__, "-v"])
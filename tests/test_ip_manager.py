@@ -2,9 +2,17 @@
 """
 Pruebas de IPManager y conectividad TCP
 """
+import errno
 import pytest
 import socket
-from managers.ip_manager import IPManager
+import threading
+import time
+from managers.ip_manager import IPManager, split_target
+from managers.analytics_manager import AnalyticsManager
+from managers.retry_policy import RetryPolicy
+from managers.dns_cache import DNSCache
+from managers.range_scanner import ScanMatrix, parse_ports, iter_hosts, count_hosts, expand_targets
+from managers.udp_probe import payload_for
 from unittest.mock import patch
 
 class TestIPExamples:
@@ -168,6 +176,497 @@ class TestConnectivityExamples:
 
         print("✅ Todos los códigos de excepción de socket funcionan correctamente")
 
+    def test_check_connectivity_retries_timeouts(self, ip_manager):
+        """Pruebas de reintentos tras un timeout TCP"""
+        with patch('socket.socket') as mock_socket_class:
+            ip_manager.set_target_params("192.168.1.1", 80, "tcp", None, 3, None, None)
+            ip_manager.set_retry_policy(RetryPolicy(backoff_base=0))
+            ip_manager.build_target()
+            mock_socket = mock_socket_class.return_value
+
+            mock_socket.connect_ex.side_effect = [110, 0]
+            status_type, _ = ip_manager.check_connectivity()
+            assert status_type == "Éxito"
+            assert ip_manager.response_data['attempt_count'] == 2
+
+        print("✅ Reintentos de socket funcionan correctamente")
+
+    def test_refused_connection_not_retried(self, ip_manager):
+        """Prueba que una conexión rechazada no se reintenta"""
+        ip_manager.set_target_params("127.0.0.1", 1, "tcp", 2, 3, None, None)
+        ip_manager.build_target()
+        status_type, _ = ip_manager.check_connectivity()
+        assert status_type == "Error"
+        assert ip_manager.request_metadata['error_type'] == "connection_refused"
+        assert ip_manager.response_data['attempt_count'] == 1
+
+        print("✅ Conexiones rechazadas sin reintentos funcionan correctamente")
+
+class TestAsyncProbeExamples:
+    """Pruebas del motor asyncio de sondas TCP"""
+
+    @pytest.fixture
+    def ip_manager(self):
+        """Fixture para crear instancia de IPManager"""
+        return IPManager()
+
+    def test_probe_tcp_open_closed_and_invalid(self, ip_manager, listening_port):
+        """Prueba puertos abiertos, cerrados y formato inválido"""
+        analytics_manager = AnalyticsManager()
+        ip_manager.set_analytics_callback(analytics_manager)
+        ip_manager.set_target_params("127.0.0.1", None, "tcp", 2, 1, None, None)
+        open_target = f"127.0.0.1:{listening_port}"
+
+        results = dict(ip_manager.probe_tcp([open_target, "127.0.0.1:1", "sin-puerto"], concurrency=2))
+
+        assert results[open_target][0] == "Éxito"
+        assert "cerrado" in results["127.0.0.1:1"][1]
+        assert "Formato inválido" in results["sin-puerto"][1]
+        assert analytics_manager.get_total_checks() == 3
+        assert analytics_manager.get_error_types() == {"connection_refused": 1, "invalid_format": 1}
+
+        print("✅ Sondas TCP asíncronas funcionan correctamente")
+
+    def test_probe_tcp_global_deadline(self, ip_manager):
+        """Prueba que las sondas fuera del límite global se marcan como timeout"""
+        ip_manager.set_target_params("127.0.0.1", None, "tcp", 2, 1, None, None)
+
+        results = ip_manager.probe_tcp([f"127.0.0.1:{port}" for port in range(1, 4)], deadline=0)
+
+        assert len(results) == 3
+        assert all("Timeout" in message for _, (_, message) in results)
+
+        print("✅ Límite global de sondas TCP funciona correctamente")
+
+class TestDNSCacheExamples:
+    """Pruebas de la caché DNS compartida"""
+
+    ADDRINFO = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.5", 0))]
+
+    def test_dns_cache_ttl_and_counters(self):
+        """Prueba aciertos, fallos y expiración por TTL"""
+        dns_cache = DNSCache(ttl=60)
+        with patch('socket.getaddrinfo', return_value=self.ADDRINFO) as mock_getaddrinfo:
+            assert dns_cache.gethostbyname("servidor.local") == "10.0.0.5"
+            assert dns_cache.gethostbyname("SERVIDOR.local") == "10.0.0.5"
+            assert mock_getaddrinfo.call_count == 1
+
+            dns_cache.ttl = 0
+            dns_cache.clear()
+            dns_cache.gethostbyname("servidor.local")
+            dns_cache.gethostbyname("servidor.local")
+            assert mock_getaddrinfo.call_count == 3
+
+        assert dns_cache.as_dict()["hits"] == 1
+        assert dns_cache.as_dict()["misses"] == 3
+        # Las IPs literales no pasan por el resolver ni por los contadores
+        assert dns_cache.gethostbyname("192.168.1.1") == "192.168.1.1"
+        assert dns_cache.as_dict()["misses"] == 3
+
+        print("✅ TTL y contadores de la caché DNS funcionan correctamente")
+
+    def test_dns_cache_negative_caching(self):
+        """Prueba que los NXDOMAIN se cachean y los errores transitorios no"""
+        dns_cache = DNSCache()
+        nxdomain = socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        with patch('socket.getaddrinfo', side_effect=nxdomain) as mock_getaddrinfo:
+            for _ in range(3):
+                with pytest.raises(socket.gaierror, match="Name or service not known"):
+                    dns_cache.resolve("noexiste.invalid")
+            assert mock_getaddrinfo.call_count == 1
+        assert dns_cache.as_dict()["negative_hits"] == 2
+
+        transient = socket.gaierror(socket.EAI_AGAIN, "Temporary failure in name resolution")
+        with patch('socket.getaddrinfo', side_effect=transient) as mock_getaddrinfo:
+            for _ in range(2):
+                with pytest.raises(socket.gaierror):
+                    dns_cache.resolve("inestable.local")
+            assert mock_getaddrinfo.call_count == 2
+
+        print("✅ Caché negativa de DNS funciona correctamente")
+
+    def test_tcp_check_uses_dns_cache(self):
+        """Prueba que un barrido de puertos resuelve el host una sola vez"""
+        ip_manager = IPManager(dns_cache=DNSCache())
+        with patch('socket.getaddrinfo', return_value=self.ADDRINFO) as mock_getaddrinfo, \
+                patch('socket.socket') as mock_socket_class:
+            mock_socket = mock_socket_class.return_value
+            mock_socket.connect_ex.return_value = 0
+            for port in (22, 80, 443):
+                ip_manager.set_target_params("servidor.local", port, "tcp", None, 1, None, None)
+                ip_manager.build_target()
+                status_type, _ = ip_manager.check_connectivity()
+                assert status_type == "Éxito"
+
+            assert mock_getaddrinfo.call_count == 1
+            mock_socket.connect_ex.assert_called_with(("10.0.0.5", 443))
+            assert ip_manager.response_data['host_info'] == "10.0.0.5"
+            assert ip_manager.response_data['dns_time'] >= 0
+
+        print("✅ Caché DNS en sondas TCP funciona correctamente")
+
+class TestRangeScanExamples:
+    """Pruebas del escáner de rangos CIDR y puertos"""
+
+    def test_parse_ports(self):
+        """Prueba listas, rangos, presets y solapes de puertos"""
+        assert parse_ports("22,80,443,8000-8100") == [(22, 22), (80, 80), (443, 443), (8000, 8100)]
+        assert parse_ports("8000-8100,8050-8200,8201") == [(8000, 8201)]
+        assert parse_ports("comunes") == [(22, 23), (25, 25), (53, 53), (3306, 3306), (5432, 5432)]
+        for invalid in ("0", "70000", "100-10", "http"):
+            with pytest.raises(ValueError):
+                parse_ports(invalid)
+
+        print("✅ Expresiones de puertos funcionan correctamente")
+
+    def test_hosts_expand_lazily(self):
+        """Prueba CIDR, rangos y hosts sin materializar la expansión"""
+        assert list(iter_hosts("10.0.0.0/30,10.0.1.5-10.0.1.6,mi-servidor.local")) == [
+            "10.0.0.1", "10.0.0.2", "10.0.1.5", "10.0.1.6", "mi-servidor.local"
+        ]
+        assert count_hosts("10.0.0.0/8") == 16777214
+
+        targets = expand_targets("10.0.0.0/8", "todos")
+        assert next(targets) == "10.0.0.1:1"
+        assert next(targets) == "10.0.0.1:2"
+
+        print("✅ Expansión perezosa de hosts funciona correctamente")
+
+    def test_scan_range_matrix(self):
+        """Prueba el escaneo local con la matriz host × puerto"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(16)
+        open_port = server.getsockname()[1]
+        try:
+            analytics_manager = AnalyticsManager()
+            ip_manager = IPManager()
+            ip_manager.set_target_params("127.0.0.1", None, "tcp", 2, 1, None, None)
+            ip_manager.set_analytics_callback(analytics_manager)
+            matrix = ip_manager.scan_range("127.0.0.1/32", f"1-3,{open_port}", concurrency=4)
+            # Las sondas del escaneo solo llegan a analytics si se pide
+            assert analytics_manager.get_total_checks() == 0
+            ip_manager.scan_range("127.0.0.1/32", "1-3", concurrency=4, analytics=True)
+            assert analytics_manager.get_total_checks() == 3
+        finally:
+            server.close()
+
+        assert matrix.get("127.0.0.1", open_port) == "Éxito"
+        assert matrix.get("127.0.0.1", 1) == "Error"
+        assert matrix.get("127.0.0.1", 4) is None
+        assert matrix.open_ports("127.0.0.1") == [open_port]
+        assert matrix.counts() == {"Éxito": 1, "Advertencia": 0, "Error": 3}
+        assert list(matrix.to_dataframe().columns) == [open_port]
+        assert list(matrix.to_dataframe(ports=[1, open_port]).columns) == [1, open_port]
+
+        print("✅ Escaneo de rangos funciona correctamente")
+
+    def test_scan_range_does_not_retry(self):
+        """Prueba que el escaneo hace un único intento por puerto aunque el manager tenga reintentos"""
+        ip_manager = IPManager()
+        ip_manager.set_target_params("127.0.0.1", None, "tcp", 2, 3, None, None)
+        ip_manager.set_retry_policy(RetryPolicy(backoff_base=0))
+        attempts = {}
+
+        async def filtered(addresses, port, timeout, end_time, udp_payload=None):
+            attempts[port] = attempts.get(port, 0) + 1
+            return {"socket_code": errno.ETIMEDOUT, "connection_type": None, "host_info": None, "connect_time": None, "addresses_tried": 1}
+
+        with patch.object(ip_manager, "_tcp_connect_async", filtered):
+            matrix = ip_manager.scan_range("127.0.0.1/32", "1-20", concurrency=8)
+            assert attempts == dict.fromkeys(range(1, 21), 1)
+            assert matrix.counts()["Error"] == 20
+
+            # Fuera del escaneo, el timeout sí se reintenta
+            attempts.clear()
+            ip_manager.probe_tcp(["127.0.0.1:7"], analytics=False)
+            assert attempts == {7: 4}
+
+        print("✅ Escaneo sin reintentos funciona correctamente")
+
+    def test_scan_matrix_columns_follow_requested_ports(self):
+        """Prueba que la matriz solo reserva columnas para los puertos pedidos"""
+        matrix = ScanMatrix("22,80,8000-8002")
+        for host in iter_hosts("10.0.0.0/22"):
+            matrix.record(f"{host}:80", ("Éxito", ""))
+        matrix.record("10.0.0.1:8001", ("Error", ""))
+        matrix.record("10.0.0.1:9999", ("Éxito", ""))
+
+        assert all(states.nbytes == 5 for states in matrix.hosts.values())
+        assert matrix.get("10.0.0.1", 8001) == "Error"
+        assert matrix.get("10.0.0.1", 22) is None and matrix.get("10.0.0.1", 9999) is None
+        assert matrix.open_ports("10.0.0.1") == [80]
+        assert matrix.counts() == {"Éxito": 1022, "Advertencia": 0, "Error": 1}
+        assert list(matrix.to_dataframe().columns) == [80]
+        with pytest.raises(ValueError):
+            matrix.to_dataframe(ports=[443])
+
+        print("✅ Columnas de la matriz de escaneo funcionan correctamente")
+
+class TestDualStackExamples:
+    """Pruebas de IPv6 y Happy Eyeballs en las sondas TCP"""
+
+    @pytest.fixture
+    def ipv6_port(self):
+        """Fixture con un puerto TCP escuchando en ::1"""
+        try:
+            server = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
+            server.bind(("::1", 0))
+        except OSError:
+            pytest.skip("IPv6 no disponible")
+        server.listen(16)
+        yield server.getsockname()[1]
+        server.close()
+
+    @pytest.fixture
+    def black_hole_and_healthy(self):
+        """Fixture con el mismo puerto colgado en 127.0.0.1 (cola llena) y abierto en 127.0.0.2"""
+        black_hole = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        black_hole.bind(("127.0.0.1", 0))
+        black_hole.listen(0)
+        port = black_hole.getsockname()[1]
+        fillers = []
+        for _ in range(3):
+            filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            filler.setblocking(False)
+            filler.connect_ex(("127.0.0.1", port))
+            fillers.append(filler)
+        healthy = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        healthy.bind(("127.0.0.2", port))
+        healthy.listen(16)
+        yield port
+        for sock in (black_hole, healthy, *fillers):
+            sock.close()
+
+    def test_split_target(self):
+        """Prueba el parseo de targets IPv4, nombres e IPv6"""
+        assert split_target("192.168.1.1:80") == ("192.168.1.1", 80)
+        assert split_target("localhost:22") == ("localhost", 22)
+        assert split_target("[2001:db8::1]:443") == ("2001:db8::1", 443)
+        assert split_target("[::1]:22") == ("::1", 22)
+        # Una IPv6 sin corchetes es ambigua (2001:db8::1:443 también es una dirección completa)
+        for invalid in ("192.168.1.1", "host:abc", ":80", "no:es:ipv6:80", "2001:db8::1:443", "::1:22", "[host]:80"):
+            with pytest.raises(ValueError):
+                split_target(invalid)
+
+        print("✅ Parseo de targets funciona correctamente")
+
+    def test_ipv6_literal(self, ipv6_port):
+        """Prueba sondas a una IPv6 literal (síncrona y asíncrona)"""
+        ip_manager = IPManager()
+        ip_manager.set_target_params("::1", ipv6_port, "tcp", 2, 1, None, None)
+        assert ip_manager.build_target() == f"[::1]:{ipv6_port}"
+
+        status_type, _ = ip_manager.check_connectivity()
+        assert status_type == "Éxito"
+        assert ip_manager.response_data["connection_type"] == "IPv6"
+        assert ip_manager.response_data["host_info"] == "::1"
+
+        results = dict(ip_manager.probe_tcp([ip_manager.target]))
+        assert results[ip_manager.target][0] == "Éxito"
+
+        print("✅ Sondas IPv6 funcionan correctamente")
+
+    def test_happy_eyeballs_skips_stalled_address(self, black_hole_and_healthy):
+        """Prueba que una dirección colgada no cuesta el timeout completo"""
+        port = black_hole_and_healthy
+        addrinfo = [
+            (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", 0)),
+            (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.2", 0))
+        ]
+        ip_manager = IPManager(dns_cache=DNSCache())
+        ip_manager.set_target_params("doble.local", port, "tcp", 3, 1, None, None)
+        ip_manager.build_target()
+
+        with patch('socket.getaddrinfo', return_value=addrinfo):
+            start = time.monotonic()
+            status_type, _ = ip_manager.check_connectivity()
+            assert status_type == "Éxito"
+            assert time.monotonic() - start < 2
+            assert ip_manager.response_data["host_info"] == "127.0.0.2"
+            assert ip_manager.response_data["addresses_tried"] == 2
+            assert ip_manager.response_data["connect_time"] >= 0
+
+            start = time.monotonic()
+            results = dict(ip_manager.probe_tcp([ip_manager.target]))
+            assert results[ip_manager.target][0] == "Éxito"
+            assert time.monotonic() - start < 2
+
+        print("✅ Happy Eyeballs funciona correctamente")
+
+    def test_happy_eyeballs_skips_unsupported_family(self, listening_port):
+        """Prueba que una familia sin soporte en el host pasa a la siguiente dirección"""
+        real_socket = socket.socket
+
+        def no_ipv6(family=socket.AF_INET, *args, **kwargs):
+            if family == socket.AF_INET6:
+                raise OSError(errno.EAFNOSUPPORT, "Address family not supported by protocol")
+            return real_socket(family, *args, **kwargs)
+
+        addresses = [(socket.AF_INET6, "::1"), (socket.AF_INET, "127.0.0.1")]
+        ip_manager = IPManager()
+        with patch("socket.socket", side_effect=no_ipv6):
+            connection = ip_manager._tcp_connect(addresses, listening_port, 2)
+        assert connection["socket_code"] == 0
+        assert connection["host_info"] == "127.0.0.1"
+        assert connection["addresses_tried"] == 2
+
+        print("✅ Familias sin soporte no cortan la carrera")
+
+    def test_response_time_uses_monotonic_clock(self, listening_port):
+        """Prueba que un salto del reloj de pared no altera el tiempo de respuesta"""
+        ip_manager = IPManager()
+        ip_manager.set_target_params("127.0.0.1", listening_port, "tcp", 2, 0, None, None)
+        ip_manager.build_target()
+
+        wall_clock = iter(range(0, 10 ** 9, 3600))
+        with patch("time.time", side_effect=lambda: next(wall_clock)):
+            status_type, _ = ip_manager.check_connectivity()
+        assert status_type == "Éxito"
+        assert 0 <= ip_manager.response_data["response_time"] < 2
+
+        print("✅ El tiempo de respuesta usa un reloj monótono")
+
+class TestUDPProbeExamples:
+    """Pruebas de las sondas UDP con payloads de protocolo"""
+
+    @pytest.fixture
+    def udp_server(self):
+        """Fixture con un servidor UDP local que contesta como DNS (mismo id y bit QR)"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(("127.0.0.1", 0))
+        stop = threading.Event()
+
+        def serve():
+            server.settimeout(0.05)
+            while not stop.is_set():
+                try:
+                    data, address = server.recvfrom(512)
+                except socket.timeout:
+                    continue
+                # Una respuesta ajena primero: debe descartarse
+                server.sendto(b"\x00\x00basura", address)
+                server.sendto(data[:2] + bytes([data[2] | 0x80]) + data[3:], address)
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        yield server.getsockname()[1]
+        stop.set()
+        thread.join()
+        server.close()
+
+    @pytest.fixture
+    def silent_port(self):
+        """Fixture con un puerto UDP que recibe pero nunca contesta"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(("127.0.0.1", 0))
+        yield server.getsockname()[1]
+        server.close()
+
+    def test_udp_payload_matching(self):
+        """Prueba que cada payload solo acepta respuestas a su propia petición"""
+        dns = payload_for(53)
+        datagram, token = dns.build()
+        assert dns.name == "dns"
+        assert dns.matches(datagram[:2] + b"\x81\x80" + datagram[4:], token)
+        assert not dns.matches(datagram, token)
+
+        ntp = payload_for(123)
+        datagram, token = ntp.build()
+        reply = bytes([0x24]) + bytes(23) + token + bytes(16)
+        assert ntp.matches(reply, token)
+        assert not ntp.matches(reply, b"\x00" * 8)
+
+        assert payload_for(9999).name == "echo"
+        with pytest.raises(ValueError):
+            payload_for(53, "snmp")
+
+        print("✅ Payloads UDP funcionan correctamente")
+
+    def test_udp_open_closed_and_silent(self, udp_server, silent_port):
+        """Prueba respuesta válida, ICMP port unreachable y puerto sin respuesta"""
+        analytics_manager = AnalyticsManager()
+        ip_manager = IPManager()
+        ip_manager.set_analytics_callback(analytics_manager)
+
+        ip_manager.set_target_params("127.0.0.1", udp_server, "udp", 1, 1, udp_payload="dns")
+        ip_manager.build_target()
+        status, message = ip_manager.check_connectivity()
+        assert status == "Éxito" and "UDP" in message
+        assert ip_manager.request_data["protocol"] == "udp"
+        assert ip_manager.response_data["probe_payload"] == "dns"
+        assert ip_manager.response_data["response_bytes"] > 12
+
+        # El puerto del servidor cerrado devuelve ICMP port unreachable
+        closed = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        closed.bind(("127.0.0.1", 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+
+        results = dict(ip_manager.probe_udp(
+            [f"127.0.0.1:{udp_server}", f"127.0.0.1:{closed_port}", f"127.0.0.1:{silent_port}"], timeout=0.6
+        ))
+        assert results[f"127.0.0.1:{udp_server}"][0] == "Éxito"
+        assert results[f"127.0.0.1:{closed_port}"][0] == "Error"
+        assert "cerrado" in results[f"127.0.0.1:{closed_port}"][1]
+        assert results[f"127.0.0.1:{silent_port}"][0] == "Advertencia"
+        assert analytics_manager.get_total_checks() == 4
+
+        print("✅ Sondas UDP funcionan correctamente")
+
+class TestStatelessCheckExamples:
+    """Pruebas de check con specs inmutables sobre un único manager"""
+
+    def test_concurrent_checks_share_manager(self):
+        """Prueba verificaciones concurrentes con un mismo IPManager sin mezclar resultados"""
+        servers = []
+        for _ in range(4):
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.bind(("127.0.0.1", 0))
+            server.listen(64)
+            servers.append(server)
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(("127.0.0.1", 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+
+        analytics_manager = AnalyticsManager()
+        ip_manager = IPManager()
+        ip_manager.set_analytics_callback(analytics_manager)
+        ip_manager.set_target_params("127.0.0.1", 9, "tcp", 1, 1, None, None)
+        ip_manager.build_target()
+        base_spec = ip_manager.build_spec()
+
+        ports = [server.getsockname()[1] for server in servers] + [closed_port]
+        outcomes = {}
+
+        def run(port):
+            for _ in range(10):
+                spec = base_spec.with_target(f"127.0.0.1:{port}")
+                result, record = ip_manager.check(spec)
+                outcomes.setdefault(port, set()).add((result[0], record.port, record.target))
+
+        threads = [threading.Thread(target=run, args=(port,)) for port in ports]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for server in servers:
+            server.close()
+
+        for port in ports:
+            expected = "Error" if port == closed_port else "Éxito"
+            assert outcomes[port] == {(expected, port, f"127.0.0.1:{port}")}
+
+        # El manager no cambia y el spec no se puede modificar
+        assert ip_manager.port == 9 and ip_manager.target == "127.0.0.1:9"
+        assert ip_manager.record is None
+        with pytest.raises(AttributeError):
+            base_spec.port = 80
+        assert analytics_manager.get_total_checks() == 10 * len(ports)
+
+        print("✅ Verificaciones concurrentes con un mismo manager funcionan correctamente")
+
 if __name__ == "__main__":
     print("🧪 Ejecutando pruebas de IPManager...")
     try:
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las sondas de protocolo (registro diferido, TLS, WebSocket, banners, Redis y Postgres)
+"""
+import base64
+import hashlib
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import threading
+import pytest
+from managers.ip_manager import IPManager
+from managers.url_manager import URLManager
+from managers.analytics_manager import AnalyticsManager
+from managers.probes import get_probe, probe_names, register_probe, unregister_probe
+from managers.probes.base import Probe
+
+def _serve(handler, wrap=None):
+    """Servidor TCP local que atiende cada conexión con handler(conn) en un hilo"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    server.settimeout(0.05)
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            try:
+                conn.settimeout(2)
+                if wrap is not None:
+                    conn = wrap(conn)
+                handler(conn)
+            except OSError:
+                pass
+            finally:
+                conn.close()
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    return server, stop, thread
+
+@pytest.fixture
+def serve():
+    """Fixture que arranca servidores de prueba y los detiene al terminar"""
+    servers = []
+
+    def start(handler, wrap=None):
+        server, stop, thread = _serve(handler, wrap)
+        servers.append((server, stop, thread))
+        return server.getsockname()[1]
+
+    yield start
+    for server, stop, thread in servers:
+        stop.set()
+        thread.join()
+        server.close()
+
+def _redis_handler(conn):
+    if conn.recv(64).startswith(b"*1\r\n$4\r\nPING"):
+        conn.sendall(b"+PONG\r\n")
+
+def _websocket_handler(conn):
+    request = conn.recv(4096).decode()
+    key = next(line.split(":", 1)[1].strip() for line in request.split("\r\n") if line.lower().startswith("sec-websocket-key"))
+    accept = base64.b64encode(hashlib.sha1(key.encode() + b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11").digest()).decode()
+    conn.sendall(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n".encode())
+
+class TestProbeExamples:
+    """Pruebas de las sondas de protocolo con servidores locales"""
+
+    def test_probes_load_lazily(self):
+        """Prueba que importar los managers no importa ninguna sonda"""
+        code = (
+            "import sys, managers.ip_manager, managers.url_manager\n"
+            "from managers.probes import get_probe\n"
+            "print(sorted(m for m in sys.modules if m.startswith('managers.probes.')))\n"
+            "get_probe('redis')\n"
+            "print(sorted(m for m in sys.modules if m.startswith('managers.probes.')))\n"
+        )
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.splitlines()
+        assert output[0] == "[]"
+        assert "managers.probes.redis" in output[1] and "managers.probes.tls" not in output[1]
+
+        with pytest.raises(ValueError):
+            get_probe("gopher")
+
+        print("✅ Carga diferida de sondas funciona correctamente")
+
+    def test_custom_probe_registration(self, serve):
+        """Prueba registrar una sonda propia y usarla desde IPManager"""
+        class EchoProbe(Probe):
+            name = "echo-test"
+
+            def exchange(self, sock, host, port, path):
+                sock.sendall(b"hola")
+                return ("Éxito", "✅ Eco", sock.recv(4).decode())
+
+        register_probe("echo-test", EchoProbe)
+        try:
+            port = serve(lambda conn: conn.sendall(conn.recv(4)))
+            ip_manager = IPManager()
+            ip_manager.set_target_params("127.0.0.1", port, "echo-test", 2, 1)
+            ip_manager.build_target()
+            assert ip_manager.check_connectivity() == ("Éxito", "✅ Eco")
+            assert ip_manager.response_data["probe_detail"] == "hola"
+        finally:
+            assert unregister_probe("echo-test")
+        assert "echo-test" not in probe_names()
+        assert not unregister_probe("echo-test")
+
+        print("✅ Registro de sondas propias funciona correctamente")
+
+    def test_unknown_protocol_is_error_result(self):
+        """Prueba que un protocolo sin sonda devuelve un error de formato y llega a analytics"""
+        analytics_manager = AnalyticsManager()
+        ip_manager = IPManager()
+        ip_manager.set_analytics_callback(analytics_manager)
+        ip_manager.set_target_params("127.0.0.1", 7, "icmp", 1, 3)
+        ip_manager.build_target()
+
+        status, message = ip_manager.check_connectivity()
+        assert status == "Error" and "Formato inválido" in message
+        assert ip_manager.request_metadata["error_type"] == "invalid_format"
+        assert ip_manager.request_data["protocol"] == "icmp"
+        assert dict(ip_manager.check_many(["127.0.0.1:8"]))["127.0.0.1:8"][0] == "Error"
+        assert analytics_manager.get_error_types() == {"invalid_format": 2}
+
+        print("✅ Protocolos sin sonda funcionan correctamente")
+
+    def test_ip_protocol_probes(self, serve):
+        """Prueba las sondas Redis, FTP, SMTP y Postgres contra servidores locales"""
+        analytics_manager = AnalyticsManager()
+        ip_manager = IPManager()
+        ip_manager.set_analytics_callback(analytics_manager)
+        ports = {
+            "redis": serve(_redis_handler),
+            "ftp": serve(lambda conn: conn.sendall(b"220 FTP listo\r\n")),
+            "smtp": serve(lambda conn: conn.sendall(b"421 Demasiadas conexiones\r\n")),
+            "postgres": serve(lambda conn: conn.recv(8) and conn.sendall(b"N"))
+        }
+        expected = {"redis": "Éxito", "ftp": "Éxito", "smtp": "Advertencia", "postgres": "Éxito"}
+
+        for protocol, port in ports.items():
+            ip_manager.set_target_params("127.0.0.1", port, protocol, 2, 1)
+            ip_manager.build_target()
+            status, message = ip_manager.check_connectivity()
+            assert status == expected[protocol], message
+            assert ip_manager.request_data["protocol"] == protocol
+            assert ip_manager.response_data["connect_time"] is not None
+            assert ip_manager.response_data["ttfb_time"] is not None
+
+        # Un servicio que no habla el protocolo es un error
+        ip_manager.set_target_params("127.0.0.1", serve(lambda conn: conn.sendall(b"SSH-2.0\r\n")), "redis", 2, 1)
+        ip_manager.build_target()
+        assert ip_manager.check_connectivity()[0] == "Error"
+        assert analytics_manager.get_total_checks() == 5
+
+        print("✅ Sondas de protocolo por IP funcionan correctamente")
+
+    def test_url_websocket_and_closed_port(self, serve):
+        """Prueba ws:// desde URLManager y una sonda a un puerto cerrado"""
+        url_manager = URLManager()
+        port = serve(_websocket_handler)
+        url_manager.set_target_params(f"ws://127.0.0.1:{port}/chat", None, None, None, None, 2, 1, True, True)
+        status, message = url_manager.check_connectivity()
+        assert status == "Éxito", message
+        assert url_manager.request_data["protocol"] == "ws"
+        assert url_manager.request_metadata["type"] == "url"
+
+        url_manager.set_target_params("ftp://127.0.0.1:1", None, None, None, None, 2, 1, True, True)
+        status, message = url_manager.check_connectivity()
+        assert status == "Error" and "rechazada" in message
+        assert url_manager.request_metadata["error_type"] == "connection_refused"
+
+        print("✅ Sondas de protocolo por URL funcionan correctamente")
+
+    @pytest.mark.skipif(shutil.which("openssl") is None, reason="openssl no disponible")
+    def test_tls_handshake(self, serve, tmp_path):
+        """Prueba la sonda TLS con un certificado autofirmado"""
+        cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", str(key), "-out", str(cert),
+             "-days", "30", "-subj", "/CN=localhost"],
+            check=True, capture_output=True
+        )
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        port = serve(lambda conn: conn.recv(1), wrap=lambda conn: context.wrap_socket(conn, server_side=True))
+
+        ip_manager = IPManager()
+        ip_manager.set_target_params("127.0.0.1", port, "tls", 2, 1, verify_ssl=False)
+        ip_manager.build_target()
+        status, message = ip_manager.check_connectivity()
+        assert status == "Éxito", message
+        assert "TLS" in ip_manager.response_data["probe_detail"]
+        assert ip_manager.response_data["tls_time"] is not None
+
+        ip_manager.set_target_params("127.0.0.1", port, "tls", 2, 1, verify_ssl=True)
+        ip_manager.build_target()
+        status, message = ip_manager.check_connectivity()
+        assert status == "Error" and "SSL" in message
+
+        print("✅ Sonda TLS funciona correctamente")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Pruebas del planificador de monitorización continua
+"""
+import threading
+import time
+import pytest
+from managers.ip_manager import IPManager
+from managers.analytics_manager import AnalyticsManager
+from managers.scheduler import MonitorScheduler, RateLimiter
+
+class _SlowManager:
+    """Manager de prueba cuya verificación tarda más que el intervalo"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def spec_for_target(self, target):
+        return target
+
+    def check(self, spec):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return ("Éxito", "✅ OK"), None
+
+class TestSchedulerExamples:
+    """Pruebas del planificador con jitter y límites de ritmo"""
+
+    def test_scheduler_feeds_analytics(self, listening_port):
+        """Prueba que los targets se verifican periódicamente y llegan a analytics"""
+        analytics_manager = AnalyticsManager()
+        ip_manager = IPManager()
+        ip_manager.set_target_params("127.0.0.1", None, "tcp", 1, 1, None, None)
+        ip_manager.set_analytics_callback(analytics_manager)
+
+        scheduler = MonitorScheduler(global_rate=None, per_host_rate=None)
+        job_id = scheduler.add_target(ip_manager, f"127.0.0.1:{listening_port}", interval=0.05)
+        scheduler.start()
+        time.sleep(0.6)
+        scheduler.stop()
+
+        job = scheduler.get_jobs()[0]
+        assert job["job_id"] == job_id
+        assert job["runs"] >= 3
+        assert job["last_status"] == "Éxito"
+        assert analytics_manager.get_total_checks() == job["runs"]
+        assert scheduler.remove_target(job_id)
+        assert scheduler.get_jobs() == []
+
+        print("✅ Planificador alimenta analytics correctamente")
+
+    def test_scheduler_skips_overlapping_runs(self):
+        """Prueba que una verificación en curso no se solapa consigo misma"""
+        manager = _SlowManager(delay=0.3)
+        scheduler = MonitorScheduler(global_rate=None, per_host_rate=None, jitter=0)
+        scheduler.add_target(manager, "https://lento.local", interval=0.05)
+        scheduler.start()
+        time.sleep(0.5)
+        scheduler.stop()
+
+        job = scheduler.get_jobs()[0]
+        assert manager.calls == job["runs"] <= 2
+        assert job["skipped"] >= 3
+
+        print("✅ Planificador omite ejecuciones solapadas correctamente")
+
+    def test_scheduler_per_host_rate_limit(self):
+        """Prueba que el límite por host retrasa las verificaciones del mismo host"""
+        manager = _SlowManager(delay=0)
+        scheduler = MonitorScheduler(global_rate=None, per_host_rate=4)
+        for path in ("/a", "/b", "/c"):
+            scheduler.add_target(manager, f"https://mismo-host.local{path}", interval=0.01)
+        scheduler.start()
+        time.sleep(0.5)
+        scheduler.stop()
+
+        # Ráfaga inicial de 4 tokens más 4 por segundo
+        assert manager.calls <= 7
+        assert sum(job["rate_limited"] for job in scheduler.get_jobs()) > 0
+
+        print("✅ Límite de ritmo por host funciona correctamente")
+
+    def test_rate_limiter_tokens(self):
+        """Prueba el token bucket"""
+        limiter = RateLimiter(rate=2, burst=1)
+        now = time.monotonic()
+        assert limiter.wait_time(now) == 0
+        limiter.take()
+        assert limiter.wait_time(now) == pytest.approx(0.5)
+        assert limiter.wait_time(now + 0.5) == 0
+
+        print("✅ Token bucket funciona correctamente")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Pruebas del barrido repartido entre procesos worker
+"""
+import socket
+import threading
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from managers.url_manager import URLManager
+from managers.ip_manager import IPManager
+from managers.analytics_manager import AnalyticsManager
+from managers.sharded_runner import ShardedRunner
+
+class _OKHandler(BaseHTTPRequestHandler):
+    """Servidor HTTP local que responde 200 a todo"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def local_url():
+    """Fixture con un servidor HTTP local"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OKHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+def _closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+class TestShardedRunnerExamples:
+    """Pruebas de ShardedRunner con servidores locales"""
+
+    def test_sharded_urls_merge_into_one_analytics(self, local_url):
+        """Prueba que los resultados de todos los workers llegan a un único AnalyticsManager"""
+        analytics_manager = AnalyticsManager()
+        url_manager = URLManager()
+        url_manager.set_target_params("example.com", "http", None, None, None, 2, 1, True, True, "stream")
+        url_manager.set_analytics_callback(analytics_manager)
+
+        closed = f"http://127.0.0.1:{_closed_port()}/down"
+        targets = [f"{local_url}/item/{i}" for i in range(40)] + [closed]
+        runner = ShardedRunner(url_manager, processes=2, concurrency=4, chunk_size=8)
+        results = dict(runner.run(iter(targets)))
+
+        assert set(results) == set(targets)
+        assert results[closed][0] == "Error" and "rechazada" in results[closed][1]
+        assert all(results[target][0] == "Éxito" for target in targets if target != closed)
+
+        assert analytics_manager.get_total_checks() == len(targets)
+        assert analytics_manager.get_error_types() == {"connection_refused": 1}
+        record = analytics_manager.query(target=targets[0], fields=["protocol", "timeout", "probe_mode", "status_code", "attempt_count"])["records"][0]
+        assert record == {"protocol": "http", "timeout": 2, "probe_mode": "stream", "status_code": 200, "attempt_count": 1}
+
+        print("✅ Barrido repartido entre procesos funciona correctamente")
+
+    def test_sharded_ip_probe_keeps_manager_settings(self):
+        """Prueba que cada worker usa el protocolo del manager y que un iterable vacío no falla"""
+        analytics_manager = AnalyticsManager()
+        ip_manager = IPManager()
+        ip_manager.set_target_params("127.0.0.1", None, "redis", 1, 1)
+        ip_manager.set_analytics_callback(analytics_manager)
+
+        target = f"127.0.0.1:{_closed_port()}"
+        runner = ShardedRunner(ip_manager, processes=2)
+        assert list(runner.run([])) == []
+        assert list(runner.run([target])) == [(target, ("Error", f"❌ Conexión rechazada: 127.0.0.1:{target.rsplit(':', 1)[1]}"))]
+        assert analytics_manager.query(fields=["protocol", "type"])["records"] == [{"protocol": "redis", "type": "ip"}]
+
+        print("✅ Barrido repartido de sondas IP funciona correctamente")
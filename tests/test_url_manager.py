@@ -3,9 +3,25 @@
 Pruebas de URLManager y conectividad HTTP
 """
 
+import errno
 import pytest
 import requests
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+import time
+import urllib3.exceptions
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from managers.url_manager import URLManager
+from managers.analytics_manager import AnalyticsManager
+from managers.session_pool import SessionPool
+from managers.dns_cache import DNSCache
+from managers.tls_cache import TLSCache
+from managers.retry_policy import RetryPolicy
+from managers.error_codes import classify_errno, classify_exception
+from managers.probes.base import ProbeError
 from data.status_codes_dicts import HTTP_STATUS_DICT
 from unittest.mock import patch
 
@@ -73,7 +89,7 @@ class TestConnectivityExamples:
 
     def test_check_connectivity_response_codes(self, url_manager):
         """Pruebas de códigos de estado HTTP"""
-        with patch('requests.get') as mock_get:
+        with patch('requests.Session.request') as mock_get:
             # Configurar URLManager
             url_manager.set_target_params("example.com", "https", None, "test", 5, 1, True, True)
             
@@ -110,7 +126,7 @@ class TestConnectivityExamples:
 
     def test_check_connectivity_exception_codes(self, url_manager):
         """Pruebas de errores de conexión HTTP"""
-        with patch('requests.get') as mock_get:
+        with patch('requests.Session.request') as mock_get:
             # Configurar URLManager
             url_manager.set_target_params("example.com", "https", None, "test", 5, 1, True, True)
             
@@ -172,6 +188,421 @@ class TestConnectivityExamples:
 
         print("✅ Todos los códigos de excepción funcionan correctamente")
 
+class TestRetryExamples:
+    """Pruebas de la política de reintentos"""
+
+    @pytest.fixture
+    def url_manager(self):
+        """Fixture para crear instancia de URLManager sin esperas entre intentos"""
+        url_manager = URLManager()
+        url_manager.set_retry_policy(RetryPolicy(backoff_base=0))
+        return url_manager
+
+    def test_retry_until_success(self, url_manager):
+        """Prueba que un timeout transitorio se reintenta"""
+        analytics_manager = AnalyticsManager()
+        url_manager.set_analytics_callback(analytics_manager)
+        url_manager.set_target_params("https://example.com", None, None, None, None, 5, 3, True, True)
+
+        with patch('requests.Session.request') as mock_request:
+            mock_response = mock_request.return_value
+            mock_response.status_code = 200
+            mock_request.side_effect = [requests.exceptions.Timeout("Request timeout"), mock_response]
+            status_type, _ = url_manager.check_connectivity()
+
+        assert status_type == "Éxito"
+        assert mock_request.call_count == 2
+        assert url_manager.response_data['attempt_count'] == 2
+        assert [attempt['error_type'] for attempt in url_manager.response_data['attempts']] == ["timeout", None]
+        # Una sola entrada en analytics por verificación
+        assert analytics_manager.get_total_checks() == 1
+
+        print("✅ Reintentos hasta el éxito funcionan correctamente")
+
+    def test_no_retry_for_non_retryable_errors(self, url_manager):
+        """Prueba que los errores no reintentables no se repiten"""
+        url_manager.set_target_params("example.com", None, None, None, None, 5, 3, True, True)
+
+        with patch('requests.Session.request') as mock_request:
+            mock_request.side_effect = requests.exceptions.MissingSchema("No scheme supplied")
+            status_type, _ = url_manager.check_connectivity()
+
+        assert status_type == "Error"
+        assert mock_request.call_count == 1
+
+        print("✅ Errores no reintentables funcionan correctamente")
+
+    def test_retries_count_after_first_attempt(self, url_manager):
+        """Prueba que `retries` cuenta los reintentos, no los intentos totales"""
+        for retries, expected in ((0, 1), (1, 2), (3, 4)):
+            url_manager.set_target_params("https://example.com", None, None, None, None, 5, retries, True, True)
+            with patch('requests.Session.request') as mock_request:
+                mock_request.side_effect = requests.exceptions.Timeout("Request timeout")
+                url_manager.check_connectivity()
+
+            assert mock_request.call_count == expected
+            assert url_manager.response_data['attempt_count'] == expected
+
+        print("✅ Número de reintentos funciona correctamente")
+
+    def test_retry_deadline(self, url_manager):
+        """Prueba que el límite global corta los reintentos"""
+        url_manager.set_retry_policy(RetryPolicy(backoff_base=10, jitter=False, deadline=1))
+        url_manager.set_target_params("https://example.com", None, None, None, None, 5, 5, True, True)
+
+        with patch('requests.Session.request') as mock_request:
+            mock_request.side_effect = requests.exceptions.Timeout("Request timeout")
+            url_manager.check_connectivity()
+
+        assert mock_request.call_count == 1
+
+        print("✅ Límite global de reintentos funciona correctamente")
+
+class TestBatchExamples:
+    """Pruebas de verificación por lotes"""
+
+    @pytest.fixture
+    def url_manager(self):
+        """Fixture para crear instancia de URLManager"""
+        return URLManager()
+
+    def test_check_many_feeds_analytics(self, url_manager):
+        """Prueba que cada resultado del lote llega a analytics"""
+        analytics_manager = AnalyticsManager()
+        url_manager.set_analytics_callback(analytics_manager)
+        url_manager.set_target_params("example.com", "https", None, None, None, 5, 1, True, True)
+        targets = [f"https://example{i}.com" for i in range(25)]
+
+        with patch('requests.Session.request') as mock_get:
+            mock_get.return_value.status_code = 200
+            results = dict(url_manager.check_many(targets, concurrency=4))
+
+        assert set(results) == set(targets)
+        assert all(status_type == "Éxito" for status_type, _ in results.values())
+        assert analytics_manager.get_total_checks() == len(targets)
+        assert {item['target'] for item in analytics_manager.get_data()} == set(targets)
+
+        print("✅ Verificación por lotes funciona correctamente")
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Servidor HTTP/1.1 local con keep-alive para las pruebas del pool"""
+    protocol_version = "HTTP/1.1"
+
+    body = b"x" * 200000
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """Servidor que no imprime las conexiones cortadas por el cliente"""
+
+    def handle_error(self, request, client_address):
+        pass
+
+@pytest.fixture
+def local_url():
+    """Fixture con un servidor HTTP local"""
+    server = _QuietHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/health"
+    server.shutdown()
+    server.server_close()
+
+class TestSessionPoolExamples:
+    """Pruebas del pool de conexiones HTTP"""
+
+    def test_pool_reuses_connections(self, local_url):
+        """Prueba que las verificaciones repetidas reutilizan la conexión"""
+        session_pool = SessionPool()
+        url_manager = URLManager(session_pool)
+        url_manager.set_target_params(local_url, None, None, None, None, 5, 1, True, True)
+
+        for _ in range(5):
+            status_type, _ = url_manager.check_connectivity()
+            assert status_type == "Éxito"
+
+        stats = session_pool.stats.as_dict()
+        assert stats["requests"] == 5
+        assert stats["new_connections"] == 1
+        assert stats["hits"] == 4
+        session_pool.close()
+
+        print("✅ Pool de conexiones reutiliza conexiones correctamente")
+
+    def test_pool_separates_ssl_settings(self):
+        """Prueba que verify_ssl y allow_redirects usan sesiones distintas"""
+        session_pool = SessionPool()
+        assert session_pool.get_session(True, True) is session_pool.get_session(None, True)
+        assert session_pool.get_session(True, True) is not session_pool.get_session(False, True)
+        assert session_pool.get_session(True, True) is not session_pool.get_session(True, False)
+        assert session_pool.get_session(False, True).verify is False
+
+        print("✅ Pool de conexiones separa configuraciones SSL correctamente")
+
+    def test_pool_resolves_with_dns_cache(self, local_url):
+        """Prueba que el host se resuelve una vez y se registra la fase DNS"""
+        dns_cache = DNSCache()
+        session_pool = SessionPool(dns_cache=dns_cache)
+        url_manager = URLManager(session_pool)
+        url_manager.set_target_params(local_url.replace("127.0.0.1", "localhost"), None, None, None, None, 5, 1, True, True)
+
+        for _ in range(3):
+            status_type, _ = url_manager.check_connectivity()
+            assert status_type == "Éxito"
+
+        assert dns_cache.as_dict()["misses"] == 1
+        assert dns_cache.as_dict()["hits"] >= 2
+        assert url_manager.response_data["dns_time"] is not None
+        session_pool.close()
+
+        print("✅ Caché DNS en el pool de conexiones funciona correctamente")
+
+    def test_cold_check_resolves_once(self, local_url):
+        """Prueba que una verificación sin conexión abierta resuelve el host una sola vez"""
+        dns_cache = DNSCache()
+        session_pool = SessionPool(dns_cache=dns_cache)
+        url_manager = URLManager(session_pool)
+        url_manager.set_target_params(local_url.replace("127.0.0.1", "localhost"), None, None, None, None, 5, 0, True, True)
+
+        with patch.object(dns_cache, "resolve", wraps=dns_cache.resolve) as resolve:
+            assert url_manager.check_connectivity()[0] == "Éxito"
+        assert resolve.call_count == 1
+        assert url_manager.response_data["dns_time"] is not None
+        session_pool.close()
+
+        print("✅ Resolución única por verificación funciona correctamente")
+
+    def test_phase_timings(self, local_url):
+        """Prueba que cada fase se mide y que una conexión reutilizada no conecta"""
+        session_pool = SessionPool()
+        url_manager = URLManager(session_pool)
+        url_manager.set_target_params(local_url, None, None, None, None, 5, 1, True, True, "head")
+
+        url_manager.check_connectivity()
+        first = dict(url_manager.response_data)
+        url_manager.check_connectivity()
+        second = url_manager.response_data
+
+        for field in ("dns_time", "connect_time", "ttfb_time", "body_time"):
+            assert first[field] >= 0
+        assert first["tls_time"] is None
+        assert second["connect_time"] is None
+        assert second["ttfb_time"] >= 0
+        assert first["response_time"] >= first["connect_time"] + first["ttfb_time"] + first["body_time"]
+        session_pool.close()
+
+        print("✅ Tiempos por fase funcionan correctamente")
+
+class TestProbeModeExamples:
+    """Pruebas de los modos de sonda HTTP"""
+
+    @pytest.fixture
+    def url_manager(self):
+        """Fixture para crear instancia de URLManager"""
+        return URLManager(SessionPool())
+
+    def test_probe_modes_avoid_full_body(self, url_manager, local_url):
+        """Prueba que solo el modo "get" descarga el cuerpo completo"""
+        expected = len(_KeepAliveHandler.body)
+        cases = [
+            ("get", expected),
+            ("head", 0),
+            ("stream", 0),
+            ("capped", 1024),
+        ]
+        for probe_mode, max_read in cases:
+            url_manager.set_target_params(local_url, None, None, None, None, 5, 1, True, True, probe_mode, 1024)
+            status_type, _ = url_manager.check_connectivity()
+
+            assert status_type == "Éxito"
+            assert url_manager.response_data['content_length'] == expected
+            assert url_manager.response_data['body_bytes_read'] <= max_read
+            assert url_manager.request_data['probe_mode'] == probe_mode
+
+        print("✅ Modos de sonda HTTP funcionan correctamente")
+
+    def test_invalid_probe_mode(self, url_manager):
+        """Prueba que un modo de sonda desconocido se rechaza"""
+        with pytest.raises(ValueError):
+            url_manager.set_target_params("https://example.com", probe_mode="post")
+
+class _ClosingHandler(_KeepAliveHandler):
+    """Servidor que cierra la conexión tras cada respuesta (cada verificación hace handshake)"""
+    protocol_version = "HTTP/1.0"
+
+@pytest.fixture
+def tls_certificate(tmp_path):
+    """Fixture con un certificado autofirmado para 127.0.0.1"""
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl no disponible")
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", str(key), "-out", str(cert),
+         "-days", "30", "-subj", "/CN=Pruebas", "-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+@pytest.fixture
+def local_https(tls_certificate):
+    """Fixture con un servidor HTTPS local que cierra cada conexión"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*tls_certificate)
+    server = _QuietHTTPServer(("127.0.0.1", 0), _ClosingHandler)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_port
+    server.shutdown()
+    server.server_close()
+
+class TestTLSCacheExamples:
+    """Pruebas de la reanudación de sesiones TLS y la caché de certificados"""
+
+    @pytest.mark.filterwarnings("ignore::urllib3.exceptions.InsecureRequestWarning")
+    def test_pool_resumes_tls_sessions(self, local_https):
+        """Prueba que la segunda conexión a un host reanuda la sesión TLS"""
+        tls_cache = TLSCache()
+        session_pool = SessionPool(tls_cache=tls_cache)
+        url_manager = URLManager(session_pool)
+        url_manager.set_target_params(f"https://127.0.0.1:{local_https}/health", None, None, None, None, 5, 1, True, False, "head")
+
+        resumed = []
+        for _ in range(3):
+            status_type, _ = url_manager.check_connectivity()
+            assert status_type == "Éxito"
+            assert url_manager.response_data["tls_time"] is not None
+            assert url_manager.response_data["tls_version"].startswith("TLS")
+            resumed.append(url_manager.response_data["tls_resumed"])
+
+        assert resumed == [False, True, True]
+        stats = tls_cache.as_dict()
+        assert stats["resumed"] == 2 and stats["full_handshakes"] == 1
+        assert stats["cert_hits"] == 2
+        session_pool.close()
+
+        print("✅ Reanudación de sesiones TLS funciona correctamente")
+
+    @pytest.mark.filterwarnings("ignore::urllib3.exceptions.InsecureRequestWarning")
+    def test_sessions_stay_with_their_context(self, local_https):
+        """Prueba que cambiar allow_redirects y verify_ssl contra el mismo host no ofrece sesiones de otro contexto"""
+        session_pool = SessionPool(tls_cache=TLSCache())
+        url_manager = URLManager(session_pool)
+        url = f"https://127.0.0.1:{local_https}/health"
+
+        outcomes = []
+        for allow_redirects, verify_ssl in ((True, False), (False, False), (False, True), (True, False)):
+            url_manager.set_target_params(url, None, None, None, None, 5, 1, allow_redirects, verify_ssl, "head")
+            status_type, _ = url_manager.check_connectivity()
+            outcomes.append((status_type, url_manager.request_metadata["error_type"] or url_manager.response_data["tls_resumed"]))
+
+        # Hay un contexto por verify_ssl: cambiar allow_redirects reanuda la sesión del mismo contexto
+        assert outcomes[:2] == [("Éxito", False), ("Éxito", True)]
+        # El contexto con verificación no recibe esa sesión; el certificado autofirmado no se valida
+        assert outcomes[2] == ("Error", "ssl_error")
+        assert outcomes[3] == ("Éxito", True)
+        session_pool.close()
+
+        print("✅ Sesiones TLS por contexto funcionan correctamente")
+
+    @pytest.mark.filterwarnings("ignore::urllib3.exceptions.InsecureRequestWarning")
+    def test_probes_share_tls_sessions(self, local_https):
+        """Prueba que la sonda TLS reanuda la sesión y reutiliza el certificado de las peticiones HTTPS"""
+        tls_cache = TLSCache()
+        session_pool = SessionPool(tls_cache=tls_cache)
+        url_manager = URLManager(session_pool)
+        url_manager.set_target_params(f"https://127.0.0.1:{local_https}/health", None, None, None, None, 5, 0, True, False, "head")
+        assert url_manager.check_connectivity()[0] == "Éxito"
+
+        url_manager.set_target_params(f"tls://127.0.0.1:{local_https}", None, None, None, None, 5, 0, True, False)
+        status_type, message = url_manager.check_connectivity()
+        assert status_type == "Éxito", message
+        assert url_manager.response_data["tls_resumed"] is True
+        assert url_manager.response_data["tls_version"].startswith("TLS")
+        stats = tls_cache.as_dict()
+        assert stats["resumed"] == 1 and stats["cert_hits"] == 1
+        session_pool.close()
+
+        print("✅ Sesiones TLS compartidas con las sondas funcionan correctamente")
+
+    def test_certificate_cache(self, local_https, tls_certificate):
+        """Prueba que el certificado se inspecciona una vez y se reutiliza mientras no cambia"""
+        tls_cache = TLSCache()
+        context = ssl.create_default_context(cafile=str(tls_certificate[0]))
+
+        entries = []
+        for verified in (True, True, False):
+            with socket.create_connection(("127.0.0.1", local_https)) as raw:
+                with context.wrap_socket(raw, server_hostname="127.0.0.1") as ssl_sock:
+                    entries.append(tls_cache.inspect_certificate("127.0.0.1", local_https, ssl_sock, verified))
+
+        assert entries[0]["valid"] is True
+        assert entries[0]["issuer"] == "Pruebas"
+        assert 29 <= (entries[0]["expires"] - time.time()) / 86400 <= 30
+        # Mismo certificado: la entrada validada se reutiliza también sin verificación
+        assert entries[1] is entries[0] and entries[2] is entries[0]
+        assert tls_cache.as_dict()["cert_hits"] == 2
+        assert tls_cache.as_dict()["cert_changes"] == 0
+
+        print("✅ Caché de certificados funciona correctamente")
+
+class TestErrorCodeExamples:
+    """Pruebas de la clasificación de errores por tipo de excepción y errno"""
+
+    def test_classify_wrapped_exceptions(self):
+        """Prueba excepciones de requests que envuelven errores de urllib3 y socket"""
+        def wrap(cause):
+            reason = urllib3.exceptions.NewConnectionError(None, "Failed to establish a new connection")
+            reason.__cause__ = cause
+            return requests.exceptions.ConnectionError(urllib3.exceptions.MaxRetryError(None, "/", reason))
+
+        assert classify_exception(wrap(ConnectionRefusedError(errno.ECONNREFUSED, "Connection refused"))) == "connection_refused"
+        assert classify_exception(wrap(OSError(errno.EHOSTUNREACH, "No route to host"))) == "host_unreachable"
+        assert classify_exception(wrap(socket.gaierror(socket.EAI_NONAME, "Name or service not known"))) == "dns_error"
+        assert classify_exception(requests.exceptions.ConnectTimeout("timed out")) == "timeout"
+        assert classify_exception(requests.exceptions.ConnectionError("sin causa")) == "connection_error"
+        assert classify_exception(socket.timeout()) == "timeout"
+        assert classify_exception(ProbeError("respuesta inesperada")) == "protocol_error"
+        assert classify_errno(0) is None
+        assert classify_errno(errno.ECONNREFUSED) == "connection_refused"
+        assert classify_errno(10054) == "connection_reset"
+        assert classify_errno(10054, "udp") == "connection_refused"
+
+        print("✅ Clasificación de excepciones envueltas funciona correctamente")
+
+    def test_refused_connection_error_type(self):
+        """Prueba una conexión rechazada real y un error HTTP"""
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(("127.0.0.1", 0))
+        port = closed.getsockname()[1]
+        closed.close()
+
+        url_manager = URLManager()
+        url_manager.set_target_params(f"http://127.0.0.1:{port}/", None, None, None, None, 2, 1, True, True)
+        status, message = url_manager.check_connectivity()
+        assert status == "Error" and "rechazada" in message
+        assert url_manager.request_metadata["error_type"] == "connection_refused"
+
+        with patch('requests.Session.request') as mock_request:
+            mock_request.return_value.status_code = 404
+            mock_request.return_value.history = []
+            mock_request.return_value.headers = {}
+            url_manager.set_target_params("https://example.com", None, None, None, None, 2, 1, True, True, "head")
+            assert url_manager.check_connectivity()[0] == "Error"
+            assert url_manager.request_metadata["error_type"] == "http_error"
+
+        print("✅ Tipos de error de URLManager funcionan correctamente")
+
 if __name__ == "__main__":
     print("🧪 Ejecutando pruebas de URLManager...")
     try: